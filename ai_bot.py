@@ -1,185 +1,203 @@
 import random
 import re
+from collections import Counter
+from collections.abc import Mapping
 from datetime import datetime
+from types import MappingProxyType
+
+from chat_batch import DEFAULT_CHUNK_SIZE, respond_in_batches
+from chat_stream import print_stream, text_chunks
+from intent_router import IntentRouter
+from ocean_knowledge import KNOWLEDGE
+from spelling import SpellingIndex, english_words, tokenize
+
+GREETINGS = ["hello", "hi", "hey", "greetings", "howdy"]
+FAREWELLS = ["bye", "goodbye", "see you", "farewell", "quit", "exit"]
+
+# Keywords that identify each ocean, checked in this order
+OCEAN_KEYWORDS = {
+    "pacific": ["pacific", "pacific ocean"],
+    "atlantic": ["atlantic", "atlantic ocean"],
+    "indian": ["indian", "indian ocean"],
+    "southern": ["southern", "southern ocean", "antarctic", "antarctica"],
+    "arctic": ["arctic", "arctic ocean"]
+}
+
+# Keyword sets for routing, compiled once into a single matcher
+QUERY_KEYWORDS = IntentRouter({
+    "greeting": GREETINGS,
+    "farewell": FAREWELLS,
+    "temperature": ["temperature"],
+    "salinity": ["salinity", "salt"],
+    "oxygen": ["oxygen", "o2"],
+    "depth": ["depth", "deep"],
+    "ph": ["ph", "acidity"],
+    "fish": ["fish", "species"],
+    "currents": ["current", "flow"],
+    "location": ["location", "where", "coordinates"],
+    "area": ["area", "size"],
+    "facts": ["fact", "interesting"],
+    **OCEAN_KEYWORDS
+})
+
+# Abbreviations and variants rewritten to the terms routing knows, after spelling correction
+SPELLING_ALIASES = {
+    "pasific": "pacific",
+    "atlantik": "atlantic",
+    "artic": "arctic",
+    "antartic": "southern",
+    "temp": "temperature",
+    "sal": "salinity",
+    "current": "currents",
+    "deep": "depth",
+    "warm": "temperature",
+    "cold": "temperature",
+    "hot": "temperature",
+    "salt": "salinity",
+    "flow": "currents",
+    "oxy": "oxygen",
+    "o2": "oxygen",
+    "fish": "fishes",
+    "species": "fishes",
+    "ph": "ph level",
+    "acidity": "ph level"
+}
+
+
+def knowledge_words(knowledge):
+    """Frequencies of the words used anywhere in the ocean and species knowledge"""
+    counts = Counter()
+    stack = [knowledge["ocean_data"], knowledge["fish_species"]]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, str):
+            counts.update(tokenize(value))
+        elif isinstance(value, Mapping):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return counts
+
+
+def build_spelling_index(knowledge):
+    """Correct towards the words routing listens for; leave other known words alone.
+
+    Farewells are never correction targets: a near miss ending the
+    conversation ("exist" read as "exit") costs far more than a missed one.
+    """
+    known = knowledge_words(knowledge)
+    terms = {word for phrase in list(QUERY_KEYWORDS.keywords) + list(SPELLING_ALIASES)
+             for word in tokenize(phrase)}
+    farewells = {word for phrase in FAREWELLS for word in tokenize(phrase)}
+    return SpellingIndex({word: known[word] + 1 for word in terms - farewells},
+                         known=set(known) | english_words() | farewells)
+
+
+SPELLING_INDEX = build_spelling_index(KNOWLEDGE)
+
+# Topics in the order generate_response checks them
+TOPICS = ["temperature", "salinity", "oxygen", "depth", "ph", "fish", "currents", "location", "area", "facts"]
+COMPARABLE = ["temperature", "salinity", "oxygen", "depth"]
+
+# Per-ocean one-line answers: topic -> (template, ocean_data field)
+TOPIC_TEMPLATES = {
+    "temperature": ("The temperature in the {name} is {value}.", "temperature"),
+    "salinity": ("The salinity in the {name} is {value}.", "salinity"),
+    "oxygen": ("The oxygen levels in the {name} are {value}.", "oxygen"),
+    "depth": ("The depth of the {name} is {value}.", "depth"),
+    "ph": ("The pH level in the {name} is {value}.", "ph_level"),
+    "currents": ("The major currents in the {name} are: {value}.", "currents"),
+    "location": ("The {name} is located at approximately {value}.", "coordinates"),
+    "area": ("The {name} has an area of {value}.", "area"),
+    "facts": ("Interesting fact about the {name}: {value}", "facts")
+}
+
+# Answers listing one field for every ocean: topic -> (heading, ocean_data field)
+LISTING_HEADINGS = {
+    "ph": ("pH levels across oceans:", "ph_level"),
+    "currents": ("Major ocean currents:", "currents"),
+    "location": ("Ocean locations:", "coordinates"),
+    "area": ("Ocean areas:", "area"),
+    "facts": ("Interesting facts about oceans:", "facts")
+}
+
+# Fields of the general overview of one ocean, in order
+GENERAL_INFO_FIELDS = [
+    ("Location", "coordinates"), ("Area", "area"), ("Volume", "volume"), ("Average Depth", "depth"),
+    ("Temperature", "temperature"), ("Salinity", "salinity"), ("Oxygen Levels", "oxygen"),
+    ("pH Level", "ph_level"), ("Interesting Fact", "facts"), ("Data Source", "data_source")
+]
+
+FISH_PROMPT = ("Which ocean are you interested in? I can tell you about fish species in the Pacific, "
+               "Atlantic, Indian, Southern, or Arctic Ocean.")
+NO_OCEAN_INFO = "I don't have information about that ocean."
+NO_FISH_INFO = "I don't have fish species information for that ocean."
+UNKNOWN_REPLY = ("I'm not sure I understand. I can help you with information about ocean temperature, salinity, "
+                 "oxygen levels, depth, currents, fish species, and more. Try asking about a specific ocean or parameter.")
+
+
+def listing(heading, rows):
+    return heading + "\n" + "".join(f"- {row}\n" for row in rows)
+
+
+def render_responses(ocean_data, fish_species):
+    """Render every answer that only depends on the knowledge base.
+
+    Returns {(ocean, topic): text}; ocean is None for the answers covering all
+    oceans, and topic "general" is the overview of one ocean.
+    """
+    responses = {}
+    for ocean, data in ocean_data.items():
+        name = data["name"]
+        for topic, (template, field) in TOPIC_TEMPLATES.items():
+            responses[ocean, topic] = template.format(name=name, value=data[field])
+        responses[ocean, "general"] = listing(
+            f"Information about the {name}:", (f"{label}: {data[field]}" for label, field in GENERAL_INFO_FIELDS))
+        if ocean in fish_species:
+            responses[ocean, "fish"] = listing(
+                f"Common fish species in the {name}:",
+                (f"{fish['name']} ({fish['scientific_name']}): {fish['habitat']}, "
+                 f"Conservation Status: {fish['conservation_status']}" for fish in fish_species[ocean]))
+
+    for parameter in COMPARABLE:
+        responses[None, parameter] = listing(
+            f"Comparison of {parameter} across oceans:",
+            (f"{data['name']}: {data[parameter]}" for data in ocean_data.values()))
+    for topic, (heading, field) in LISTING_HEADINGS.items():
+        responses[None, topic] = listing(heading, (f"{data['name']}: {data[field]}" for data in ocean_data.values()))
+    responses[None, "fish"] = FISH_PROMPT
+    return MappingProxyType(responses)
+
+
+# Rendered once per process, for the knowledge base loaded at import
+RESPONSES = render_responses(KNOWLEDGE["ocean_data"], KNOWLEDGE["fish_species"])
 
 class ARGOOceanChatbot:
-    def __init__(self):
-        self.name = "FloatChat ARGO Bot"
-        self.ocean_data = self.initialize_ocean_data()
-        self.fish_species = self.initialize_fish_species()
-        self.greetings = ["hello", "hi", "hey", "greetings", "howdy"]
-        self.farewells = ["bye", "goodbye", "see you", "farewell", "quit", "exit"]
-        
-    def initialize_ocean_data(self):
-        """Initialize ocean data with comprehensive information"""
-        return {
-            "pacific": {
-                "name": "Pacific Ocean",
-                "temperature": "22.5°C (72.5°F) average surface temperature",
-                "salinity": "34.7 PSU average salinity",
-                "oxygen": "4.5-6.2 mg/L (varies by depth and location)",
-                "currents": "Major currents: Kuroshio, California, Humboldt, East Australian",
-                "depth": "Average depth: 4,280m (14,040ft), Maximum: 10,911m (Mariana Trench)",
-                "coordinates": "0°N 160°W (approximate center)",
-                "area": "165,250,000 km² (63,800,000 sq mi)",
-                "volume": "710,000,000 km³ (170,000,000 cu mi)",
-                "facts": "The Pacific Ocean is the largest and deepest ocean, covering about 30% of Earth's surface.",
-                "data_source": "ARGO Float WMO 4901254, 2023-09-15",
-                "countries": ["United States", "Canada", "Mexico", "Japan", "Australia", "China", "Chile", "Peru"],
-                "oxygen_min": 4.5,
-                "oxygen_max": 6.2,
-                "ph_level": "7.8-8.3 (slightly alkaline)"
-            },
-            "atlantic": {
-                "name": "Atlantic Ocean",
-                "temperature": "18.9°C (66.0°F) average surface temperature",
-                "salinity": "35.4 PSU average salinity",
-                "oxygen": "5.0-6.5 mg/L (higher in northern regions)",
-                "currents": "Major currents: Gulf Stream, North Atlantic Drift, Canary, Benguela",
-                "depth": "Average depth: 3,646m (11,962ft), Maximum: 8,376m (Puerto Rico Trench)",
-                "coordinates": "0°N 30°W (approximate center)",
-                "area": "106,460,000 km² (41,100,000 sq mi)",
-                "volume": "310,410,900 km³ (74,471,500 cu mi)",
-                "facts": "The Atlantic Ocean is the second largest and saltiest ocean, crucial for global thermohaline circulation.",
-                "data_source": "ARGO Float WMO 3901402, 2023-09-10",
-                "countries": ["United States", "Brazil", "United Kingdom", "France", "Spain", "South Africa", "Nigeria"],
-                "oxygen_min": 5.0,
-                "oxygen_max": 6.5,
-                "ph_level": "7.9-8.4 (slightly alkaline)"
-            },
-            "indian": {
-                "name": "Indian Ocean",
-                "temperature": "26.0°C (78.8°F) average surface temperature",
-                "salinity": "34.8 PSU average salinity",
-                "oxygen": "4.2-5.8 mg/L (lower in northern regions)",
-                "currents": "Major currents: Agulhas, West Australian, Monsoon Drift",
-                "depth": "Average depth: 3,741m (12,274ft), Maximum: 7,258m (Java Trench)",
-                "coordinates": "20°S 80°E (approximate center)",
-                "area": "70,560,000 km² (27,240,000 sq mi)",
-                "volume": "264,000,000 km³ (63,000,000 cu mi)",
-                "facts": "The Indian Ocean is the warmest ocean, significantly influencing monsoon patterns in Asia.",
-                "data_source": "ARGO Float WMO 2902267, 2023-09-12",
-                "countries": ["India", "Indonesia", "Australia", "South Africa", "Maldives", "Sri Lanka", "Thailand"],
-                "oxygen_min": 4.2,
-                "oxygen_max": 5.8,
-                "ph_level": "7.8-8.3 (slightly alkaline)"
-            },
-            "southern": {
-                "name": "Southern Ocean",
-                "temperature": "2.0°C (35.6°F) average surface temperature",
-                "salinity": "34.2 PSU average salinity",
-                "oxygen": "6.0-8.0 mg/L (higher due to cold water)",
-                "currents": "Major current: Antarctic Circumpolar Current",
-                "depth": "Average depth: 4,500m (14,800ft), Maximum: 7,235m (South Sandwich Trench)",
-                "coordinates": "65°S 90°E (approximate center)",
-                "area": "21,960,000 km² (8,480,000 sq mi)",
-                "volume": "71,800,000 km³ (17,200,000 cu mi)",
-                "facts": "The Southern Ocean connects the Atlantic, Pacific, and Indian Oceans and plays a key role in global climate regulation.",
-                "data_source": "ARGO Float WMO 5904463, 2023-09-05",
-                "countries": ["No sovereign nations, surrounds Antarctica"],
-                "oxygen_min": 6.0,
-                "oxygen_max": 8.0,
-                "ph_level": "7.9-8.2 (slightly alkaline)"
-            },
-            "arctic": {
-                "name": "Arctic Ocean",
-                "temperature": "-1.5°C (29.3°F) average surface temperature",
-                "salinity": "30.5 PSU average salinity",
-                "oxygen": "7.0-9.0 mg/L (highest due to very cold water)",
-                "currents": "Major currents: Beaufort Gyre, Transpolar Drift",
-                "depth": "Average depth: 1,205m (3,953ft), Maximum: 5,550m (Eurasia Basin)",
-                "coordinates": "90°N 0°E (North Pole)",
-                "area": "15,558,000 km² (6,006,000 sq mi)",
-                "volume": "18,750,000 km³ (4,500,000 cu mi)",
-                "facts": "The Arctic Ocean is the smallest and shallowest ocean, experiencing significant sea ice loss due to climate change.",
-                "data_source": "ARGO Float WMO 7900542, 2023-09-18",
-                "countries": ["United States (Alaska)", "Canada", "Russia", "Norway", "Greenland (Denmark)", "Iceland"],
-                "oxygen_min": 7.0,
-                "oxygen_max": 9.0,
-                "ph_level": "7.8-8.1 (slightly alkaline)"
-            }
-        }
-    
-    def initialize_fish_species(self):
-        """Initialize fish species data for each ocean"""
-        return {
-            "pacific": [
-                {"name": "Pacific Salmon", "scientific_name": "Oncorhynchus spp.", "habitat": "Coastal and open ocean", "conservation_status": "Varies by species"},
-                {"name": "Bluefin Tuna", "scientific_name": "Thunnus orientalis", "habitat": "Open ocean", "conservation_status": "Endangered"},
-                {"name": "Clownfish", "scientific_name": "Amphiprioninae", "habitat": "Coral reefs", "conservation_status": "Least Concern"},
-                {"name": "Manta Ray", "scientific_name": "Mobula birostris", "habitat": "Open ocean", "conservation_status": "Vulnerable"}
-            ],
-            "atlantic": [
-                {"name": "Atlantic Cod", "scientific_name": "Gadus morhua", "habitat": "Coastal and deep water", "conservation_status": "Vulnerable"},
-                {"name": "Blue Marlin", "scientific_name": "Makaira nigricans", "habitat": "Open ocean", "conservation_status": "Vulnerable"},
-                {"name": "Humpback Whale", "scientific_name": "Megaptera novaeangliae", "habitat": "Open ocean", "conservation_status": "Least Concern"},
-                {"name": "American Lobster", "scientific_name": "Homarus americanus", "habitat": "Coastal seabed", "conservation_status": "Least Concern"}
-            ],
-            "indian": [
-                {"name": "Manta Ray", "scientific_name": "Mobula alfredi", "habitat": "Coral reefs", "conservation_status": "Vulnerable"},
-                {"name": "Coral Trout", "scientific_name": "Plectropomus leopardus", "habitat": "Coral reefs", "conservation_status": "Least Concern"},
-                {"name": "Whale Shark", "scientific_name": "Rhincodon typus", "habitat": "Open ocean", "conservation_status": "Endangered"},
-                {"name": "Clownfish", "scientific_name": "Amphiprion ocellaris", "habitat": "Coral reefs", "conservation_status": "Least Concern"}
-            ],
-            "southern": [
-                {"name": "Antarctic Krill", "scientific_name": "Euphausia superba", "habitat": "Open ocean", "conservation_status": "Least Concern"},
-                {"name": "Patagonian Toothfish", "scientific_name": "Dissostichus eleginoides", "habitat": "Deep water", "conservation_status": "Vulnerable"},
-                {"name": "Emperor Penguin", "scientific_name": "Aptenodytes forsteri", "habitat": "Coastal and ice", "conservation_status": "Near Threatened"},
-                {"name": "Weddell Seal", "scientific_name": "Leptonychotes weddellii", "habitat": "Coastal and ice", "conservation_status": "Least Concern"}
-            ],
-            "arctic": [
-                {"name": "Arctic Cod", "scientific_name": "Boreogadus saida", "habitat": "Coastal and open ocean", "conservation_status": "Least Concern"},
-                {"name": "Greenland Shark", "scientific_name": "Somniosus microcephalus", "habitat": "Deep water", "conservation_status": "Vulnerable"},
-                {"name": "Narwhal", "scientific_name": "Monodon monoceros", "habitat": "Open ocean", "conservation_status": "Near Threatened"},
-                {"name": "Beluga Whale", "scientific_name": "Delphinapterus leucas", "habitat": "Coastal and open ocean", "conservation_status": "Least Concern"}
-            ]
-        }
+    # Everything a bot knows is shared and read-only; instances carry no state
+    __slots__ = ()
+
+    name = "FloatChat ARGO Bot"
+    ocean_data = KNOWLEDGE["ocean_data"]
+    fish_species = KNOWLEDGE["fish_species"]
+    greetings = GREETINGS
+    farewells = FAREWELLS
+    responses = RESPONSES
     
     def correct_spelling(self, query):
-        """Correct common spelling mistakes in ocean-related terms"""
-        corrections = {
-            "pasific": "pacific",
-            "atlantik": "atlantic",
-            "indian": "indian",
-            "southern": "southern",
-            "artic": "arctic",
-            "antartic": "southern",
-            "temp": "temperature",
-            "sal": "salinity",
-            "current": "currents",
-            "deep": "depth",
-            "warm": "temperature",
-            "cold": "temperature",
-            "hot": "temperature",
-            "salt": "salinity",
-            "flow": "currents",
-            "oxy": "oxygen",
-            "o2": "oxygen",
-            "fish": "fishes",
-            "species": "fishes",
-            "ph": "ph level",
-            "acidity": "ph level"
-        }
-        
-        words = query.lower().split()
-        corrected_words = [corrections.get(word, word) for word in words]
-        return " ".join(corrected_words)
+        """Correct misspelled and abbreviated ocean-related terms"""
+        return " ".join(self.correct_tokens(tokenize(query)))
     
-    def detect_ocean(self, query):
+    def correct_tokens(self, tokens):
+        """Fix each token against the domain vocabulary, then expand aliases"""
+        return [SPELLING_ALIASES.get(word, word) for word in map(SPELLING_INDEX.correct, tokens)]
+    
+    def detect_ocean(self, query, hits=None):
         """Detect which ocean is mentioned in the query"""
-        query = query.lower()
-        oceans = {
-            "pacific": ["pacific", "pacific ocean"],
-            "atlantic": ["atlantic", "atlantic ocean"],
-            "indian": ["indian", "indian ocean"],
-            "southern": ["southern", "southern ocean", "antarctic", "antarctica"],
-            "arctic": ["arctic", "arctic ocean"]
-        }
-        
-        for ocean, keywords in oceans.items():
-            for keyword in keywords:
-                if keyword in query:
-                    return ocean
+        if hits is None:
+            hits = QUERY_KEYWORDS.hits(query.lower())
+        for ocean in OCEAN_KEYWORDS:
+            if ocean in hits:
+                return ocean
         return None
     
     def get_ocean_info(self, ocean, info_type):
@@ -195,141 +213,83 @@ class ARGOOceanChatbot:
     def get_fish_info(self, ocean):
         """Get information about fish species in an ocean"""
         if ocean not in self.fish_species:
-            return f"I don't have fish species information for that ocean."
-        
-        fish_list = self.fish_species[ocean]
-        response = f"Common fish species in the {self.ocean_data[ocean]['name']}:\n"
-        for fish in fish_list:
-            response += f"- {fish['name']} ({fish['scientific_name']}): {fish['habitat']}, Conservation Status: {fish['conservation_status']}\n"
-        return response
+            return NO_FISH_INFO
+        return self.responses[ocean, "fish"]
     
     def compare_oceans(self, parameter):
         """Compare a specific parameter across all oceans"""
-        if parameter not in ["temperature", "salinity", "oxygen", "depth"]:
+        if parameter not in COMPARABLE:
             return "I can only compare temperature, salinity, oxygen, or depth across oceans."
-        
-        response = f"Comparison of {parameter} across oceans:\n"
-        for ocean, data in self.ocean_data.items():
-            response += f"- {data['name']}: {data[parameter]}\n"
-        return response
+        return self.responses[None, parameter]
+    
+    def missing_topic(self, ocean, topic):
+        """The reply for a topic the knowledge base has no entry for in this ocean"""
+        if ocean not in self.ocean_data:
+            return NO_OCEAN_INFO
+        if topic == "fish":
+            return NO_FISH_INFO
+        return f"I don't have {topic} information for the {self.ocean_data[ocean]['name']}."
     
     def get_general_info(self, ocean):
         """Get general information about an ocean"""
         if ocean not in self.ocean_data:
-            return "I don't have information about that ocean."
-        
-        data = self.ocean_data[ocean]
-        response = f"Information about the {data['name']}:\n"
-        response += f"- Location: {data['coordinates']}\n"
-        response += f"- Area: {data['area']}\n"
-        response += f"- Volume: {data['volume']}\n"
-        response += f"- Average Depth: {data['depth']}\n"
-        response += f"- Temperature: {data['temperature']}\n"
-        response += f"- Salinity: {data['salinity']}\n"
-        response += f"- Oxygen Levels: {data['oxygen']}\n"
-        response += f"- pH Level: {data['ph_level']}\n"
-        response += f"- Interesting Fact: {data['facts']}\n"
-        response += f"- Data Source: {data['data_source']}\n"
-        return response
+            return NO_OCEAN_INFO
+        return self.responses[ocean, "general"]
+    
+    def generate_responses(self, queries, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Yield a response to each query, in order, answering them a chunk at a time.
+        With workers, chunks are spread over that many processes."""
+        return respond_in_batches(answer_batch, queries, workers, chunk_size)
+    
+    def stream_response(self, query):
+        """Yield the response to query a word at a time"""
+        return text_chunks(self.generate_response(query))
     
     def generate_response(self, query):
         """Generate a response to a user query"""
         query = self.correct_spelling(query.lower())
         
+        # Match every keyword set in one pass over the query
+        return self.answer(query, QUERY_KEYWORDS.hits(query))
+    
+    def answer(self, query, hits):
+        """Response to a lower-cased, spelling-corrected query, given its keyword hits"""
         # Check for greetings
-        if any(greeting in query for greeting in self.greetings):
+        if "greeting" in hits:
             return "Hello! I'm FloatChat, your AI assistant for exploring ARGO ocean data. How can I help you today?"
         
         # Check for farewells
-        if any(farewell in query for farewell in self.farewells):
+        if "farewell" in hits:
             return "Goodbye! Thank you for using FloatChat. Feel free to return with more questions about ocean data!"
         
         # Detect which ocean is being discussed
-        ocean = self.detect_ocean(query)
-        
-        # Handle specific information requests
-        if "temperature" in query:
-            if ocean:
-                return f"The temperature in the {self.ocean_data[ocean]['name']} is {self.ocean_data[ocean]['temperature']}."
-            else:
-                return self.compare_oceans("temperature")
-        
-        elif "salinity" in query or "salt" in query:
-            if ocean:
-                return f"The salinity in the {self.ocean_data[ocean]['name']} is {self.ocean_data[ocean]['salinity']}."
-            else:
-                return self.compare_oceans("salinity")
-        
-        elif "oxygen" in query or "o2" in query:
-            if ocean:
-                return f"The oxygen levels in the {self.ocean_data[ocean]['name']} are {self.ocean_data[ocean]['oxygen']}."
-            else:
-                return self.compare_oceans("oxygen")
-        
-        elif "depth" in query or "deep" in query:
-            if ocean:
-                return f"The depth of the {self.ocean_data[ocean]['name']} is {self.ocean_data[ocean]['depth']}."
-            else:
-                return self.compare_oceans("depth")
-        
-        elif "ph" in query or "acidity" in query:
-            if ocean:
-                return f"The pH level in the {self.ocean_data[ocean]['name']} is {self.ocean_data[ocean]['ph_level']}."
-            else:
-                response = "pH levels across oceans:\n"
-                for ocean_name, data in self.ocean_data.items():
-                    response += f"- {data['name']}: {data['ph_level']}\n"
-                return response
+        ocean = self.detect_ocean(query, hits)
         
-        elif "fish" in query or "species" in query:
-            if ocean:
-                return self.get_fish_info(ocean)
-            else:
-                return "Which ocean are you interested in? I can tell you about fish species in the Pacific, Atlantic, Indian, Southern, or Arctic Ocean."
-        
-        elif "current" in query or "flow" in query:
-            if ocean:
-                return f"The major currents in the {self.ocean_data[ocean]['name']} are: {self.ocean_data[ocean]['currents']}."
-            else:
-                response = "Major ocean currents:\n"
-                for ocean_name, data in self.ocean_data.items():
-                    response += f"- {data['name']}: {data['currents']}\n"
-                return response
-        
-        elif "location" in query or "where" in query or "coordinates" in query:
-            if ocean:
-                return f"The {self.ocean_data[ocean]['name']} is located at approximately {self.ocean_data[ocean]['coordinates']}."
-            else:
-                response = "Ocean locations:\n"
-                for ocean_name, data in self.ocean_data.items():
-                    response += f"- {data['name']}: {data['coordinates']}\n"
-                return response
-        
-        elif "area" in query or "size" in query:
-            if ocean:
-                return f"The {self.ocean_data[ocean]['name']} has an area of {self.ocean_data[ocean]['area']}."
-            else:
-                response = "Ocean areas:\n"
-                for ocean_name, data in self.ocean_data.items():
-                    response += f"- {data['name']}: {data['area']}\n"
-                return response
-        
-        elif "fact" in query or "interesting" in query:
-            if ocean:
-                return f"Interesting fact about the {self.ocean_data[ocean]['name']}: {self.ocean_data[ocean]['facts']}"
-            else:
-                response = "Interesting facts about oceans:\n"
-                for ocean_name, data in self.ocean_data.items():
-                    response += f"- {data['name']}: {data['facts']}\n"
-                return response
+        # Topic answers, for one ocean or listed across all of them, are prerendered
+        for topic in TOPICS:
+            if topic in hits:
+                answer = self.responses.get((ocean, topic))
+                return answer if answer is not None else self.missing_topic(ocean, topic)
         
         # General information about a specific ocean
-        elif ocean:
+        if ocean:
             return self.get_general_info(ocean)
         
         # Default response for unrecognized queries
-        else:
-            return "I'm not sure I understand. I can help you with information about ocean temperature, salinity, oxygen levels, depth, currents, fish species, and more. Try asking about a specific ocean or parameter."
+        return UNKNOWN_REPLY
+
+def answer_batch(queries):
+    """Responses to a list of queries; answers are deterministic, so repeats are answered once.
+    The distinct queries are tokenized together, each distinct word in the batch is
+    spell-corrected once, and the corrected queries are routed in one pass."""
+    bot = ARGOOceanChatbot()
+    distinct = list(dict.fromkeys(queries))
+    tokenized = [tokenize(query.lower()) for query in distinct]
+    words = list({word for tokens in tokenized for word in tokens})
+    corrected = dict(zip(words, bot.correct_tokens(words)))
+    texts = [" ".join([corrected[word] for word in tokens]) for tokens in tokenized]
+    answers = dict(zip(distinct, map(bot.answer, texts, QUERY_KEYWORDS.hits_many(texts))))
+    return [answers[query] for query in queries]
 
 def main():
     """Main function to run the chatbot"""
@@ -354,8 +314,7 @@ def main():
             print(f"\n{chatbot.name}: Goodbye! Thank you for using FloatChat.")
             break
         
-        response = chatbot.generate_response(user_input)
-        print(f"\n{chatbot.name}: {response}")
+        print_stream(f"\n{chatbot.name}: ", chatbot.stream_response(user_input))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,165 +1,241 @@
 import random
-import re
 import numpy as np
 from datetime import datetime
-from collections import defaultdict
+from collections import deque
 import math
+import os
 
-class AdvancedOceanChatbot:
-    def __init__(self):
-        self.name = "FloatChat ARGO AI Assistant"
-        self.ocean_data = self.initialize_ocean_data()
-        self.marine_life = self.initialize_marine_life()
-        self.conservation_data = self.initialize_conservation_data()
-        self.climate_data = self.initialize_climate_data()
-        self.human_impact_data = self.initialize_human_impact_data()
-        
-        # Conversation history for context
-        self.conversation_history = []
-        
-        # Initialize keyword patterns for intent recognition
-        self.initialize_keyword_patterns()
-        
-        print(f"{self.name} initialized. Ready to answer your ocean-related questions!")
-    
-    def initialize_keyword_patterns(self):
-        """Initialize patterns for intent recognition"""
-        self.keyword_patterns = {
-            'greeting': [r'hello', r'hi', r'hey', r'greetings', r'howdy'],
-            'farewell': [r'bye', r'goodbye', r'see you', r'farewell', r'quit', r'exit'],
-            'ocean_info': [r'pacific', r'atlantic', r'indian', r'southern', r'arctic', r'ocean'],
-            'marine_life': [r'fish', r'species', r'marine', r'coral', r'whale', r'dolphin', 
-                           r'shark', r'plankton', r'krill', r'seal', r'penguin'],
-            'climate': [r'climate', r'warming', r'temperature', r'change', r'current', r'el nino',
-                       r'la nina', r'weather', r'co2', r'carbon'],
-            'conservation': [r'conservation', r'protect', r'endangered', r'threat', r'pollution',
-                            r'plastic', r'overfishing', r'sustainable', r'preserve'],
-            'human_impact': [r'human', r'impact', r'fishing', r'pollution', r'tourism', r'shipping',
-                            r'mining', r'offshore', r'drilling'],
-            'scientific': [r'data', r'research', r'study', r'science', r'scientific', r'argo',
-                          r'float', r'measurement', r'experiment'],
-            'geography': [r'location', r'where', r'coordinates', r'area', r'size', r'depth',
-                         r'trench', r'ridge', r'basin'],
-            'chemistry': [r'salinity', r'oxygen', r'ph', r'acidification', r'nutrient', r'chemical',
-                         r'composition', r'element'],
-            'physics': [r'current', r'wave', r'tide', r'pressure', r'density', r'circulation',
-                       r'gyre', r'upwelling', r'thermocline']
-        }
-    
-    def initialize_ocean_data(self):
-        """Initialize comprehensive ocean data"""
-        # This would be expanded with real data in a production system
-        return {
-            "pacific": {
-                "name": "Pacific Ocean",
-                "temperature": {"surface": "22.5°C", "deep": "1-4°C", "trend": "+0.12°C/decade"},
-                "salinity": "34.7 PSU average",
-                "oxygen": {"surface": "6.2 mg/L", "deep": "4.5 mg/L", "trend": "-0.5%/decade"},
-                "ph": {"surface": "8.05", "trend": "-0.02/decade"},
-                "currents": ["Kuroshio Current", "California Current", "Humboldt Current", "East Australian Current"],
-                "depth": {"average": "4,280m", "max": "10,911m (Challenger Deep, Mariana Trench)"},
-                "area": "165,250,000 km²",
-                "volume": "710,000,000 km³",
-                "coordinates": "0°N 160°W (approximate center)",
-                "countries": ["USA", "Canada", "Mexico", "Japan", "Australia", "China", "Chile", "Peru"],
-                "facts": [
-                    "Largest and deepest ocean, covering about 30% of Earth's surface",
-                    "Home to the Great Barrier Reef, the world's largest coral reef system",
-                    "Contains the Mariana Trench, the deepest point on Earth"
-                ],
-                "biodiversity": "High - contains about 50% of the world's marine species",
-                "data_source": "ARGO Float Network, NOAA, UNESCO-IOC"
-            },
-            # Similar data structures for other oceans...
-        }
-    
-    def initialize_marine_life(self):
-        """Initialize marine life database"""
-        return {
-            "pacific": {
-                "mammals": ["Blue Whale", "Humpback Whale", "Orca", "Dolphins", "Sea Otters"],
-                "fish": ["Pacific Salmon", "Tuna", "Halibut", "Sardines", "Anchovies"],
-                "invertebrates": ["Giant Pacific Octopus", "Jellyfish", "Krill", "Crab", "Shrimp"],
-                "corals": ["Great Barrier Reef Corals", "Coral Polyps", "Sea Anemones"],
-                "plants": ["Kelp Forests", "Phytoplankton", "Sea Grasses"],
-                "endangered": ["Blue Whale", "Sea Otter", "Leatherback Turtle"]
-            },
-            # Similar data for other oceans...
-        }
-    
-    def initialize_conservation_data(self):
-        """Initialize conservation issues data"""
-        return {
-            "pollution": {
-                "plastic": "8 million tons of plastic enter oceans yearly",
-                "chemical": "Industrial runoff and oil spills harm marine ecosystems",
-                "noise": "Shipping and sonar disrupt marine mammal communication"
-            },
-            "overfishing": {
-                "status": "90% of global fish stocks are overfished or fully exploited",
-                "impact": "Disrupts food webs and marine ecosystem balance"
-            },
-            "habitat_destruction": {
-                "coral_reefs": "50% of coral reefs have been lost in last 30 years",
-                "mangroves": "35% of mangroves have been destroyed",
-                "seagrass": "29% of seagrass habitats have disappeared"
-            },
-            "climate_impact": {
-                "coral_bleaching": "Rising temperatures cause coral bleaching events",
-                "sea_level_rise": "Threatens coastal habitats and communities",
-                "acidification": "Ocean pH has dropped by 0.1 units since industrial revolution"
-            }
-        }
-    
-    def initialize_climate_data(self):
-        """Initialize climate-related ocean data"""
-        return {
-            "temperature_trend": "Global ocean surface temperature increased by 0.88°C since 1900",
-            "sea_level_rise": "Global mean sea level has risen about 20cm since 1900",
-            "acidification": "Ocean pH has decreased by 0.1 units (30% increase in acidity)",
-            "current_changes": "Major ocean currents are slowing due to meltwater input",
-            "extreme_events": "Increased frequency of marine heatwaves and harmful algal blooms"
-        }
+from chat_batch import DEFAULT_CHUNK_SIZE, respond_in_batches
+from chat_stream import print_stream, text_chunks
+from intent_classifier import HashedNgramClassifier
+from intent_router import IntentRouter
+from knowledge_index import TfidfIndex, knowledge_passages
+from ocean_knowledge import KNOWLEDGE
+
+# Words that tip the sentiment-aware closing either way. Twelve substring
+# checks are cheaper than a compiled matcher, so they're kept as plain lists
+SENTIMENT_WORDS = {
+    'positive': ['love', 'great', 'awesome', 'amazing', 'beautiful', 'wonderful'],
+    'negative': ['hate', 'terrible', 'awful', 'disgusting', 'sad', 'worried']
+}
+
+# Keyword patterns for intent recognition. Every pattern is a literal keyword,
+# so all of them compile into one matcher
+INTENT_PATTERNS = {
+    'greeting': [r'hello', r'hi', r'hey', r'greetings', r'howdy'],
+    'farewell': [r'bye', r'goodbye', r'see you', r'farewell', r'quit', r'exit'],
+    'ocean_info': [r'pacific', r'atlantic', r'indian', r'southern', r'arctic', r'ocean'],
+    'marine_life': [r'fish', r'species', r'marine', r'coral', r'whale', r'dolphin', 
+                   r'shark', r'plankton', r'krill', r'seal', r'penguin'],
+    'climate': [r'climate', r'warming', r'temperature', r'change', r'current', r'el nino',
+               r'la nina', r'weather', r'co2', r'carbon'],
+    'conservation': [r'conservation', r'protect', r'endangered', r'threat', r'pollution',
+                    r'plastic', r'overfishing', r'sustainable', r'preserve'],
+    'human_impact': [r'human', r'impact', r'fishing', r'pollution', r'tourism', r'shipping',
+                    r'mining', r'offshore', r'drilling'],
+    'scientific': [r'data', r'research', r'study', r'science', r'scientific', r'argo',
+                  r'float', r'measurement', r'experiment'],
+    'geography': [r'location', r'where', r'coordinates', r'area', r'size', r'depth',
+                 r'trench', r'ridge', r'basin'],
+    'chemistry': [r'salinity', r'oxygen', r'ph', r'acidification', r'nutrient', r'chemical',
+                 r'composition', r'element'],
+    'physics': [r'current', r'wave', r'tide', r'pressure', r'density', r'circulation',
+               r'gyre', r'upwelling', r'thermocline']
+}
+INTENT_ROUTER = IntentRouter(INTENT_PATTERNS)
+
+# Optional trained intent/sentiment model (see intent_classifier.py). Where it's
+# missing or less sure than MIN_CONFIDENCE, the keyword patterns decide
+INTENT_MODEL_PATH = os.environ.get("FLOATCHAT_INTENT_MODEL")
+INTENT_MODEL = HashedNgramClassifier.load(INTENT_MODEL_PATH) if INTENT_MODEL_PATH else None
+MIN_CONFIDENCE = 0.5
+
+def keyword_sentiment(query):
+    """Sentiment by counting positive and negative words"""
+    positive_count = sum(1 for word in SENTIMENT_WORDS['positive'] if word in query)
+    negative_count = sum(1 for word in SENTIMENT_WORDS['negative'] if word in query)
     
-    def initialize_human_impact_data(self):
-        """Initialize human impact data"""
-        return {
-            "fishing": "Global fish catch peaked at 86 million tons in 1996",
-            "shipping": "90% of world trade is carried by sea",
-            "tourism": "Coastal tourism generates $ billions annually",
-            "mining": "Deep-sea mining threatens unique ecosystems",
-            "energy": "Offshore wind and oil extraction impact marine environments"
-        }
+    if positive_count > negative_count:
+        return "positive"
+    elif negative_count > positive_count:
+        return "negative"
+    return "neutral"
+
+def keyword_sentiments(queries):
+    """keyword_sentiment of each query in a list"""
+    return [keyword_sentiment(query) for query in queries]
+
+# Answers to scientific, conservation and marine life questions, each with the
+# keywords that pick it; the first answer with a keyword in the query wins
+TOPIC_ANSWERS = {
+    'scientific': (
+        (('acid', 'ph'),
+         "Ocean acidification is the ongoing decrease in the pH of the Earth's oceans, "
+         "caused by the uptake of carbon dioxide (CO₂) from the atmosphere. "
+         "Since the Industrial Revolution, the pH of surface ocean waters has fallen by 0.1 pH units, "
+         "representing a 30% increase in acidity. This affects marine organisms, particularly those "
+         "with calcium carbonate shells or skeletons like corals and shellfish."),
+        (('current', 'circulation', 'gyre'),
+         "Ocean currents are driven by wind, water density differences, and tides. "
+         "Major surface currents form large circular patterns called gyres. "
+         "The thermohaline circulation is a deep-ocean current driven by differences in water density "
+         "caused by temperature (thermo) and salinity (haline). This 'global conveyor belt' plays a "
+         "crucial role in regulating Earth's climate."),
+        (('temperature', 'warming', 'heat'),
+         "The ocean has absorbed more than 90% of the excess heat trapped by greenhouse gases. "
+         "Sea surface temperatures have increased by approximately 0.88°C since 1900. "
+         "Marine heatwaves have become more frequent and intense, causing coral bleaching and "
+         "disrupting marine ecosystems."),
+        (('salinity', 'salt'),
+         "Ocean salinity varies by region, with higher salinity in subtropical regions where "
+         "evaporation exceeds precipitation, and lower salinity near the equator and poles where "
+         "rainfall and meltwater dilute seawater. The average ocean salinity is about 35 parts per thousand. "
+         "Changes in salinity patterns can indicate shifts in the global water cycle."),
+    ),
+    'conservation': (
+        (('plastic', 'pollution'),
+         "Plastic pollution is a major threat to marine environments. An estimated 8 million metric tons "
+         "of plastic enter the ocean each year. Plastic debris harms marine life through entanglement and "
+         "ingestion. Microplastics have been found throughout the water column and in marine organisms, "
+         "with unknown long-term effects on ecosystems and human health."),
+        (('overfish', 'fishing'),
+         "Overfishing occurs when fish are caught faster than they can reproduce. According to the UN FAO, "
+         "about 90% of global fish stocks are either overfished or fully exploited. Sustainable fishing "
+         "practices, marine protected areas, and consumer awareness are important solutions to this problem."),
+        (('coral', 'reef'),
+         "Coral reefs are among the most biodiverse ecosystems on Earth, but they are severely threatened. "
+         "About 50% of the world's coral reefs have been lost in the last 30 years due to climate change, "
+         "pollution, overfishing, and disease. Coral bleaching events have become more frequent and severe "
+         "as ocean temperatures rise."),
+        (('protect', 'conservation', 'save'),
+         "There are many ways to help protect the ocean: reduce plastic use, choose sustainable seafood, "
+         "support marine protected areas, reduce carbon footprint, avoid products that harm marine life, "
+         "and support organizations working on ocean conservation. Individual actions combined with policy "
+         "changes can make a significant difference."),
+    ),
+    'marine_life': (
+        (('whale',),
+         "Whales are magnificent marine mammals that play crucial roles in ocean ecosystems. "
+         "Baleen whales like blue whales filter-feed on krill, while toothed whales like orcas hunt fish "
+         "and marine mammals. Many whale species were brought to near extinction by commercial whaling "
+         "but some populations are recovering thanks to international protection efforts."),
+        (('shark',),
+         "Sharks are ancient predators that have existed for over 400 million years. Contrary to popular "
+         "belief, most shark species are not dangerous to humans. Sharks play vital roles as apex predators "
+         "in maintaining healthy ocean ecosystems. Many shark populations are declining due to overfishing, "
+         "particularly for the shark fin trade."),
+        (('coral',),
+         "Corals are marine invertebrates that form colonies. Each coral polyp is a tiny animal that secretes "
+         "a hard exoskeleton of calcium carbonate. Coral reefs are built by many such polyps over thousands of years. "
+         "Corals have a symbiotic relationship with photosynthetic algae called zooxanthellae, which provide them with energy."),
+        (('plankton',),
+         "Plankton are small organisms that drift in ocean currents. Phytoplankton are microscopic plants that "
+         "perform photosynthesis, producing about 50% of the world's oxygen. Zooplankton are tiny animals that feed "
+         "on phytoplankton. Together, they form the base of most marine food webs."),
+    ),
+}
+
+TOPIC_FALLBACKS = {
+    'scientific': "I need more specific details to answer your scientific question about the ocean.",
+    'conservation': "I need more specific details to answer your conservation question about the ocean.",
+    'marine_life': "I need more specific details to answer your question about marine life."
+}
+
+# Questions no keyword answers are matched against the topic answers and the
+# knowledge passages instead (see knowledge_index.py), if one is similar enough.
+# A prebuilt index can be loaded from FLOATCHAT_RETRIEVAL_INDEX
+RETRIEVAL_SECTIONS = ("ocean_profiles", "marine_life", "conservation", "climate", "human_impact")
+MIN_SIMILARITY = 0.2
+
+def build_retrieval_index(knowledge):
+    """Index of the topic answers and the knowledge sections this bot draws on"""
+    index = TfidfIndex()
+    for topic, answers in TOPIC_ANSWERS.items():
+        index.add_many((f"{topic}/{keywords[0]}", answer) for keywords, answer in answers)
+    index.add_many(knowledge_passages(knowledge, RETRIEVAL_SECTIONS))
+    return index
+
+RETRIEVAL_INDEX_PATH = os.environ.get("FLOATCHAT_RETRIEVAL_INDEX")
+RETRIEVAL_INDEX = TfidfIndex.load(RETRIEVAL_INDEX_PATH) if RETRIEVAL_INDEX_PATH else build_retrieval_index(KNOWLEDGE)
+
+# Words that make a turn count as being about the ocean, for follow-up questions
+TOPICAL_WORDS = ("ocean", "marine")
+HISTORY_SIZE = 10
+
+class Turn:
+    """One side of an exchange, with what follow-ups need to know about it"""
+    __slots__ = ("role", "text", "intent", "topical")
+
+    def __init__(self, role, text, intent=None):
+        self.role = role
+        self.text = text
+        self.intent = intent
+        lowered = text.lower()
+        self.topical = any(word in lowered for word in TOPICAL_WORDS)
+
+
+class AdvancedOceanChatbot:
+    # The knowledge is shared and read-only; an instance only owns its history
+    __slots__ = ("conversation_history",)
+
+    name = "FloatChat ARGO AI Assistant"
+    ocean_data = KNOWLEDGE["ocean_profiles"]
+    marine_life = KNOWLEDGE["marine_life"]
+    conservation_data = KNOWLEDGE["conservation"]
+    climate_data = KNOWLEDGE["climate"]
+    human_impact_data = KNOWLEDGE["human_impact"]
+    keyword_patterns = INTENT_PATTERNS
+    intent_router = INTENT_ROUTER
+    intent_model = INTENT_MODEL
+    retrieval_index = RETRIEVAL_INDEX
+
+    def __init__(self, history_size=HISTORY_SIZE):
+        # Conversation history for context: the latest turns, oldest dropped first.
+        # Follow-ups look two turns back, so at least two are kept
+        self.conversation_history = deque(maxlen=max(history_size, 2))
+
+    def restore(self, turns):
+        """Replace the history with stored (role, text, intent) turns, oldest first"""
+        self.conversation_history.clear()
+        self.conversation_history.extend(Turn(role, text, intent) for role, text, intent in turns)
     
     def detect_intent(self, query):
-        """Use pattern matching to detect user intent"""
-        query = query.lower()
-        intent_scores = defaultdict(int)
-        
-        for intent, patterns in self.keyword_patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, query):
-                    intent_scores[intent] += 1
-        
-        # Return intent with highest score
-        if intent_scores:
-            return max(intent_scores.items(), key=lambda x: x[1])[0]
-        return "general"
+        """Detect user intent"""
+        if self.intent_model is None:
+            # Return intent with highest score
+            return self.intent_router.best(query.lower(), "general")
+        return self.classify(query.lower())[0]
     
     def get_sentiment(self, query):
         """Simple sentiment analysis"""
-        positive_words = ['love', 'great', 'awesome', 'amazing', 'beautiful', 'wonderful']
-        negative_words = ['hate', 'terrible', 'awful', 'disgusting', 'sad', 'worried']
-        
-        query = query.lower()
-        positive_count = sum(1 for word in positive_words if word in query)
-        negative_count = sum(1 for word in negative_words if word in query)
-        
-        if positive_count > negative_count:
-            return "positive"
-        elif negative_count > positive_count:
-            return "negative"
-        return "neutral"
+        if self.intent_model is None:
+            return keyword_sentiment(query.lower())
+        return self.classify(query.lower())[1]
+    
+    def classify(self, query):
+        """(intent, sentiment) of a lower-cased query"""
+        intent = sentiment = None
+        if self.intent_model is not None:
+            intent, sentiment = self.intent_model.predict([query], MIN_CONFIDENCE)[0]
+        return intent or self.intent_router.best(query, "general"), sentiment or keyword_sentiment(query)
+    
+    def classify_many(self, queries):
+        """(intent, sentiment) per lower-cased query, scoring them all in one batch when a model is loaded"""
+        if self.intent_model is None:
+            predictions = [(None, None)] * len(queries)
+        else:
+            predictions = self.intent_model.predict(queries, MIN_CONFIDENCE)
+        # Intent with the most keyword hits where the model didn't decide, matched
+        # once per distinct query for the whole batch
+        undecided = list(dict.fromkeys(
+            query for query, (intent, sentiment) in zip(queries, predictions) if intent is None or sentiment is None
+        ))
+        intents = dict(zip(undecided, self.intent_router.best_many(undecided, "general")))
+        sentiments = dict(zip(undecided, keyword_sentiments(undecided)))
+        return [
+            (intent or intents[query], sentiment or sentiments[query])
+            for query, (intent, sentiment) in zip(queries, predictions)
+        ]
     
     def generate_ocean_facts(self, ocean_name):
         """Generate interesting facts about an ocean"""
@@ -180,104 +256,55 @@ class AdvancedOceanChatbot:
     
     def answer_scientific_question(self, query):
         """Answer scientific questions about the ocean"""
-        query = query.lower()
-        
-        if any(word in query for word in ['acid', 'ph']):
-            return ("Ocean acidification is the ongoing decrease in the pH of the Earth's oceans, "
-                   "caused by the uptake of carbon dioxide (CO₂) from the atmosphere. "
-                   "Since the Industrial Revolution, the pH of surface ocean waters has fallen by 0.1 pH units, "
-                   "representing a 30% increase in acidity. This affects marine organisms, particularly those "
-                   "with calcium carbonate shells or skeletons like corals and shellfish.")
-        
-        elif any(word in query for word in ['current', 'circulation', 'gyre']):
-            return ("Ocean currents are driven by wind, water density differences, and tides. "
-                   "Major surface currents form large circular patterns called gyres. "
-                   "The thermohaline circulation is a deep-ocean current driven by differences in water density "
-                   "caused by temperature (thermo) and salinity (haline). This 'global conveyor belt' plays a "
-                   "crucial role in regulating Earth's climate.")
-        
-        elif any(word in query for word in ['temperature', 'warming', 'heat']):
-            return ("The ocean has absorbed more than 90% of the excess heat trapped by greenhouse gases. "
-                   "Sea surface temperatures have increased by approximately 0.88°C since 1900. "
-                   "Marine heatwaves have become more frequent and intense, causing coral bleaching and "
-                   "disrupting marine ecosystems.")
-        
-        elif any(word in query for word in ['salinity', 'salt']):
-            return ("Ocean salinity varies by region, with higher salinity in subtropical regions where "
-                   "evaporation exceeds precipitation, and lower salinity near the equator and poles where "
-                   "rainfall and meltwater dilute seawater. The average ocean salinity is about 35 parts per thousand. "
-                   "Changes in salinity patterns can indicate shifts in the global water cycle.")
-        
-        return "I need more specific details to answer your scientific question about the ocean."
+        return self.answer_topic_question('scientific', query)
     
     def answer_conservation_question(self, query):
         """Answer conservation-related questions"""
-        query = query.lower()
-        
-        if any(word in query for word in ['plastic', 'pollution']):
-            return ("Plastic pollution is a major threat to marine environments. An estimated 8 million metric tons "
-                   "of plastic enter the ocean each year. Plastic debris harms marine life through entanglement and "
-                   "ingestion. Microplastics have been found throughout the water column and in marine organisms, "
-                   "with unknown long-term effects on ecosystems and human health.")
-        
-        elif any(word in query for word in ['overfish', 'fishing']):
-            return ("Overfishing occurs when fish are caught faster than they can reproduce. According to the UN FAO, "
-                   "about 90% of global fish stocks are either overfished or fully exploited. Sustainable fishing "
-                   "practices, marine protected areas, and consumer awareness are important solutions to this problem.")
-        
-        elif any(word in query for word in ['coral', 'reef']):
-            return ("Coral reefs are among the most biodiverse ecosystems on Earth, but they are severely threatened. "
-                   "About 50% of the world's coral reefs have been lost in the last 30 years due to climate change, "
-                   "pollution, overfishing, and disease. Coral bleaching events have become more frequent and severe "
-                   "as ocean temperatures rise.")
-        
-        elif any(word in query for word in ['protect', 'conservation', 'save']):
-            return ("There are many ways to help protect the ocean: reduce plastic use, choose sustainable seafood, "
-                   "support marine protected areas, reduce carbon footprint, avoid products that harm marine life, "
-                   "and support organizations working on ocean conservation. Individual actions combined with policy "
-                   "changes can make a significant difference.")
-        
-        return "I need more specific details to answer your conservation question about the ocean."
+        return self.answer_topic_question('conservation', query)
     
     def answer_marine_life_question(self, query):
         """Answer questions about marine life"""
+        return self.answer_topic_question('marine_life', query)
+    
+    def answer_topic_question(self, topic, query):
+        """The topic's answer for the first keyword in query, else the closest passage in the knowledge base"""
         query = query.lower()
-        
-        if any(word in query for word in ['whale']):
-            return ("Whales are magnificent marine mammals that play crucial roles in ocean ecosystems. "
-                   "Baleen whales like blue whales filter-feed on krill, while toothed whales like orcas hunt fish "
-                   "and marine mammals. Many whale species were brought to near extinction by commercial whaling "
-                   "but some populations are recovering thanks to international protection efforts.")
-        
-        elif any(word in query for word in ['shark']):
-            return ("Sharks are ancient predators that have existed for over 400 million years. Contrary to popular "
-                   "belief, most shark species are not dangerous to humans. Sharks play vital roles as apex predators "
-                   "in maintaining healthy ocean ecosystems. Many shark populations are declining due to overfishing, "
-                   "particularly for the shark fin trade.")
-        
-        elif any(word in query for word in ['coral']):
-            return ("Corals are marine invertebrates that form colonies. Each coral polyp is a tiny animal that secretes "
-                   "a hard exoskeleton of calcium carbonate. Coral reefs are built by many such polyps over thousands of years. "
-                   "Corals have a symbiotic relationship with photosynthetic algae called zooxanthellae, which provide them with energy.")
-        
-        elif any(word in query for word in ['plankton']):
-            return ("Plankton are small organisms that drift in ocean currents. Phytoplankton are microscopic plants that "
-                   "perform photosynthesis, producing about 50% of the world's oxygen. Zooplankton are tiny animals that feed "
-                   "on phytoplankton. Together, they form the base of most marine food webs.")
-        
-        return "I need more specific details to answer your question about marine life."
+        for keywords, answer in TOPIC_ANSWERS[topic]:
+            if any(word in query for word in keywords):
+                return answer
+        return self.retrieve(query) or TOPIC_FALLBACKS[topic]
+    
+    def retrieve(self, query):
+        """Text of the passage most similar to query, or None if none is similar enough"""
+        hits = self.retrieval_index.search(query, 1)
+        if hits and hits[0][0] >= MIN_SIMILARITY:
+            return hits[0][2]
+        return None
+    
+    def generate_responses(self, queries, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Yield a response to each query, in order, answering them a chunk at a time.
+        Every query is answered as the opening turn of its own conversation, so
+        this bot's history is left alone. With workers, chunks are spread over
+        that many processes."""
+        return respond_in_batches(answer_batch, queries, workers, chunk_size)
+    
+    def stream_response(self, query):
+        """Yield the response to query a word at a time; the turn is recorded in the history straight away"""
+        return text_chunks(self.generate_response(query))
     
     def generate_response(self, query):
         """Generate a response to a user query using AI techniques"""
-        # Store conversation history for context
-        self.conversation_history.append(("user", query))
-        
         # Clean and preprocess query
         clean_query = query.lower().strip()
         
         # Detect intent and sentiment
-        intent = self.detect_intent(clean_query)
-        sentiment = self.get_sentiment(clean_query)
+        intent, sentiment = self.classify(clean_query)
+        return self.respond(query, clean_query, intent, sentiment)
+    
+    def respond(self, query, clean_query, intent, sentiment):
+        """Answer a query already classified, recording the turn in the history"""
+        # Store conversation history for context
+        self.conversation_history.append(Turn("user", query, intent))
         
         # Handle greetings
         if intent == "greeting":
@@ -313,8 +340,9 @@ class AdvancedOceanChatbot:
         elif intent == "ocean_info":
             # Detect which ocean is mentioned
             ocean_mentioned = None
+            ocean_hits = self.intent_router.hits(clean_query).get('ocean_info', ())
             for ocean in ["pacific", "atlantic", "indian", "southern", "arctic"]:
-                if ocean in clean_query:
+                if ocean in ocean_hits:
                     ocean_mentioned = ocean
                     break
             
@@ -327,10 +355,8 @@ class AdvancedOceanChatbot:
         else:
             # Check if this continues previous conversation
             if len(self.conversation_history) > 1:
-                prev_query = self.conversation_history[-2][1].lower()
-                
                 # Continue previous topic if relevant
-                if "ocean" in prev_query or "marine" in prev_query:
+                if self.conversation_history[-2].topical:
                     if "why" in clean_query or "how" in clean_query:
                         response = "That's an excellent follow-up question. The mechanisms behind ocean phenomena are fascinating and often involve complex interactions between physical, chemical, and biological processes."
                     else:
@@ -356,17 +382,25 @@ class AdvancedOceanChatbot:
             response += " " + random.choice(closings)
         
         # Store response in history
-        self.conversation_history.append(("assistant", response))
-        
-        # Keep history manageable
-        if len(self.conversation_history) > 10:
-            self.conversation_history = self.conversation_history[-10:]
+        self.conversation_history.append(Turn("assistant", response, intent))
         
         return response
 
+def answer_batch(queries):
+    """Responses to a list of queries, each as the opening turn of a new conversation.
+    The whole batch is cleaned and classified in one classify_many call before any is answered."""
+    bot = AdvancedOceanChatbot()
+    clean_queries = [query.lower().strip() for query in queries]
+    responses = []
+    for query, clean_query, (intent, sentiment) in zip(queries, clean_queries, bot.classify_many(clean_queries)):
+        bot.conversation_history.clear()
+        responses.append(bot.respond(query, clean_query, intent, sentiment))
+    return responses
+
 def main():
     """Main function to run the advanced chatbot"""
     chatbot = AdvancedOceanChatbot()
+    print(f"{chatbot.name} initialized. Ready to answer your ocean-related questions!")
     
     print("=" * 70)
     print("Advanced FloatChat - ARGO Ocean Data AI Assistant")
@@ -390,8 +424,7 @@ def main():
                 print(f"\n{chatbot.name}: Thank you for chatting about our oceans. Goodbye!")
                 break
             
-            response = chatbot.generate_response(user_input)
-            print(f"\n{chatbot.name}: {response}")
+            print_stream(f"\n{chatbot.name}: ", chatbot.stream_response(user_input))
             
         except KeyboardInterrupt:
             print(f"\n\n{chatbot.name}: Session ended. Thank you for using FloatChat!")
@@ -0,0 +1,248 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class CachedDataset:
+    """A loaded dataset plus the bookkeeping the cache needs"""
+    __slots__ = ("key", "data", "version", "loaded_at", "nbytes", "pinned", "expires")
+
+    def __init__(self, key, data, version, nbytes, pinned, expires=True):
+        self.key = key
+        self.data = data
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.nbytes = nbytes
+        self.pinned = pinned
+        self.expires = expires
+
+
+def estimate_nbytes(data):
+    """Estimate the resident size of a dataset in bytes"""
+    if hasattr(data, "memory_usage"):
+        return int(data.memory_usage(deep=True).sum())
+    return int(getattr(data, "nbytes", 0))
+
+
+class DatasetCache:
+    """Process-wide, read-only dataset store shared by every session.
+
+    Entries are reloaded lazily once they are older than ``ttl_seconds``, or
+    immediately after ``refresh()``. Pinned entries (the primary dataset) are
+    never evicted; other entries (e.g. alternate date windows) are evicted
+    least-recently-used first once the cache holds more than ``max_bytes``.
+    Entries derived from one version of a dataset are keyed
+    ``(key, version, name)``; pinning one holds it only while that version
+    is current, and loading a new version drops them.
+    A writer that extends a dataset in place of reloading it ``publish()``es
+    each new version instead.
+    Cached data is shared, so callers must never mutate it in place.
+    """
+
+    def __init__(self, ttl_seconds=3600, max_bytes=512 * 1024 * 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._version = 0
+
+    def get(self, key, loader, pinned=False):
+        """Return the CachedDataset for key, calling loader() on a miss or expiry"""
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry
+
+        # One loader per key at a time; other sessions wait for its result
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        with load_lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry
+            data = loader()
+            with self._lock:
+                self._version += 1
+                entry = CachedDataset(key, data, self._version, estimate_nbytes(data), pinned)
+                # Whatever was built from the version this one replaces is stale
+                self._drop_derived(key)
+                self._entries[key] = entry
+                if pinned:
+                    self._check_pinned(key)
+                self._evict()
+            return entry
+
+    def publish(self, key, data, derived=None, pinned=True):
+        """Replace key with data as a new version, and return its CachedDataset.
+
+        derived maps names to structures built from data; they're stored as
+        (key, version, name) entries, where per-version lookups find them. The
+        new version and everything derived from it become visible together
+        under the lock, so readers get either the old version or the whole new
+        one, and never wait for it to be built. Published entries don't
+        expire: the publisher keeps them current, and the derived ones are
+        pinned with the version. Derived entries of earlier versions are
+        dropped, so superseded versions don't stay alive in the cache; readers
+        still holding them are unaffected.
+        """
+        with self._lock:
+            self._version += 1
+            version = self._version
+            self._drop_derived(key)
+            for name, value in (derived or {}).items():
+                self._entries[(key, version, name)] = CachedDataset(
+                    (key, version, name), value, version, estimate_nbytes(value), True, expires=False)
+            entry = CachedDataset(key, data, version, estimate_nbytes(data), pinned, expires=False)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._check_pinned(key)
+            self._evict()
+            return entry
+
+    def refresh(self, key=None):
+        """Drop one entry (or all of them) so the next get() reloads it"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._load_locks.clear()
+            else:
+                self._drop(key)
+
+    def stats(self):
+        """Summarize what the cache currently holds"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "nbytes": sum(e.nbytes for e in self._entries.values()),
+                "max_bytes": self.max_bytes,
+                "version": self._version
+            }
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expired = self.ttl_seconds is not None and time.monotonic() - entry.loaded_at > self.ttl_seconds
+            if entry.expires and expired:
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _evict(self):
+        # Caller holds self._lock
+        total = sum(e.nbytes for e in self._entries.values())
+        for key in list(self._entries):
+            if total <= self.max_bytes:
+                break
+            entry = self._entries[key]
+            if entry.pinned and not self._superseded(key):
+                continue
+            total -= entry.nbytes
+            self._drop(key)
+
+    def _superseded(self, key):
+        # Caller holds self._lock. True for a (key, version, name) entry whose
+        # key has moved on to another version, or been dropped
+        if not (isinstance(key, tuple) and len(key) == 3):
+            return False
+        primary = self._entries.get(key[0])
+        return primary is None or primary.version != key[1]
+
+    def _check_pinned(self, key):
+        # Caller holds self._lock. Pinned entries can't be evicted, so a budget
+        # they overrun alone is only reported
+        pinned = sum(e.nbytes for k, e in self._entries.items() if e.pinned and not self._superseded(k))
+        if pinned > self.max_bytes:
+            logger.warning("Pinned datasets take %.0f MB after loading %r, over the cache budget of %.0f MB",
+                           pinned / 2**20, key, self.max_bytes / 2**20)
+
+    def _drop_derived(self, key):
+        # Caller holds self._lock
+        for stale in [k for k in self._entries if isinstance(k, tuple) and len(k) == 3 and k[0] == key]:
+            self._drop(stale)
+
+    def _drop(self, key):
+        # Caller holds self._lock. Load locks go with their entries, so keys
+        # that come and go (e.g. per-version derived ones) don't pile up
+        self._entries.pop(key, None)
+        self._load_locks.pop(key, None)
+
+
+class FigureCache:
+    """LRU cache of serialized figures keyed by (intent, params) for one dataset version.
+
+    Values are (content, figure JSON) pairs. Seeing a new dataset version
+    drops every entry built from the old one. The cache holds at most
+    ``max_entries`` figures and ``max_bytes`` of JSON.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, intent, params, version):
+        """Return the cached (content, spec) for this intent, or None without building it"""
+        with self._lock:
+            if version != self._version:
+                return None
+            value = self._entries.get((intent, params))
+            if value is not None:
+                self._entries.move_to_end((intent, params))
+            return value
+
+    def get_or_build(self, intent, params, version, build):
+        """Return the cached (content, spec) for this intent, calling build() on a miss"""
+        key = (intent, params)
+        with self._lock:
+            if version != self._version:
+                self._clear()
+                self._version = version
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+
+        value = build()
+        size = self._entry_size(value)
+        with self._lock:
+            # Don't keep figures built from a dataset that was refreshed meanwhile
+            if version == self._version and size <= self.max_bytes:
+                if key in self._entries:
+                    self._nbytes -= self._entry_size(self._entries.pop(key))
+                self._entries[key] = value
+                self._nbytes += size
+                while len(self._entries) > self.max_entries or self._nbytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._nbytes -= self._entry_size(evicted)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        self._entries.clear()
+        self._nbytes = 0
+
+    @staticmethod
+    def _entry_size(value):
+        return sum(len(part) for part in value if part)
+
+
+# Module-level singletons: Streamlit re-executes the app script on every rerun,
+# but imported modules live for the whole process
+dataset_cache = DatasetCache()
+figure_cache = FigureCache()
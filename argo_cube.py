@@ -0,0 +1,99 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+# Variables summarized by default
+CUBE_VARIABLES = ("temperature", "salinity", "pressure")
+
+
+class AggregateCube:
+    """Count / sum / sum-of-squares per region x month x variable.
+
+    The cube is built once from the loaded rows and can be updated with new
+    batches as they arrive. Means and standard deviations by region, year or
+    month are then answered from the cells alone, without touching the rows.
+    """
+
+    def __init__(self, variables=CUBE_VARIABLES):
+        self.variables = tuple(variables)
+        columns = [f"{v}_{s}" for v in self.variables for s in ("count", "sum", "sumsq")]
+        index = pd.MultiIndex.from_arrays([[], []], names=["region", "month"])
+        self.cells = pd.DataFrame(columns=columns, index=index, dtype=np.float64)
+
+    @classmethod
+    def from_frame(cls, df, variables=CUBE_VARIABLES):
+        cube = cls(variables)
+        cube.update(df)
+        return cube
+
+    @property
+    def nbytes(self):
+        return int(self.cells.memory_usage(deep=True).sum())
+
+    def update(self, df):
+        """Fold a batch of rows into the cube; cost is O(batch + cells), whatever the rows folded in before"""
+        if len(df) == 0:
+            return
+        batch = self._aggregate(df)
+        self.cells = self.cells.add(batch, fill_value=0).sort_index()
+
+    def updated(self, df):
+        """A new cube with a batch folded in, leaving this one as it is for readers still using it"""
+        cube = copy.copy(self)
+        cube.update(df)
+        return cube
+
+    def _aggregate(self, df):
+        values = df[list(self.variables)].astype(np.float64)
+        month = (df["date"].dt.year * 12 + df["date"].dt.month - 1).rename("month")
+        keys = [df["region"].rename("region"), month]
+
+        grouped = values.groupby(keys, observed=True)
+        parts = [
+            grouped.count().astype(np.float64).add_suffix("_count"),
+            grouped.sum().add_suffix("_sum"),
+            (values ** 2).groupby(keys, observed=True).sum().add_suffix("_sumsq")
+        ]
+        cells = pd.concat(parts, axis=1)[self.cells.columns]
+
+        # Region labels are plain strings in the cube, whatever the input dtype
+        cells.index = pd.MultiIndex.from_arrays([
+            cells.index.get_level_values("region").astype(str),
+            cells.index.get_level_values("month").astype(np.int64)
+        ], names=["region", "month"])
+        return cells
+
+    def stats(self, variable, by=None):
+        """Return count, mean and std of variable per region, optionally split by "year" or "month".
+
+        The result has columns region, [year | month], count, <variable> (the
+        mean) and <variable>_std.
+        """
+        cells = self.cells[[f"{variable}_count", f"{variable}_sum", f"{variable}_sumsq"]]
+        cells.columns = ["count", "sum", "sumsq"]
+        region = cells.index.get_level_values("region")
+        month = cells.index.get_level_values("month").to_numpy()
+
+        keys = [region]
+        if by == "year":
+            keys.append(pd.Index(month // 12, name="year"))
+        elif by == "month":
+            keys.append(pd.Index(month, name="month"))
+        elif by is not None:
+            raise ValueError(f"Unsupported grouping: {by}")
+
+        totals = cells.groupby(keys).sum()
+        totals = totals[totals["count"] > 0]
+        mean = totals["sum"] / totals["count"]
+        variance = (totals["sumsq"] / totals["count"] - mean ** 2).clip(lower=0)
+
+        result = pd.DataFrame({
+            "count": totals["count"].astype(np.int64),
+            variable: mean,
+            f"{variable}_std": np.sqrt(variance)
+        }).reset_index()
+        if by == "month":
+            ordinal = result["month"].to_numpy()
+            result["month"] = pd.to_datetime(pd.DataFrame({"year": ordinal // 12, "month": ordinal % 12 + 1, "day": 1}))
+        return result
@@ -0,0 +1,116 @@
+"""Derived seawater variables: potential temperature, density and mixed-layer depth.
+
+Everything here works on NumPy arrays (or columns) of any shape at once,
+following the UNESCO 1983 algorithms (Fofonoff & Millard) and the EOS-80
+equation of state. Temperatures are ITS-90 in °C, salinity is practical
+salinity and pressure is in dbar.
+"""
+import numpy as np
+
+# EOS-80 and the lapse rate are defined on the IPTS-68 temperature scale
+T68_PER_T90 = 1.00024
+
+# de Boyer Montégut et al. (2004): the mixed layer ends where potential density
+# exceeds its value at 10 dbar by 0.03 kg/m³
+MLD_REFERENCE_PRESSURE = 10.0
+MLD_DENSITY_THRESHOLD = 0.03
+
+
+def adiabatic_lapse_rate(salinity, temperature, pressure):
+    """Adiabatic temperature gradient in °C/dbar (Bryden 1973), temperature in IPTS-68"""
+    s, t, p = salinity - 35.0, temperature, pressure
+    return (((-2.1687e-16 * t + 1.8676e-14) * t - 4.6206e-13) * p
+            + ((2.7759e-12 * t - 1.1351e-10) * s + ((-5.4481e-14 * t + 8.733e-12) * t - 6.7795e-10) * t
+               + 1.8741e-8)) * p \
+        + (-4.2393e-8 * t + 1.8932e-6) * s + ((6.6228e-10 * t - 6.836e-8) * t + 8.5258e-6) * t + 3.5803e-5
+
+
+def potential_temperature(salinity, temperature, pressure, reference_pressure=0.0):
+    """Temperature a water parcel would have if brought adiabatically to reference_pressure.
+
+    Integrates the lapse rate with the fourth-order Runge-Kutta scheme of
+    Fofonoff (1977).
+    """
+    s = np.asarray(salinity, dtype=np.float64)
+    t = np.asarray(temperature, dtype=np.float64) * T68_PER_T90
+    p = np.asarray(pressure, dtype=np.float64)
+    h = reference_pressure - p
+
+    k = h * adiabatic_lapse_rate(s, t, p)
+    t = t + 0.5 * k
+    q = k
+    p = p + 0.5 * h
+    k = h * adiabatic_lapse_rate(s, t, p)
+    t = t + 0.29289322 * (k - q)
+    q = 0.58578644 * k + 0.121320344 * q
+    k = h * adiabatic_lapse_rate(s, t, p)
+    t = t + 1.707106781 * (k - q)
+    q = 3.414213562 * k - 4.121320344 * q
+    p = p + 0.5 * h
+    k = h * adiabatic_lapse_rate(s, t, p)
+    return (t + (k - 2.0 * q) / 6.0) / T68_PER_T90
+
+
+def density(salinity, temperature, pressure):
+    """In-situ density in kg/m³ from the EOS-80 equation of state"""
+    s = np.asarray(salinity, dtype=np.float64)
+    t = np.asarray(temperature, dtype=np.float64) * T68_PER_T90
+    p = np.asarray(pressure, dtype=np.float64) / 10.0  # bar
+    s15 = s * np.sqrt(np.maximum(s, 0))
+
+    # Density at one atmosphere
+    pure_water = (999.842594 + (6.793952e-2 + (-9.095290e-3 + (1.001685e-4 + (-1.120083e-6 + 6.536332e-9 * t)
+                                                                                * t) * t) * t) * t)
+    surface = (pure_water + s * (0.824493 + (-4.0899e-3 + (7.6438e-5 + (-8.2467e-7 + 5.3875e-9 * t) * t) * t) * t)
+               + s15 * (-5.72466e-3 + (1.0227e-4 - 1.6546e-6 * t) * t) + 4.8314e-4 * s * s)
+
+    # Secant bulk modulus
+    k_water = 19652.21 + (148.4206 + (-2.327105 + (1.360477e-2 - 5.155288e-5 * t) * t) * t) * t
+    a_water = 3.239908 + (1.43713e-3 + (1.16092e-4 - 5.77905e-7 * t) * t) * t
+    b_water = 8.50935e-5 + (-6.12293e-6 + 5.2787e-8 * t) * t
+    k0 = (k_water + s * (54.6746 + (-0.603459 + (1.09987e-2 - 6.1670e-5 * t) * t) * t)
+          + s15 * (7.944e-2 + (1.6483e-2 - 5.3009e-4 * t) * t))
+    a = a_water + s * (2.2838e-3 + (-1.0981e-5 - 1.6078e-6 * t) * t) + 1.91075e-4 * s15
+    b = b_water + s * (-9.9348e-7 + (2.0816e-8 + 9.1697e-10 * t) * t)
+    bulk_modulus = k0 + (a + b * p) * p
+    return surface / (1.0 - p / bulk_modulus)
+
+
+def sigma_theta(salinity, temperature, pressure, reference_pressure=0.0):
+    """Potential density anomaly: potential density at reference_pressure minus 1000 kg/m³"""
+    theta = potential_temperature(salinity, temperature, pressure, reference_pressure)
+    return density(salinity, theta, reference_pressure) - 1000.0
+
+
+def with_derived(profiles):
+    """profiles with potential_temperature and sigma_theta added at every level"""
+    return profiles.with_variables(
+        potential_temperature=potential_temperature(profiles.salinity, profiles.temperature, profiles.pressure),
+        sigma_theta=sigma_theta(profiles.salinity, profiles.temperature, profiles.pressure))
+
+
+def mixed_layer_depth(profiles, threshold=MLD_DENSITY_THRESHOLD, reference_pressure=MLD_REFERENCE_PRESSURE):
+    """Mixed-layer depth in dbar of every cast of a ProfileSet with sigma_theta.
+
+    The depth is where sigma_theta first exceeds its value at
+    reference_pressure by threshold, interpolated between the two levels
+    around the crossing, in one pass over the levels of all casts. Casts that
+    don't reach reference_pressure or never cross the threshold get NaN.
+    """
+    sigma = profiles.values("sigma_theta").astype(np.float64)
+    pressure = profiles.pressure.astype(np.float64)
+    reference = profiles.interpolate([reference_pressure], variables=("sigma_theta",))["sigma_theta"][:, 0]
+    target = reference + threshold
+    cast = np.repeat(np.arange(len(profiles)), np.diff(profiles.offsets))
+
+    with np.errstate(invalid="ignore"):
+        crossed = np.flatnonzero((pressure > reference_pressure) & (sigma > target[cast]))
+    casts, first = np.unique(cast[crossed], return_index=True)
+    below = crossed[first]
+    above = np.maximum(below - 1, profiles.offsets[casts])
+    span = sigma[below] - sigma[above]
+    weight = np.clip((target[casts] - sigma[above]) / np.where(span > 0, span, 1.0), 0.0, 1.0)
+
+    depth = np.full(len(profiles), np.nan)
+    depth[casts] = pressure[above] + weight * (pressure[below] - pressure[above])
+    return depth
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+
+
+class FloatTrajectories:
+    """The rows of an ARGO frame regrouped per float, for trajectory queries.
+
+    Rows are copied once into float order, and by date within each float, so
+    every float's history is one contiguous slice found through an offset
+    index: no scan of the frame per lookup. The latest row of every float is
+    the last row of its slice, so all of them come out in one pass.
+    """
+
+    def __init__(self, df):
+        floats = pd.Categorical(df["float_id"])
+        codes = floats.codes
+        order = np.lexsort((df["date"].to_numpy(), codes))
+        self.frame = df.iloc[order].reset_index(drop=True)
+
+        # Floats present in the frame, in ID order; float i is rows [starts[i], starts[i + 1])
+        counts = np.bincount(codes, minlength=len(floats.categories))
+        self.float_ids = [str(f) for f, n in zip(floats.categories, counts) if n]
+        self._starts = np.concatenate([[0], np.cumsum(counts[counts > 0])]).astype(np.int64)
+        self._positions = {float_id: i for i, float_id in enumerate(self.float_ids)}
+
+    @property
+    def nbytes(self):
+        return int(self.frame.memory_usage(deep=True).sum()) + self._starts.nbytes
+
+    def history(self, float_id):
+        """Every row of one float, oldest first; empty for an unknown float"""
+        i = self._positions.get(float_id)
+        if i is None:
+            return self.frame.iloc[:0]
+        return self.frame.iloc[self._starts[i]:self._starts[i + 1]]
+
+    def latest(self):
+        """The most recent row of every float, in float ID order"""
+        return self.frame.iloc[self._starts[1:] - 1].reset_index(drop=True)
+
+    def __contains__(self, float_id):
+        return float_id in self._positions
+
+    def __len__(self):
+        return len(self.float_ids)
+
+
+class LayeredTrajectories(FloatTrajectories):
+    """FloatTrajectories of a frame that grows by appended batches.
+
+    As in LayeredIndex, each batch gets FloatTrajectories of its own (a
+    layer), so appending costs the batch, not the frame, and a layer is
+    merged into the one before it once it's at least half that one's size.
+    A float's history is put together from the layers it appears in.
+    """
+
+    def __init__(self, layers):
+        # layers: (first row, FloatTrajectories over the rows from there to the next layer)
+        self.layers = tuple(layers)
+        self.float_ids = sorted(set().union(*(layer.float_ids for _, layer in self.layers)))
+        self._ids = set(self.float_ids)
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls([(0, FloatTrajectories(df))])
+
+    def appended(self, df, rows):
+        """The trajectories of df, which is these trajectories' frame followed by rows more rows"""
+        layers = list(self.layers)
+        start = len(df) - rows
+        size = rows
+        while layers and layers[-1][0] >= start - 2 * size:
+            start = layers.pop()[0]
+            size = len(df) - start
+        layers.append((start, FloatTrajectories(df.iloc[start:])))
+        return LayeredTrajectories(layers)
+
+    @property
+    def nbytes(self):
+        return sum(layer.nbytes for _, layer in self.layers)
+
+    def history(self, float_id):
+        parts = [layer.history(float_id) for _, layer in self.layers if float_id in layer]
+        if len(parts) == 1:
+            return parts[0]
+        if not parts:
+            return self.layers[0][1].history(float_id)
+        return pd.concat(parts, ignore_index=True).sort_values("date", kind="stable", ignore_index=True)
+
+    def latest(self):
+        parts = [layer.latest() for _, layer in self.layers]
+        if len(parts) == 1:
+            return parts[0]
+        rows = pd.concat(parts, ignore_index=True)
+        rows["float_id"] = rows["float_id"].astype(str)
+        rows = rows.sort_values(["float_id", "date"], kind="stable")
+        return rows.drop_duplicates("float_id", keep="last").reset_index(drop=True)
+
+    def __contains__(self, float_id):
+        return float_id in self._ids
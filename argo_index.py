@@ -0,0 +1,235 @@
+import numpy as np
+import pandas as pd
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.2
+
+
+def normalize_lon(lon):
+    """Wrap longitudes into [-180, 180)"""
+    return (np.asarray(lon, dtype=np.float64) + 180.0) % 360.0 - 180.0
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km, vectorized over NumPy arrays"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+class SpatialIndex:
+    """Spatio-temporal index over the rows of an ARGO frame.
+
+    Rows are bucketed three ways, each as a permutation plus offsets:
+    a lat/lon grid (bounding-box and "near" queries), date order ("last N
+    days") and region. A query only visits the buckets it overlaps and then
+    filters those candidate rows exactly, so cost follows the result size
+    rather than the frame size. Row sets are returned as sorted positions.
+    """
+
+    def __init__(self, df, cell_degrees=5.0):
+        self.df = df
+        self.cell_degrees = cell_degrees
+        self.n_lat = int(np.ceil(180 / cell_degrees))
+        self.n_lon = int(np.ceil(360 / cell_degrees))
+
+        # Row positions fit in int32 for any realistic archive, halving the permutations
+        rows_dtype = np.int32 if len(df) < np.iinfo(np.int32).max else np.int64
+
+        # Lat/lon grid; cell ids are lat-major, so one latitude band of a box is one slice.
+        # The columns are kept as they are (memory-mapped float32 for a store), and only
+        # copied when longitudes need wrapping into [-180, 180)
+        self._lat = df["latitude"].to_numpy()
+        lon = df["longitude"].to_numpy()
+        if len(lon) and (np.nanmin(lon) < -180.0 or np.nanmax(lon) >= 180.0):
+            lon = normalize_lon(lon).astype(lon.dtype)
+            self._lon_copy = lon.nbytes
+        else:
+            self._lon_copy = 0
+        self._lon = lon
+        # Binned in float64, like the query bounds, so a row's cell agrees with the bounds around it
+        cells = self._lat_bin(self._lat.astype(np.float64)) * self.n_lon + self._lon_bin(self._lon.astype(np.float64))
+        self._cell_order = np.argsort(cells, kind="stable").astype(rows_dtype)
+        self._cell_starts = np.searchsorted(cells[self._cell_order], np.arange(self.n_lat * self.n_lon + 1))
+
+        # Date order, searched through the permutation rather than a sorted copy of the dates
+        self._dates = df["date"].to_numpy()
+        self._date_order = np.argsort(self._dates, kind="stable").astype(rows_dtype)
+
+        # Region buckets
+        regions = pd.Categorical(df["region"])
+        self.region_names = [str(r) for r in regions.categories]
+        codes = regions.codes
+        self._region_order = np.argsort(codes, kind="stable").astype(rows_dtype)
+        self._region_starts = np.searchsorted(codes[self._region_order], np.arange(len(self.region_names) + 1))
+
+    @property
+    def nbytes(self):
+        # The lat/lon/date columns are the frame's own, counted with the dataset
+        arrays = (self._cell_order, self._cell_starts, self._date_order, self._region_order, self._region_starts)
+        return int(sum(a.nbytes for a in arrays)) + self._lon_copy
+
+    def _lat_bin(self, lat):
+        return np.clip(np.floor((np.asarray(lat) + 90.0) / self.cell_degrees), 0, self.n_lat - 1).astype(np.int64)
+
+    def _lon_bin(self, lon):
+        return np.clip(np.floor((np.asarray(lon) + 180.0) / self.cell_degrees), 0, self.n_lon - 1).astype(np.int64)
+
+    # Row-set queries
+
+    def rows_since(self, start):
+        """Rows dated on or after start"""
+        start = pd.Timestamp(start).to_datetime64().astype(self._dates.dtype)
+        first = np.searchsorted(self._dates, start, side="left", sorter=self._date_order)
+        return np.sort(self._date_order[first:])
+
+    def rows_recent(self, days, now=None):
+        """Rows from the last N days"""
+        now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+        return self.rows_since(now - pd.Timedelta(days=days))
+
+    def regions_matching(self, keyword):
+        """Region names containing keyword, e.g. "atlantic" -> North and South Atlantic"""
+        keyword = keyword.lower()
+        return [name for name in self.region_names if keyword in name.lower()]
+
+    def rows_in_regions(self, names):
+        """Rows belonging to any of the named regions"""
+        slices = []
+        for name in names:
+            if name in self.region_names:
+                code = self.region_names.index(name)
+                slices.append(self._region_order[self._region_starts[code]:self._region_starts[code + 1]])
+        return np.sort(np.concatenate(slices)) if slices else np.empty(0, dtype=np.int64)
+
+    def rows_in_bbox(self, min_lat, max_lat, min_lon, max_lon):
+        """Rows inside a lat/lon box; min_lon > max_lon means the box crosses the antimeridian"""
+        if max_lon - min_lon >= 360.0:
+            min_lon, max_lon = -180.0, 180.0
+        else:
+            min_lon, max_lon = normalize_lon(min_lon), normalize_lon(max_lon)
+        if min_lon <= max_lon:
+            lon_ranges = [(min_lon, max_lon)]
+        else:
+            lon_ranges = [(min_lon, 180.0), (-180.0, max_lon)]
+
+        candidates = []
+        for lat_bin in range(self._lat_bin(min_lat), self._lat_bin(max_lat) + 1):
+            for lo, hi in lon_ranges:
+                first = lat_bin * self.n_lon + self._lon_bin(lo)
+                last = lat_bin * self.n_lon + self._lon_bin(hi)
+                candidates.append(self._cell_order[self._cell_starts[first]:self._cell_starts[last + 1]])
+        if not candidates:
+            return np.empty(0, dtype=np.int64)
+        rows = np.concatenate(candidates)
+
+        lat, lon = self._lat[rows], self._lon[rows]
+        inside = (lat >= min_lat) & (lat <= max_lat)
+        if min_lon <= max_lon:
+            inside &= (lon >= min_lon) & (lon <= max_lon)
+        else:
+            inside &= (lon >= min_lon) | (lon <= max_lon)
+        return np.sort(rows[inside])
+
+    def rows_near(self, lat, lon, radius_km):
+        """Rows within radius_km of a point, as (rows, distances_km) sorted nearest first"""
+        dlat = radius_km / KM_PER_DEGREE
+        cos_lat = np.cos(np.radians(min(abs(lat) + dlat, 90.0)))
+        dlon = 180.0 if cos_lat < 1e-6 else min(radius_km / (KM_PER_DEGREE * cos_lat), 180.0)
+        rows = self.rows_in_bbox(max(lat - dlat, -90.0), min(lat + dlat, 90.0), lon - dlon, lon + dlon)
+
+        distances = haversine_km(lat, lon, self._lat[rows].astype(np.float64), self._lon[rows].astype(np.float64))
+        keep = distances <= radius_km
+        rows, distances = rows[keep], distances[keep]
+        order = np.argsort(distances, kind="stable")
+        return rows[order], distances[order]
+
+    # Frame queries used by the app
+
+    def take(self, rows):
+        return self.df.iloc[rows]
+
+    def query(self, regions=None, bbox=None, days=None):
+        """Rows matching every given filter: regions, bbox=(min_lat, max_lat, min_lon, max_lon), last N days"""
+        row_sets = []
+        if regions is not None:
+            row_sets.append(self.rows_in_regions(regions))
+        if bbox is not None:
+            row_sets.append(self.rows_in_bbox(*bbox))
+        if days is not None:
+            row_sets.append(self.rows_recent(days))
+        if not row_sets:
+            return self.df
+
+        row_sets.sort(key=len)
+        rows = row_sets[0]
+        for other in row_sets[1:]:
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        return self.take(rows)
+
+    def recent(self, days):
+        return self.take(self.rows_recent(days))
+
+    def near(self, lat, lon, radius_km):
+        """Rows within radius_km of a point, nearest first, with a distance_km column"""
+        rows, distances = self.rows_near(lat, lon, radius_km)
+        return self.take(rows).assign(distance_km=distances)
+
+
+class LayeredIndex(SpatialIndex):
+    """A SpatialIndex over a frame that grows by appended batches.
+
+    Each batch gets a SpatialIndex of its own (a layer), so appending costs
+    the batch, not the frame, and leaves the index it was appended to
+    unchanged. Queries ask every layer and shift its rows by the layer's
+    first row. As in an LSM tree, a layer is merged into the one before it
+    once it's at least half that one's size, which keeps the number of
+    layers, and the number of times any row is re-indexed, logarithmic in
+    the number of rows.
+    """
+
+    def __init__(self, df, layers, cell_degrees=5.0):
+        # layers: (first row, SpatialIndex over the rows from there to the next layer)
+        self.df = df
+        self.cell_degrees = cell_degrees
+        self.layers = tuple(layers)
+        self.region_names = list(dict.fromkeys(name for _, index in self.layers for name in index.region_names))
+
+    @classmethod
+    def from_frame(cls, df, cell_degrees=5.0):
+        return cls(df, [(0, SpatialIndex(df, cell_degrees))], cell_degrees)
+
+    def appended(self, df, rows):
+        """The index of df, which is this index's frame followed by rows more rows"""
+        layers = list(self.layers)
+        start = len(df) - rows
+        size = rows
+        while layers and layers[-1][0] >= start - 2 * size:
+            start = layers.pop()[0]
+            size = len(df) - start
+        layers.append((start, SpatialIndex(df.iloc[start:], self.cell_degrees)))
+        return LayeredIndex(df, layers, self.cell_degrees)
+
+    @property
+    def nbytes(self):
+        return sum(index.nbytes for _, index in self.layers)
+
+    def _gather(self, query, *args):
+        parts = [getattr(index, query)(*args) + np.int64(start) for start, index in self.layers]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def rows_since(self, start):
+        return self._gather("rows_since", start)
+
+    def rows_in_regions(self, names):
+        return self._gather("rows_in_regions", names)
+
+    def rows_in_bbox(self, min_lat, max_lat, min_lon, max_lon):
+        return self._gather("rows_in_bbox", min_lat, max_lat, min_lon, max_lon)
+
+    def rows_near(self, lat, lon, radius_km):
+        found = [index.rows_near(lat, lon, radius_km) for _, index in self.layers]
+        rows = np.concatenate([layer_rows + np.int64(start) for (start, _), (layer_rows, _) in zip(self.layers, found)])
+        distances = np.concatenate([layer_distances for _, layer_distances in found])
+        order = np.argsort(distances, kind="stable")
+        return rows[order], distances[order]
@@ -0,0 +1,377 @@
+"""Live ingestion of new ARGO reports into a running FloatChat.
+
+A DropIngester watches a drop directory (standing in for a GDAC sync) for
+CSV files of new rows, with the columns of an ARGO frame: date, region,
+latitude, longitude, temperature, salinity, pressure and float_id. Every
+poll takes the files that have arrived as one small batch and:
+
+1. writes it to the on-disk store as a new segment, when there is one;
+2. appends it to the in-memory rows, the aggregate cube, the spatial
+   index, the float trajectories and any extensions' structures (e.g.
+   profiles), at a cost that follows the batch rather than the archive;
+3. publishes the result as the next version of the dataset in one step,
+   so sessions see either the previous version or the whole new one, and
+   never wait on ingestion.
+
+Handled files are moved to ``done/``, or to ``rejected/`` if they aren't
+a valid batch on their own. Every store segment records the files (name
+and content hash) it holds, so a file whose rows reached the store just
+before a crash is moved, not ingested twice. Producers should write a
+file under another name and rename it to ``*.csv`` once complete, so a
+half-written file is never picked up:
+
+    FLOATCHAT_INGEST=/data/argo-drop streamlit run floatchat.py
+"""
+import hashlib
+import io
+import logging
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from argo_cube import AggregateCube
+from argo_floats import LayeredTrajectories
+from argo_index import LayeredIndex
+from argo_store import DATA_COLUMNS, MANIFEST, ArgoStore, segment_order, write_segment
+
+logger = logging.getLogger(__name__)
+
+ARGO_COLUMNS = DATA_COLUMNS + ["region", "float_id"]
+DROP_PATTERN = ".csv"
+DONE_DIR = "done"
+REJECTED_DIR = "rejected"
+
+# Buffers that run out of room are replaced by ones this much larger: enough to
+# keep appends amortized O(batch), without holding a second copy's worth of spare
+# room (the loaded dataset may be a memory-mapped store of any size)
+GROWTH_FACTOR = 1.25
+MIN_CAPACITY = 1024
+
+
+def code_dtype(n_categories):
+    """The integer dtype pandas keeps categorical codes in, so codes of that dtype are used without a copy"""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+class AppendableFrame:
+    """ARGO rows that only grow, handing out frames that never change.
+
+    Every column lives in a NumPy buffer with spare room at the end, and
+    categorical columns as codes plus a growing list of categories. A
+    snapshot is a DataFrame of zero-copy views of the rows appended so far;
+    later appends only write past its end, and a buffer that runs out of
+    room is replaced by one GROWTH_FACTOR times the size, so existing
+    snapshots are never touched and appends cost the batch (amortized), not
+    the frame.
+    """
+
+    def __init__(self, df):
+        self.columns = list(df.columns)
+        self.rows = len(df)
+        self._dtypes = {}
+        self._categories = {}
+        self._lookup = {}
+        self._buffers = {}
+        capacity = max(int(self.rows * GROWTH_FACTOR), MIN_CAPACITY)
+        for column in self.columns:
+            values = df[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                categories = list(values.cat.categories)
+                self._categories[column] = categories
+                self._lookup[column] = {c: i for i, c in enumerate(categories)}
+                self._dtypes[column] = code_dtype(len(categories))
+                values = values.cat.codes
+            else:
+                self._dtypes[column] = values.dtype
+            self._buffers[column] = np.empty(capacity, dtype=self._dtypes[column])
+            self._buffers[column][:self.rows] = values.to_numpy()
+
+    @property
+    def capacity(self):
+        return len(self._buffers[self.columns[0]]) if self.columns else 0
+
+    def append(self, batch):
+        """Add batch's rows after the existing ones; returns the new snapshot"""
+        stop = self.rows + len(batch)
+        if stop > self.capacity:
+            self._grow(max(int(stop * GROWTH_FACTOR), MIN_CAPACITY))
+        for column in self.columns:
+            if column in self._categories:
+                values = self._encode(column, batch[column])
+            else:
+                values = batch[column].to_numpy().astype(self._dtypes[column], copy=False)
+            self._buffers[column][self.rows:stop] = values
+        self.rows = stop
+        return self.snapshot()
+
+    def conform(self, batch):
+        """batch's columns in this frame's order and dtypes (categorical ones as strings).
+
+        Raises ValueError or TypeError if a column doesn't convert, before
+        anything is appended.
+        """
+        return batch[self.columns].astype(
+            {column: str if column in self._categories else self._dtypes[column] for column in self.columns})
+
+    def snapshot(self):
+        """The rows so far, as a DataFrame viewing the buffers"""
+        frame = {}
+        for column in self.columns:
+            values = self._buffers[column][:self.rows]
+            if column in self._categories:
+                values = pd.Categorical.from_codes(values, categories=self._categories[column], validate=False)
+            frame[column] = values
+        return pd.DataFrame(frame, copy=False)
+
+    def _encode(self, column, values):
+        """Codes of values, adding categories not seen before"""
+        categories, lookup = self._categories[column], self._lookup[column]
+        uniques, inverse = np.unique(values.astype(str).to_numpy(), return_inverse=True)
+        for value in uniques:
+            if value not in lookup:
+                lookup[value] = len(categories)
+                categories.append(value)
+        dtype = code_dtype(len(categories))
+        if dtype != self._dtypes[column]:
+            # Rare: more categories than the code dtype holds; widen into fresh buffers
+            self._dtypes[column] = dtype
+            self._buffers[column] = self._buffers[column].astype(dtype)
+        return np.array([lookup[value] for value in uniques], dtype=dtype)[inverse]
+
+    def _grow(self, capacity):
+        for column in self.columns:
+            buffer = np.empty(capacity, dtype=self._dtypes[column])
+            buffer[:self.rows] = self._buffers[column][:self.rows]
+            self._buffers[column] = buffer
+
+
+class GrowingArray:
+    """A 1-d array that only grows, handed out as views that never change.
+
+    Like a column of AppendableFrame: values live in a buffer with spare room
+    at the end, appends write past the last view handed out, and a full
+    buffer is replaced by a larger one, so appends cost what's appended
+    (amortized). One writer appends; any number of readers hold views.
+    """
+    __slots__ = ("buffer", "size")
+
+    def __init__(self, values):
+        values = np.asarray(values)
+        self.buffer = np.empty(max(int(len(values) * GROWTH_FACTOR), MIN_CAPACITY), dtype=values.dtype)
+        self.buffer[:len(values)] = values
+        self.size = len(values)
+
+    def append(self, values):
+        """Add values after the existing ones; returns a view of all of them"""
+        stop = self.size + len(values)
+        if stop > len(self.buffer):
+            buffer = np.empty(max(int(stop * GROWTH_FACTOR), MIN_CAPACITY), dtype=self.buffer.dtype)
+            buffer[:self.size] = self.buffer[:self.size]
+            self.buffer = buffer
+        self.buffer[self.size:stop] = values
+        self.size = stop
+        return self.view()
+
+    def view(self):
+        return self.buffer[:self.size]
+
+
+def read_drop_file(path):
+    """(rows, source) of one CSV drop file; ValueError if it isn't a valid batch.
+
+    source names the file and its content, as recorded with the store
+    segment the rows go into.
+    """
+    with open(path, "rb") as f:
+        content = f.read()
+    batch = pd.read_csv(io.BytesIO(content))
+    missing = [column for column in ARGO_COLUMNS if column not in batch.columns]
+    if missing:
+        raise ValueError(f"missing columns: {', '.join(missing)}")
+    batch = batch[ARGO_COLUMNS]
+    # Dates with a UTC offset are converted to UTC; the dataset's dates are naive
+    batch["date"] = pd.to_datetime(batch["date"], utc=True).dt.tz_localize(None)
+    for column in DATA_COLUMNS[1:]:
+        batch[column] = pd.to_numeric(batch[column])
+    batch["region"] = batch["region"].astype(str)
+    batch["float_id"] = batch["float_id"].astype(str)
+    return batch, f"{os.path.basename(path)}:{hashlib.sha1(content).hexdigest()}"
+
+
+class DropIngester:
+    """Appends files dropped into a directory to a published dataset.
+
+    The dataset is the cache entry ``key``, loaded with ``loader`` the first
+    time; from then on this ingester extends it and publishes every version,
+    together with its aggregate cube ("cube"), spatial index ("index") and
+    float trajectories ("floats"). Each of ``extensions`` keeps more derived
+    structures current the same way: ``start(frame)`` builds them for the
+    first frame and ``extend(frame, rows)`` for a frame rows longer, at a
+    cost that follows the rows; both return {name: structure} to publish.
+    """
+
+    def __init__(self, cache, key, loader, drop_dir, store_root=None, poll_seconds=5.0, max_files=64,
+                 extensions=()):
+        self.cache = cache
+        self.key = key
+        self.loader = loader
+        self.drop_dir = drop_dir
+        self.store_root = store_root
+        self.poll_seconds = poll_seconds
+        self.max_files = max_files
+        self.extensions = tuple(extensions)
+        self._frame = None
+        self._cube = None
+        self._index = None
+        self._floats = None
+        self._extended = {}
+        self._stored = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        for name in (DONE_DIR, REJECTED_DIR):
+            os.makedirs(os.path.join(drop_dir, name), exist_ok=True)
+
+    def pending(self):
+        """Complete drop files waiting to be ingested, oldest name first"""
+        names = sorted(name for name in os.listdir(self.drop_dir)
+                       if name.endswith(DROP_PATTERN) and not name.startswith("."))
+        return [os.path.join(self.drop_dir, name) for name in names[:self.max_files]]
+
+    def poll(self):
+        """Ingest whatever has arrived; returns the number of rows added.
+
+        Each file is read and checked on its own, and rejected if it isn't a
+        valid batch. A file whose rows are already in the store (written
+        before a crash kept the file from being moved) is only moved.
+        """
+        paths = self.pending()
+        if not paths:
+            return 0
+        with self._lock:
+            self._start()
+        files = []
+        for path in paths:
+            try:
+                batch, source = read_drop_file(path)
+                if source in self._stored:
+                    logger.info("%s is already in the store", path)
+                    self._move(path, DONE_DIR)
+                    continue
+                files.append((path, self._frame.conform(batch), source))
+            except (OSError, ValueError, TypeError) as e:
+                self._reject(path, e)
+        if not files:
+            return 0
+        return self._ingest_or_reject(files)
+
+    def _ingest_or_reject(self, files):
+        """Ingest files as one batch or, if that fails other than on I/O, a file at a time,
+        rejecting those that fail on their own; returns the number of rows added"""
+        try:
+            return self._ingest_files(files)
+        except OSError:
+            raise
+        except Exception as e:
+            if len(files) == 1:
+                self._reject(files[0][0], e)
+                return 0
+            logger.warning("Ingesting %d files together failed (%s); retrying them one at a time", len(files), e)
+        return sum(self._ingest_or_reject([file]) for file in files)
+
+    def _ingest_files(self, files):
+        """Ingest [(path, rows, source)] as one batch, then move the files to done/"""
+        batch = pd.concat([rows for _, rows, _ in files], ignore_index=True)
+        self.ingest(batch, [source for _, _, source in files])
+        for path, _, _ in files:
+            self._move(path, DONE_DIR)
+        return len(batch)
+
+    def ingest(self, batch, sources=()):
+        """Append batch to the dataset and publish it; returns the new CachedDataset.
+
+        Rows are put in store segment order first, so the dataset stays
+        row for row what reloading the store gives. With a store, the
+        segment is written (recording sources) before anything is
+        published; the store is the record of what's been ingested.
+        """
+        with self._lock:
+            self._start()
+            batch = self._frame.conform(batch)
+            batch = batch.iloc[segment_order(batch)].reset_index(drop=True)
+            if self.store_root:
+                write_segment(batch, self.store_root, sources=sources)
+                self._stored.update(sources)
+            frame = self._frame.append(batch)
+            self._cube = self._cube.updated(batch)
+            self._index = self._index.appended(frame, len(batch))
+            self._floats = self._floats.appended(frame, len(batch))
+            for extension in self.extensions:
+                self._extended.update(extension.extend(frame, len(batch)))
+            entry = self.cache.publish(self.key, frame, derived={
+                "cube": self._cube, "index": self._index, "floats": self._floats, **self._extended})
+            logger.info("Ingested %d rows; dataset version %d has %d", len(batch), entry.version, len(frame))
+            return entry
+
+    def _start(self):
+        """Copy the loaded dataset into appendable buffers and index it, once. Caller holds self._lock"""
+        if self._frame is not None:
+            return
+        if self.store_root and os.path.exists(os.path.join(self.store_root, MANIFEST)):
+            self._stored = set(ArgoStore(self.store_root).sources())
+        self._frame = AppendableFrame(self.cache.get(self.key, self.loader, pinned=True).data)
+        frame = self._frame.snapshot()
+        self._cube = AggregateCube.from_frame(frame)
+        self._index = LayeredIndex.from_frame(frame)
+        self._floats = LayeredTrajectories.from_frame(frame)
+        for extension in self.extensions:
+            self._extended.update(extension.start(frame))
+
+    def _reject(self, path, error):
+        logger.warning("Rejected %s: %s", path, error)
+        self._move(path, REJECTED_DIR)
+
+    def _move(self, path, subdir):
+        try:
+            os.replace(path, os.path.join(self.drop_dir, subdir, os.path.basename(path)))
+        except FileNotFoundError:
+            # Moved already
+            pass
+
+    def start(self):
+        """Poll in a background thread until stop()"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="argo-ingest", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Ingestion from %s failed", self.drop_dir)
+            self._stop.wait(self.poll_seconds)
+
+
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+
+def watch(cache, key, loader, drop_dir, **kwargs):
+    """The process-wide, running DropIngester for a drop directory, started on first use"""
+    with _watchers_lock:
+        if drop_dir not in _watchers:
+            _watchers[drop_dir] = DropIngester(cache, key, loader, drop_dir, **kwargs).start()
+        return _watchers[drop_dir]
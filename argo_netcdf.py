@@ -0,0 +1,342 @@
+"""Convert ARGO NetCDF profile files into a FloatChat ARGO store, in parallel.
+
+Every file is read and filtered by a worker process on its own, so the
+conversion spreads over all cores and a worker only ever holds one file.
+Within a file, QC filtering is vectorized over all its profiles and levels:
+a level is kept when its pressure, temperature and salinity are present and
+their QC flags are accepted (1, 2, 5 or 8 by default), using the adjusted
+values of delayed-mode and adjusted profiles, and a profile when its date
+and position are too. By default each profile becomes one row, from its
+shallowest kept level, as the app expects one row per float report;
+--all-levels keeps one row per level instead.
+
+Rows are collected into segments of about --segment-rows and written with
+argo_store.write_segment. A checkpoint log next to the store records which
+files each segment holds, so an interrupted run started again with the same
+arguments skips what's already stored. Reading NetCDF needs netCDF4, or
+scipy for NetCDF-3 files such as those on the ARGO GDAC:
+
+    pip install netCDF4
+    python argo_netcdf.py /data/gdac/dac --store argo-store [--workers 8] [--qc 1,2]
+    FLOATCHAT_STORE=argo-store streamlit run floatchat.py
+
+The run assumes it is the only writer to the store while it runs.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from argo_store import MANIFEST, ArgoStore, new_segment_name, write_segment
+
+try:
+    import netCDF4
+except ImportError:
+    netCDF4 = None
+try:
+    from scipy.io import netcdf_file
+except ImportError:
+    netcdf_file = None
+
+logger = logging.getLogger(__name__)
+
+# ARGO reference table 2: good, probably good, changed and estimated values
+DEFAULT_QC_FLAGS = "1258"
+FILL_VALUE = 99999.0
+JULD_EPOCH = pd.Timestamp("1950-01-01")
+MEASUREMENTS = {"pressure": "PRES", "temperature": "TEMP", "salinity": "PSAL"}
+PROFILE_VARIABLES = ["PLATFORM_NUMBER", "DATA_MODE", "JULD", "JULD_QC", "LATITUDE", "LONGITUDE", "POSITION_QC"]
+CHECKPOINT = "ingest-checkpoint.jsonl"
+NO_READER = "Reading NetCDF needs netCDF4 or scipy: pip install netCDF4"
+
+
+def read_variables(path, names):
+    """{name: array} for those of the named variables a NetCDF file has, as stored (no masking or scaling)"""
+    if netCDF4 is not None:
+        with netCDF4.Dataset(path) as ds:
+            ds.set_auto_maskandscale(False)
+            ds.set_auto_chartostring(False)
+            return {name: np.asarray(ds.variables[name][:]) for name in names if name in ds.variables}
+    if netcdf_file is not None:
+        with netcdf_file(path, "r", mmap=False) as ds:
+            return {name: np.array(ds.variables[name][:]) for name in names if name in ds.variables}
+    raise RuntimeError(NO_READER)
+
+
+def ocean_region(lat, lon):
+    """The FloatChat region of each position, from coarse basin boundaries"""
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = (np.asarray(lon, dtype=np.float64) + 180.0) % 360.0 - 180.0
+    north = lat >= 0
+    # West of 70W only the Gulf of Mexico and Caribbean are Atlantic, not the Pacific coast of Central America
+    caribbean = (lon >= -100) & (lon < -70) & (
+        (lat >= 18) | ((lon >= -89) & (lat >= 15)) | ((lon >= -84) & (lat > 9)) | ((lon >= -77) & (lat > 8)))
+    # East of 20E, the eastern Mediterranean and the Black Sea
+    inland_seas = (((lon >= 20) & (lon < 37) & (lat >= 30) & (lat < 46)) |
+                   ((lon >= 27) & (lon < 42) & (lat >= 40) & (lat < 48)))
+    atlantic = ((lon >= -70) & (lon < 20)) | caribbean | inland_seas
+    indian = (lon >= 20) & (lon < 120) & (lat < 30) & ~((lon >= 100) & north)
+    return np.select(
+        [lat >= 66, lat < -45, indian, atlantic & north, atlantic, north],
+        ["Arctic Ocean", "Southern Ocean", "Indian Ocean", "North Atlantic", "South Atlantic", "North Pacific"],
+        default="South Pacific")
+
+
+def _flags_ok(flags, accepted):
+    """Which single-character QC flags (an S1 array) are accepted"""
+    return np.isin(np.asarray(flags, dtype="S1").view(np.uint8), np.frombuffer(accepted.encode(), dtype=np.uint8))
+
+
+def _present(values):
+    return np.isfinite(values) & (np.abs(values) < FILL_VALUE)
+
+
+def convert_profiles(variables, accepted=DEFAULT_QC_FLAGS, all_levels=False):
+    """ARGO rows from the variables of one profile file, QC-filtered"""
+    platform = np.asarray(variables["PLATFORM_NUMBER"], dtype="S1")
+    n_profiles = platform.shape[0]
+    platform = np.ascontiguousarray(platform).view(f"S{platform.shape[1]}").ravel()
+    float_ids = np.char.strip(np.char.decode(platform, "ascii", errors="replace"))
+
+    # Adjusted values replace real-time ones for adjusted (A) and delayed-mode (D) profiles
+    mode = np.asarray(variables.get("DATA_MODE", np.full(n_profiles, b"R")), dtype="S1").reshape(n_profiles)
+    adjusted = np.isin(mode, [b"A", b"D"])[:, None]
+    values, good = {}, None
+    for column, name in MEASUREMENTS.items():
+        if name not in variables:
+            return pd.DataFrame()
+        raw = np.asarray(variables[name], dtype=np.float64).reshape(n_profiles, -1)
+        flags = np.asarray(variables[f"{name}_QC"], dtype="S1").reshape(raw.shape)
+        if f"{name}_ADJUSTED" in variables:
+            adjusted_raw = np.asarray(variables[f"{name}_ADJUSTED"], dtype=np.float64).reshape(raw.shape)
+            adjusted_flags = np.asarray(variables[f"{name}_ADJUSTED_QC"], dtype="S1").reshape(raw.shape)
+            raw = np.where(adjusted, adjusted_raw, raw)
+            flags = np.where(adjusted, adjusted_flags, flags)
+        ok = _present(raw) & _flags_ok(flags, accepted)
+        good = ok if good is None else good & ok
+        values[column] = raw
+
+    juld = np.asarray(variables["JULD"], dtype=np.float64).reshape(n_profiles)
+    lat = np.asarray(variables["LATITUDE"], dtype=np.float64).reshape(n_profiles)
+    lon = np.asarray(variables["LONGITUDE"], dtype=np.float64).reshape(n_profiles)
+    dated = _present(juld) & _flags_ok(variables["JULD_QC"], accepted).reshape(n_profiles)
+    placed = _present(lat) & _present(lon) & _flags_ok(variables["POSITION_QC"], accepted).reshape(n_profiles)
+    good &= (dated & placed)[:, None]
+
+    if all_levels:
+        profiles, levels = np.nonzero(good)
+    else:
+        profiles = np.flatnonzero(good.any(axis=1))
+        levels = good[profiles].argmax(axis=1)
+
+    return pd.DataFrame({
+        "date": JULD_EPOCH + pd.to_timedelta(juld[profiles], unit="D"),
+        "region": ocean_region(lat[profiles], lon[profiles]),
+        "latitude": lat[profiles].astype(np.float32),
+        "longitude": lon[profiles].astype(np.float32),
+        "temperature": values["temperature"][profiles, levels].astype(np.float32),
+        "salinity": values["salinity"][profiles, levels].astype(np.float32),
+        "pressure": values["pressure"][profiles, levels].astype(np.float32),
+        "float_id": float_ids[profiles]
+    })
+
+
+def convert_file(path, accepted=DEFAULT_QC_FLAGS, all_levels=False):
+    """(path, rows, error) for one file; runs in a worker process"""
+    names = PROFILE_VARIABLES + [f"{name}{suffix}" for name in MEASUREMENTS.values()
+                                 for suffix in ("", "_QC", "_ADJUSTED", "_ADJUSTED_QC")]
+    try:
+        return path, convert_profiles(read_variables(path, names), accepted, all_levels), None
+    except (OSError, KeyError, ValueError, TypeError, IndexError) as e:
+        return path, None, f"{type(e).__name__}: {e}"
+
+
+def find_files(sources):
+    """Every .nc file given or under the given directories, sorted, each once"""
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            for directory, _, names in os.walk(source):
+                paths.extend(os.path.join(directory, name) for name in names if name.endswith(".nc"))
+        else:
+            paths.append(source)
+    return sorted({os.path.abspath(path) for path in paths})
+
+
+def stored_segments(store_root):
+    return ArgoStore(store_root).segments() if os.path.exists(os.path.join(store_root, MANIFEST)) else []
+
+
+def load_checkpoint(path, store_root):
+    """(files already in the store, segment names the log has used), from the checkpoint log.
+
+    Each line lists the files of one segment and is written before the
+    segment, so it only counts once the segment is in the manifest. A last
+    line cut short by a crash was never followed by its segment; it's
+    truncated away, so the next entry starts on a fresh line.
+    """
+    if not os.path.exists(path):
+        return set(), set()
+    segments = set(stored_segments(store_root))
+    done, named = set(), set()
+    with open(path, "rb") as f:
+        lines = f.readlines()
+    for number, line in enumerate(lines):
+        if not line.strip():
+            continue
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            if number < len(lines) - 1:
+                raise
+            logger.warning("Dropping a torn last line from %s", path)
+            with open(path, "r+b") as f:
+                f.truncate(sum(len(kept) for kept in lines[:number]))
+            break
+        if entry["segment"] is not None:
+            named.add(entry["segment"])
+        if entry["segment"] is None or entry["segment"] in segments:
+            done.update(entry["files"])
+    else:
+        if lines and not lines[-1].endswith(b"\n"):
+            # Complete JSON but no newline: end the line before appending to it
+            with open(path, "ab") as f:
+                f.write(b"\n")
+    return done, named
+
+
+class SegmentWriter:
+    """Writes converted rows to the store in segments, logging which files each one holds"""
+
+    def __init__(self, store_root, path, segment_rows, named=()):
+        self.store_root = store_root
+        self.path = path
+        self.segment_rows = segment_rows
+        # Names the log has used, whether or not their segments were written
+        self.named = set(named)
+        self.frames = []
+        self.files = []
+        self.rows = 0
+        self.segments = []
+
+    def add(self, path, rows):
+        self.files.append(path)
+        if rows is not None and len(rows):
+            self.frames.append(rows)
+            self.rows += len(rows)
+        if self.rows >= self.segment_rows:
+            self.flush()
+
+    def flush(self):
+        if not self.files:
+            return
+        segment = None
+        if self.frames:
+            # Never a name an earlier, interrupted entry logged: its files would count as stored
+            segment = new_segment_name(self.store_root, self.named)
+            self.named.add(segment)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"segment": segment, "files": self.files}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if segment is not None:
+            self.segments.append(write_segment(pd.concat(self.frames, ignore_index=True), self.store_root, segment))
+        self.frames, self.files, self.rows = [], [], 0
+
+
+def ingest(paths, store_root, workers=None, accepted=DEFAULT_QC_FLAGS, all_levels=False,
+           segment_rows=1_000_000, checkpoint=None, report_seconds=10.0):
+    """Convert paths into the store at store_root, skipping files a previous run stored.
+
+    A path listed more than once is converted once. Returns a summary dict:
+    files converted, skipped (stored before, or repeated) and failed, rows
+    written, segments, seconds and files per second.
+    """
+    if netCDF4 is None and netcdf_file is None:
+        raise RuntimeError(NO_READER)
+    os.makedirs(store_root, exist_ok=True)
+    checkpoint = checkpoint or os.path.join(store_root, CHECKPOINT)
+    done, named = load_checkpoint(checkpoint, store_root)
+    todo = [path for path in dict.fromkeys(paths) if path not in done]
+    writer = SegmentWriter(store_root, checkpoint, segment_rows, named)
+    convert = partial(convert_file, accepted=accepted, all_levels=all_levels)
+    workers = workers or os.cpu_count() or 1
+
+    started = last_report = time.monotonic()
+    converted, failed, rows = 0, [], 0
+
+    def collect(result):
+        nonlocal converted, rows, last_report
+        path, frame, error = result
+        if error is not None:
+            logger.warning("Skipped %s: %s", path, error)
+            failed.append(path)
+            return
+        writer.add(path, frame)
+        converted += 1
+        rows += len(frame)
+        now = time.monotonic()
+        if now - last_report >= report_seconds:
+            logger.info("%d/%d files, %d rows, %.1f files/s", converted + len(failed), len(todo), rows,
+                        converted / (now - started))
+            last_report = now
+
+    if workers == 1:
+        for path in todo:
+            collect(convert(path))
+    else:
+        # A bounded window of files in flight keeps finished results from piling up in memory
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for path in todo:
+                pending.append(pool.submit(convert, path))
+                if len(pending) >= 4 * workers:
+                    collect(pending.popleft().result())
+            while pending:
+                collect(pending.popleft().result())
+    writer.flush()
+
+    seconds = time.monotonic() - started
+    return {
+        "files": converted,
+        "skipped": len(paths) - len(todo),
+        "failed": len(failed),
+        "rows": rows,
+        "segments": writer.segments,
+        "seconds": seconds,
+        "files_per_second": converted / seconds if seconds > 0 else 0.0
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert ARGO NetCDF profile files into a FloatChat ARGO store")
+    parser.add_argument("sources", nargs="+", help="NetCDF files, or directories to search for *.nc")
+    parser.add_argument("--store", required=True, help="store root to add segments to")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--qc", default=",".join(DEFAULT_QC_FLAGS),
+                        help="accepted QC flags, comma-separated (default: %(default)s)")
+    parser.add_argument("--all-levels", action="store_true", help="one row per level instead of per profile")
+    parser.add_argument("--segment-rows", type=int, default=1_000_000, help="rows per store segment")
+    parser.add_argument("--checkpoint", default=None, help=f"checkpoint log (default: STORE/{CHECKPOINT})")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    accepted = "".join(flag.strip() for flag in args.qc.split(","))
+    paths = find_files(args.sources)
+    summary = ingest(paths, args.store, args.workers, accepted, args.all_levels, args.segment_rows, args.checkpoint)
+    print(f"Converted {summary['files']:,} files into {summary['rows']:,} rows in {len(summary['segments'])} "
+          f"segments in {summary['seconds']:.1f}s ({summary['files_per_second']:.1f} files/s); "
+          f"{summary['skipped']:,} already stored, {summary['failed']:,} failed")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
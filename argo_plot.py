@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+from argo_index import normalize_lon
+
+# Default maximum number of markers sent to the browser per map
+DEFAULT_POINT_BUDGET = 5000
+MIN_CELL_DEGREES = 0.05
+
+
+def bin_points(df, max_points=DEFAULT_POINT_BUDGET, by=None):
+    """Aggregate rows onto a lat/lon grid so that at most max_points markers remain.
+
+    The grid resolution follows the extent of the data, so a regional view
+    gets finer cells than a global one. Numeric columns are averaged per
+    cell, other columns keep the first value, and a count column records how
+    many measurements each marker stands for. Columns listed in by (e.g. a
+    categorical colour) are kept distinct within a cell. Frames already
+    within budget are returned unchanged.
+    """
+    if len(df) <= max_points:
+        return df
+
+    by = list(by or [])
+    lat = df["latitude"].to_numpy(dtype=np.float64)
+    lon = normalize_lon(df["longitude"].to_numpy())
+    lat_span = max(float(np.ptp(lat)), MIN_CELL_DEGREES)
+    lon_span = max(float(np.ptp(lon)), MIN_CELL_DEGREES)
+    cell = max(np.sqrt(lat_span * lon_span / max_points), MIN_CELL_DEGREES)
+
+    # Coarsen until the grid (times any extra grouping) fits the budget
+    while True:
+        n_lon = int(np.ceil(360.0 / cell)) + 1
+        cell_id = np.floor((lat + 90.0) / cell).astype(np.int64) * n_lon + np.floor((lon + 180.0) / cell).astype(np.int64)
+        keys = [pd.Series(cell_id, index=df.index, name="_cell")] + [df[c] for c in by]
+        grouped = df.groupby(keys, observed=True, sort=False)
+        if grouped.ngroups <= max_points:
+            break
+        cell *= 1.5
+
+    agg = {}
+    for column in df.columns:
+        if column in by:
+            continue
+        agg[column] = "mean" if pd.api.types.is_numeric_dtype(df[column]) else "first"
+    binned = grouped.agg(agg)
+    binned["count"] = grouped.size()
+    if by:
+        binned = binned.reset_index(level=by)
+    return binned.reset_index(drop=True)
+
+
+def scatter_geo(df, color, title, hover_name=None, hover_data=None, max_points=DEFAULT_POINT_BUDGET, **kwargs):
+    """Build a scatter_geo map, binning server-side once df exceeds max_points"""
+    hover_data = list(hover_data or [])
+    columns = list(dict.fromkeys(["latitude", "longitude", color] + ([hover_name] if hover_name else []) + hover_data))
+    points = df[columns]
+
+    categorical_color = not pd.api.types.is_numeric_dtype(points[color])
+    binned = bin_points(points, max_points, by=[color] if categorical_color else None)
+    if binned is not points:
+        kwargs["size"] = "count"
+        hover_data.append("count")
+        title = f"{title} ({len(df):,} measurements in {len(binned):,} bins)"
+
+    fig = px.scatter_geo(binned, lat="latitude", lon="longitude", color=color, title=title,
+                         hover_name=hover_name, hover_data=hover_data or None, **kwargs)
+    fig.update_geos(showcoastlines=True, coastlinecolor="Black",
+                    showland=True, landcolor="lightgray")
+    return fig
@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+
+# Standard pressure levels (dbar) profiles are interpolated onto, surface to 2000 dbar
+STANDARD_LEVELS = np.array([5, 10, 20, 30, 50, 75, 100, 125, 150, 200, 250, 300, 400, 500, 600, 700,
+                            800, 900, 1000, 1100, 1200, 1300, 1400, 1500, 1750, 2000], dtype=np.float64)
+PROFILE_VARIABLES = ("temperature", "salinity")
+
+
+def gather(offsets, casts):
+    """Positions of the given casts' levels in the ragged arrays, and each cast's (start, stop) in them"""
+    lengths = offsets[casts + 1] - offsets[casts]
+    stops = np.cumsum(lengths)
+    starts = stops - lengths
+    positions = np.arange(stops[-1] if len(stops) else 0) + np.repeat(offsets[casts] - starts, lengths)
+    return positions, starts, stops
+
+
+class ProfileSet:
+    """Vertical profiles (casts) stored as ragged arrays.
+
+    The levels of every cast are stored back to back in one pressure,
+    temperature and salinity array each, shallowest first, and offsets marks
+    where each cast starts: cast i is [offsets[i], offsets[i + 1]). casts
+    holds one row of metadata per cast (date, float_id, region, latitude,
+    longitude), and extra any further per-level variables, such as derived
+    ones, laid out like temperature. Interpolating any number of casts onto
+    a set of levels is a single searchsorted over all of them, with no loop
+    over profiles.
+    """
+
+    def __init__(self, casts, offsets, pressure, temperature, salinity, extra=None):
+        self.casts = casts.reset_index(drop=True)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.pressure = np.asarray(pressure, dtype=np.float32)
+        self.temperature = np.asarray(temperature, dtype=np.float32)
+        self.salinity = np.asarray(salinity, dtype=np.float32)
+        self.extra = {name: np.asarray(values, dtype=np.float32) for name, values in (extra or {}).items()}
+
+    @property
+    def nbytes(self):
+        arrays = (self.offsets, self.pressure, self.temperature, self.salinity, *self.extra.values())
+        return int(self.casts.memory_usage(deep=True).sum()) + int(sum(a.nbytes for a in arrays))
+
+    def values(self, variable):
+        """The per-level array of a stored or extra variable"""
+        if variable in self.extra:
+            return self.extra[variable]
+        if variable in ("pressure", "temperature", "salinity"):
+            return getattr(self, variable)
+        raise KeyError(f"Unknown profile variable: {variable}")
+
+    def with_variables(self, **arrays):
+        """A ProfileSet sharing these casts and levels, with more per-level variables"""
+        return ProfileSet(self.casts, self.offsets, self.pressure, self.temperature, self.salinity,
+                          {**self.extra, **arrays})
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def profile(self, cast):
+        """One cast's levels as a frame, shallowest first"""
+        start, stop = self.offsets[cast], self.offsets[cast + 1]
+        return pd.DataFrame({
+            "pressure": self.pressure[start:stop],
+            "temperature": self.temperature[start:stop],
+            "salinity": self.salinity[start:stop]
+        })
+
+    def select(self, regions=None, days=None, now=None):
+        """Indices of the casts in any of the named regions and, with days, from the last N days"""
+        mask = np.ones(len(self), dtype=bool)
+        if regions is not None:
+            mask &= self.casts["region"].astype(str).isin(list(regions)).to_numpy()
+        if days is not None:
+            now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+            mask &= (self.casts["date"] >= now - pd.Timedelta(days=days)).to_numpy()
+        return np.flatnonzero(mask)
+
+    def interpolate(self, levels=STANDARD_LEVELS, casts=None, variables=PROFILE_VARIABLES):
+        """Linearly interpolate casts onto levels.
+
+        Returns {variable: array of shape (len(casts), len(levels))}; levels
+        outside a cast's sampled pressure range are NaN.
+        """
+        casts = np.arange(len(self)) if casts is None else np.asarray(casts, dtype=np.int64)
+        levels = np.asarray(levels, dtype=np.float64)
+        n_casts, n_levels = len(casts), len(levels)
+        if n_casts == 0 or len(self.pressure) == 0:
+            return {v: np.full((n_casts, n_levels), np.nan) for v in variables}
+        positions, starts, stops = gather(self.offsets, casts)
+        pressure = self.pressure[positions].astype(np.float64)
+
+        # Casts one after another on a single increasing key, so one search finds every bracket
+        span = float(max(pressure.max(initial=0), levels.max())) + 1.0
+        cast_number = np.repeat(np.arange(n_casts), stops - starts)
+        keys = cast_number * span + pressure
+        query = (np.arange(n_casts)[:, None] * span + levels[None, :]).ravel()
+        first = np.repeat(starts, n_levels)
+        last = np.repeat(stops, n_levels) - 1
+        upper = np.minimum(np.maximum(np.searchsorted(keys, query, side="left"), first + 1), last)
+        lower = np.maximum(upper - 1, 0)
+
+        target = np.tile(levels, n_casts)
+        p0, p1 = pressure[lower], pressure[upper]
+        valid = (last > first) & (target >= pressure[np.minimum(first, len(pressure) - 1)]) & \
+            (target <= pressure[np.maximum(last, 0)])
+        weight = (target - p0) / np.where(p1 > p0, p1 - p0, 1.0)
+
+        result = {}
+        for variable in variables:
+            values = self.values(variable)[positions].astype(np.float64)
+            interpolated = values[lower] + weight * (values[upper] - values[lower])
+            interpolated[~valid] = np.nan
+            result[variable] = interpolated.reshape(n_casts, n_levels)
+        return result
+
+    def section(self, casts=None, variable="temperature", levels=STANDARD_LEVELS, band_degrees=2.0):
+        """Mean of variable per latitude band and level across casts.
+
+        Returns (band centres, levels, means) with means of shape
+        (len(levels), number of bands), NaN where no cast reaches a level.
+        """
+        casts = np.arange(len(self)) if casts is None else np.asarray(casts, dtype=np.int64)
+        values = self.interpolate(levels, casts, (variable,))[variable]
+        latitude = self.casts["latitude"].to_numpy(dtype=np.float64)[casts]
+        bands, band_index = np.unique(np.floor(latitude / band_degrees).astype(np.int64), return_inverse=True)
+
+        n_levels = len(levels)
+        cells = (band_index[:, None] * n_levels + np.arange(n_levels)[None, :])
+        valid = ~np.isnan(values)
+        size = len(bands) * n_levels
+        sums = np.bincount(cells[valid], values[valid], minlength=size)
+        counts = np.bincount(cells[valid], minlength=size)
+        with np.errstate(invalid="ignore"):
+            means = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+        return (bands + 0.5) * band_degrees, np.asarray(levels), means.reshape(len(bands), n_levels).T
+
+    def ts_points(self, casts=None, levels=STANDARD_LEVELS):
+        """Temperature and salinity of casts at every level they reach, as a long frame with pressure"""
+        casts = np.arange(len(self)) if casts is None else np.asarray(casts, dtype=np.int64)
+        values = self.interpolate(levels, casts)
+        temperature, salinity = values["temperature"].ravel(), values["salinity"].ravel()
+        keep = ~(np.isnan(temperature) | np.isnan(salinity))
+        return pd.DataFrame({
+            "temperature": temperature[keep],
+            "salinity": salinity[keep],
+            "pressure": np.tile(np.asarray(levels, dtype=np.float64), len(casts))[keep]
+        })
@@ -0,0 +1,302 @@
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+
+# On-disk layout of a FloatChat ARGO store:
+#
+#   <root>/manifest.json           list of segments, in ingestion order
+#   <root>/seg-00000/meta.json     row count, column dtypes, float ID dictionary,
+#                                  the (region, month) partition index and the
+#                                  sources the rows came from
+#   <root>/seg-00000/<column>.npy  one array per column
+#
+# Rows inside a segment are sorted by region, then month, then date, so every
+# (region, month) partition is a contiguous row range that can be sliced out
+# of a memory-mapped column without reading the rest of the file. Segments are
+# immutable once written; new data is added as new segments. A segment
+# directory missing from the manifest is what's left of an interrupted write:
+# readers ignore it, and new segments are numbered past it.
+
+MANIFEST = "manifest.json"
+SEGMENT_META = "meta.json"
+STORE_FORMAT = 1
+
+SEGMENT_PREFIX = "seg-"
+
+# Columns kept as .npy files; region is implied by the partition index and
+# float_id is stored as integer codes into the segment's float ID dictionary
+DATA_COLUMNS = ["date", "latitude", "longitude", "temperature", "salinity", "pressure"]
+
+
+def _read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_json_atomic(path, payload):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
+
+
+def _segment_number(name):
+    """The number in a segment (or segment temp dir) name, or None for anything else"""
+    if not name.startswith(SEGMENT_PREFIX):
+        return None
+    digits = name[len(SEGMENT_PREFIX):].split(".", 1)[0]
+    return int(digits) if digits.isdigit() else None
+
+
+def new_segment_name(root, taken=()):
+    """A segment name not used in root, nor among taken.
+
+    Names are numbered after every segment in the manifest and every segment
+    directory on disk, so a directory left behind by an interrupted write
+    (on disk but not in the manifest) is never reused.
+    """
+    names = list(os.listdir(root)) if os.path.isdir(root) else []
+    manifest_path = os.path.join(root, MANIFEST)
+    if os.path.exists(manifest_path):
+        names.extend(_read_json(manifest_path)["segments"])
+    numbers = [n for n in map(_segment_number, [*names, *taken]) if n is not None]
+    return f"{SEGMENT_PREFIX}{max(numbers, default=-1) + 1:05d}"
+
+
+def segment_order(df):
+    """Row order of df in a segment: by region, then month, then date"""
+    region = df["region"].astype(str).to_numpy()
+    month = df["date"].dt.strftime("%Y-%m").to_numpy()
+    return np.lexsort((df["date"].to_numpy(), month, region))
+
+
+def write_segment(df, root, name=None, sources=()):
+    """Convert a frame of ARGO rows into a new partitioned, columnar segment under root.
+
+    Returns the segment name: name if given, else new_segment_name(root).
+    sources (e.g. the files the rows came from) are recorded with the
+    segment, so whether they're stored can be read back from the store.
+    The manifest is only updated once every column file is on disk, so
+    readers never see a half-written segment; a directory of that name that
+    isn't in the manifest is what's left of an interrupted write of it, and
+    is replaced.
+    """
+    os.makedirs(root, exist_ok=True)
+    manifest_path = os.path.join(root, MANIFEST)
+    manifest = _read_json(manifest_path) if os.path.exists(manifest_path) else {"format": STORE_FORMAT, "segments": []}
+    name = name or new_segment_name(root)
+    if name in manifest["segments"]:
+        raise ValueError(f"Segment {name} already exists in {root}")
+
+    # Sort rows so each (region, month) partition is contiguous
+    order = segment_order(df)
+    region = df["region"].astype(str).to_numpy()[order]
+    month = df["date"].dt.strftime("%Y-%m").to_numpy()[order]
+
+    # Partition boundaries: wherever region or month changes
+    changes = np.flatnonzero((region[1:] != region[:-1]) | (month[1:] != month[:-1])) + 1
+    starts = np.concatenate(([0], changes)).astype(np.int64)
+    stops = np.concatenate((changes, [len(order)])).astype(np.int64)
+    partitions = [
+        {"region": region[start], "month": month[start], "start": int(start), "stop": int(stop)}
+        for start, stop in zip(starts, stops)
+    ] if len(order) else []
+
+    float_ids = pd.Categorical(df["float_id"].astype(str).to_numpy()[order])
+
+    tmp_dir = os.path.join(root, name + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    columns = {}
+    for column in DATA_COLUMNS:
+        values = df[column].to_numpy()[order]
+        np.save(os.path.join(tmp_dir, column + ".npy"), values)
+        columns[column] = str(values.dtype)
+    codes = float_ids.codes.astype(np.int32)
+    np.save(os.path.join(tmp_dir, "float_id.npy"), codes)
+    columns["float_id"] = "category"
+
+    _write_json_atomic(os.path.join(tmp_dir, SEGMENT_META), {
+        "rows": int(len(order)),
+        "columns": columns,
+        "float_ids": [str(x) for x in float_ids.categories],
+        "partitions": partitions,
+        "sources": [str(source) for source in sources]
+    })
+    segment_dir = os.path.join(root, name)
+    shutil.rmtree(segment_dir, ignore_errors=True)
+    os.replace(tmp_dir, segment_dir)
+
+    manifest["segments"].append(name)
+    _write_json_atomic(manifest_path, manifest)
+    return name
+
+
+def _month_key(value):
+    return pd.Timestamp(value).strftime("%Y-%m")
+
+
+def _runs(partitions):
+    """Merge adjacent partitions into contiguous (start, stop, [(region, rows), ...]) runs"""
+    runs = []
+    for p in partitions:
+        rows = p["stop"] - p["start"]
+        if runs and runs[-1][1] == p["start"]:
+            runs[-1][1] = p["stop"]
+            runs[-1][2].append((p["region"], rows))
+        else:
+            runs.append([p["start"], p["stop"], [(p["region"], rows)]])
+    return runs
+
+
+class ArgoStore:
+    """Read-only view of an on-disk ARGO store.
+
+    Columns are memory-mapped, and only the partitions a query touches are
+    sliced out, so resident memory follows the working set rather than the
+    archive size.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.manifest = _read_json(os.path.join(root, MANIFEST))
+        self._meta = {}
+        self._maps = {}
+
+    def segments(self):
+        return list(self.manifest["segments"])
+
+    def segment_meta(self, segment):
+        if segment not in self._meta:
+            self._meta[segment] = _read_json(os.path.join(self.root, segment, SEGMENT_META))
+        return self._meta[segment]
+
+    def sources(self):
+        """{source: segment} for the sources recorded with every segment"""
+        return {source: segment for segment in self.segments()
+                for source in self.segment_meta(segment).get("sources", ())}
+
+    def regions(self):
+        """Return every region present in the store, in first-seen order"""
+        seen = {}
+        for segment in self.segments():
+            for p in self.segment_meta(segment)["partitions"]:
+                seen.setdefault(p["region"], None)
+        return list(seen)
+
+    def column(self, segment, column):
+        """Return a memory-mapped column array for one segment"""
+        key = (segment, column)
+        if key not in self._maps:
+            self._maps[key] = np.load(os.path.join(self.root, segment, column + ".npy"), mmap_mode="r")
+        return self._maps[key]
+
+    def load(self, columns=None, regions=None, start=None, end=None):
+        """Load a DataFrame restricted to the given columns, regions and date range.
+
+        Partitions outside the requested regions and months are never read.
+        When the selection is a single contiguous row range, the returned
+        columns are zero-copy views of the memory-mapped files.
+        """
+        columns = list(columns) if columns is not None else DATA_COLUMNS + ["region", "float_id"]
+        region_filter = set(regions) if regions is not None else None
+        start_month = _month_key(start) if start is not None else None
+        end_month = _month_key(end) if end is not None else None
+        all_regions = self.regions()
+
+        pieces = []
+        for segment in self.segments():
+            meta = self.segment_meta(segment)
+            selected = [
+                p for p in meta["partitions"]
+                if (region_filter is None or p["region"] in region_filter)
+                and (start_month is None or p["month"] >= start_month)
+                and (end_month is None or p["month"] <= end_month)
+            ]
+            for run_start, run_stop, run_regions in _runs(selected):
+                piece = {}
+                for column in columns:
+                    if column == "region":
+                        names, lengths = zip(*run_regions)
+                        codes = np.array([all_regions.index(r) for r in names], dtype=np.int8)
+                        piece[column] = np.repeat(codes, lengths)
+                    elif column == "float_id":
+                        # Re-code against a store-wide dictionary below
+                        piece[column] = (meta["float_ids"], self.column(segment, column)[run_start:run_stop])
+                    else:
+                        piece[column] = self.column(segment, column)[run_start:run_stop]
+                if "date" in columns or start is not None or end is not None:
+                    piece["_date"] = self.column(segment, "date")[run_start:run_stop]
+                pieces.append(piece)
+
+        frame = {}
+        for column in columns:
+            if column == "float_id":
+                frame[column] = self._concat_float_ids([p[column] for p in pieces])
+            elif column == "region":
+                codes = self._concat([p[column] for p in pieces], np.int8)
+                frame[column] = pd.Categorical.from_codes(codes, categories=all_regions)
+            else:
+                dtype = self._dtype(column)
+                frame[column] = self._concat([p[column] for p in pieces], dtype)
+        df = pd.DataFrame(frame, copy=False)
+
+        # Partitions are month-granular; trim to the exact range requested
+        if start is not None or end is not None:
+            dates = self._concat([p["_date"] for p in pieces], np.dtype("datetime64[ns]"))
+            mask = np.ones(len(dates), dtype=bool)
+            if start is not None:
+                mask &= dates >= np.datetime64(pd.Timestamp(start))
+            if end is not None:
+                mask &= dates <= np.datetime64(pd.Timestamp(end))
+            if not mask.all():
+                df = df[mask].reset_index(drop=True)
+        return df
+
+    def _dtype(self, column):
+        segments = self.segments()
+        if not segments:
+            return np.dtype("float32")
+        return np.dtype(self.segment_meta(segments[0])["columns"][column])
+
+    @staticmethod
+    def _concat(arrays, dtype):
+        if len(arrays) == 1:
+            return arrays[0]
+        if not arrays:
+            return np.empty(0, dtype=dtype)
+        return np.concatenate(arrays)
+
+    @staticmethod
+    def _concat_float_ids(parts):
+        if len(parts) == 1:
+            categories, codes = parts[0]
+            return pd.Categorical.from_codes(codes, categories=categories)
+        categories = list(dict.fromkeys(c for cats, _ in parts for c in cats))
+        lookup = {c: i for i, c in enumerate(categories)}
+        codes = [np.array([lookup[c] for c in cats], dtype=np.int32)[part_codes] for cats, part_codes in parts]
+        return pd.Categorical.from_codes(ArgoStore._concat(codes, np.int32), categories=categories)
+
+
+def main(argv=None):
+    """Build a store from generated mock data: python argo_store.py ROOT [FLOATS_PER_REGION]"""
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("Usage: python argo_store.py ROOT [FLOATS_PER_REGION]")
+        return 1
+
+    from floatchat import generate_mock_argo_data
+    floats_per_region = int(argv[1]) if len(argv) > 1 else 5
+    df = generate_mock_argo_data(seed=0, floats_per_region=floats_per_region)
+    name = write_segment(df, argv[0])
+    print(f"Wrote {len(df):,} rows to {os.path.join(argv[0], name)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""Latency, throughput and memory benchmark for the three FloatChat entry points.
+
+Replays benchmarks/queries.txt against floatchat.process_query,
+ARGOOceanChatbot.generate_response and AdvancedOceanChatbot.generate_response
+and reports p50/p95/p99 latency, throughput and peak traced memory. The
+floatchat engine is measured at every requested dataset size; the two
+knowledge-base bots don't depend on the dataset and are measured once.
+
+Run headless from the repository root:
+
+    python benchmarks/bench_bots.py --rows 2000,1000000,10000000 --rounds 5
+    python benchmarks/bench_bots.py --compare benchmarks/results/<earlier run>.json
+
+Each run is saved as JSON under benchmarks/results/ so that later runs can
+be compared against it with --compare.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+logging.disable(logging.WARNING)
+
+import floatchat
+from ai_bot import ARGOOceanChatbot
+from ai_ocean_bot import AdvancedOceanChatbot
+from argo_cache import dataset_cache, figure_cache
+
+QUERIES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "queries.txt")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+ROWS_PER_FLOAT_SLOT = len(floatchat.MOCK_REGIONS) * 61  # regions x monthly dates over 5 years
+
+
+def load_queries(path=QUERIES_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def load_dataset(rows):
+    """Make a mock dataset of roughly the given size and install it as floatchat's shared dataset"""
+    floats_per_region = max(1, round(rows / ROWS_PER_FLOAT_SLOT))
+    start = time.perf_counter()
+    dataset_cache.refresh()
+    entry = dataset_cache.get(floatchat.DEFAULT_DATASET,
+                              lambda: floatchat.generate_mock_argo_data(seed=0, floats_per_region=floats_per_region),
+                              pinned=True)
+    return len(entry.data), time.perf_counter() - start
+
+
+def measure(respond, queries, rounds, cold):
+    """Replay the corpus; return latency percentiles, throughput and peak traced memory"""
+    # Warm-up pass with tracemalloc on, for peak memory of one replay
+    tracemalloc.start()
+    for query in queries:
+        if cold:
+            figure_cache.clear()
+        respond(query)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for query in queries:
+            if cold:
+                figure_cache.clear()
+            t0 = time.perf_counter()
+            respond(query)
+            latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "queries": len(latencies),
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "mean_ms": float(latencies_ms.mean()),
+        "throughput_qps": len(latencies) / elapsed,
+        "peak_traced_mb": peak / 1e6
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(results, baseline=None):
+    previous = {(r["engine"], r["rows"]): r for r in baseline["results"]} if baseline else {}
+    print(f"{'engine':40} {'rows':>12} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'q/s':>10} {'peak MB':>9}"
+          + ("  p95 vs baseline" if baseline else ""))
+    for r in results:
+        line = (f"{r['engine']:40} {r['rows'] if r['rows'] is not None else '-':>12} {r['p50_ms']:9.3f} "
+                f"{r['p95_ms']:9.3f} {r['p99_ms']:9.3f} {r['throughput_qps']:10.1f} {r['peak_traced_mb']:9.2f}")
+        old = previous.get((r["engine"], r["rows"]))
+        if old:
+            line += f"  {(r['p95_ms'] / old['p95_ms'] - 1) * 100:+.1f}%"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", default="2000,1000000",
+                        help="comma-separated dataset sizes for floatchat (default: %(default)s)")
+    parser.add_argument("--rounds", type=int, default=5, help="replays of the query corpus per engine")
+    parser.add_argument("--queries", default=QUERIES_PATH, help="file with one query per line")
+    parser.add_argument("--cold", action="store_true", help="clear the figure cache before every query")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument("--no-save", action="store_true", help="don't write a results file")
+    args = parser.parse_args(argv)
+
+    queries = load_queries(args.queries)
+    results = []
+
+    for rows in [int(r) for r in args.rows.split(",")]:
+        actual_rows, load_s = load_dataset(rows)
+        print(f"dataset: {actual_rows:,} rows generated in {load_s:.2f}s", file=sys.stderr)
+        stats = measure(floatchat.process_query, queries, args.rounds, args.cold)
+        results.append({"engine": "floatchat.process_query", "rows": actual_rows, "load_s": load_s, **stats})
+
+    simple_bot = ARGOOceanChatbot()
+    stats = measure(simple_bot.generate_response, queries, args.rounds, False)
+    results.append({"engine": "ARGOOceanChatbot.generate_response", "rows": None, **stats})
+
+    advanced_bot = AdvancedOceanChatbot()
+    stats = measure(advanced_bot.generate_response, queries, args.rounds, False)
+    results.append({"engine": "AdvancedOceanChatbot.generate_response", "rows": None, **stats})
+
+    run = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "rounds": args.rounds,
+        "cold": args.cold,
+        "queries_file": os.path.basename(args.queries),
+        "results": results
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_table(results, baseline)
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"bench-{run['timestamp'].replace(':', '')}-{run['revision'] or 'unknown'}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(run, f, indent=2)
+        print(f"results saved to {path}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
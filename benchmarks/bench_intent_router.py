@@ -0,0 +1,175 @@
+"""Per-query routing latency: the current routing steps vs. the original keyword cascades.
+
+Run from the repository root:
+
+    python benchmarks/bench_intent_router.py [ROUNDS]
+
+The legacy_* functions below are the routing steps exactly as they were
+written before the intent router existed, kept here as the baseline. The
+compiled IntentRouter only serves the bots with many keywords; floatchat's
+route_query and get_sentiment stay substring checks, which are faster for a
+handful of keywords. The benchmark also checks that both versions route
+every query identically.
+"""
+import logging
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+logging.disable(logging.WARNING)
+
+import ai_bot
+import floatchat
+from ai_ocean_bot import AdvancedOceanChatbot
+
+QUERIES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "queries.txt")
+
+
+def load_queries(path=QUERIES_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+# Baseline: floatchat.process_query's substring cascade, with the location
+# check and profile intents added since written the same way
+def legacy_floatchat_route(query):
+    query = query.lower()
+    if any(word in query for word in ["hello", "hi", "hey", "greetings"]):
+        return "greeting", ()
+    near = floatchat.NEAR_PATTERN.search(query)
+    if near:
+        lat, lon = float(near.group(1)), float(near.group(2))
+        if abs(lat) > 90 or abs(lon) > 180:
+            return "bad_location", (lat, lon)
+        return "near", (lat, lon)
+    region = next((key for key in floatchat.REGION_KEYWORDS if key in query), None)
+    if any(word in query for word in ["t-s", "ts diagram", "t/s", "temperature-salinity", "water mass"]):
+        return "ts_diagram", (region,)
+    if "mixed layer" in query or "mld" in query:
+        return "mixed_layer", (region,)
+    if any(word in query for word in ["section", "depth profile", "vertical profile", "profile of", "profiles of",
+                                      "temperature profile", "density profile"]):
+        if "density" in query or "sigma" in query:
+            return "depth_section", (region, "sigma_theta")
+        if "potential temperature" in query or "theta" in query:
+            return "depth_section", (region, "potential_temperature")
+        return "depth_section", (region, "temperature")
+    if "temperature" in query:
+        if "trend" in query or "change" in query:
+            return "temperature_trend", ()
+        return "temperature_map", ()
+    if "salinity" in query:
+        return "salinity_map", ()
+    for key in ["atlantic", "pacific", "indian", "arctic", "southern"]:
+        if key in query:
+            return "region_map", (key,)
+    if "float" in query or "argo" in query:
+        return "float", ()
+    return "unknown", ()
+
+
+# Baseline: ARGOOceanChatbot.generate_response's cascade after spelling correction
+def legacy_ai_bot_route(bot, query):
+    query = bot.correct_spelling(query.lower())
+    if any(greeting in query for greeting in bot.greetings):
+        return "greeting", None
+    if any(farewell in query for farewell in bot.farewells):
+        return "farewell", None
+    ocean = None
+    for name, keywords in ai_bot.OCEAN_KEYWORDS.items():
+        if any(keyword in query for keyword in keywords):
+            ocean = name
+            break
+    checks = [
+        ("temperature", ["temperature"]), ("salinity", ["salinity", "salt"]),
+        ("oxygen", ["oxygen", "o2"]), ("depth", ["depth", "deep"]), ("ph", ["ph", "acidity"]),
+        ("fish", ["fish", "species"]), ("currents", ["current", "flow"]),
+        ("location", ["location", "where", "coordinates"]), ("area", ["area", "size"]),
+        ("facts", ["fact", "interesting"])
+    ]
+    for topic, words in checks:
+        if any(word in query for word in words):
+            return topic, ocean
+    return ("general" if ocean else "unknown"), ocean
+
+
+def compiled_ai_bot_route(bot, query):
+    query = bot.correct_spelling(query.lower())
+    hits = ai_bot.QUERY_KEYWORDS.hits(query)
+    if "greeting" in hits:
+        return "greeting", None
+    if "farewell" in hits:
+        return "farewell", None
+    ocean = bot.detect_ocean(query, hits)
+    for topic in ["temperature", "salinity", "oxygen", "depth", "ph", "fish", "currents",
+                  "location", "area", "facts"]:
+        if topic in hits:
+            return topic, ocean
+    return ("general" if ocean else "unknown"), ocean
+
+
+# Baseline: AdvancedOceanChatbot.detect_intent + get_sentiment
+def legacy_detect_intent(bot, query):
+    query = query.lower()
+    intent_scores = defaultdict(int)
+    for intent, patterns in bot.keyword_patterns.items():
+        for pattern in patterns:
+            if re.search(pattern, query):
+                intent_scores[intent] += 1
+    if intent_scores:
+        return max(intent_scores.items(), key=lambda x: x[1])[0]
+    return "general"
+
+
+def legacy_sentiment(query):
+    positive_words = ['love', 'great', 'awesome', 'amazing', 'beautiful', 'wonderful']
+    negative_words = ['hate', 'terrible', 'awful', 'disgusting', 'sad', 'worried']
+    query = query.lower()
+    positive_count = sum(1 for word in positive_words if word in query)
+    negative_count = sum(1 for word in negative_words if word in query)
+    if positive_count > negative_count:
+        return "positive"
+    elif negative_count > positive_count:
+        return "negative"
+    return "neutral"
+
+
+def time_per_query(fn, queries, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for query in queries:
+            fn(query)
+    return (time.perf_counter() - start) / (rounds * len(queries)) * 1e6
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    rounds = int(argv[0]) if argv else 2000
+    queries = load_queries()
+    simple_bot = ai_bot.ARGOOceanChatbot()
+    advanced_bot = AdvancedOceanChatbot()
+
+    cases = [
+        ("floatchat.route_query", legacy_floatchat_route, floatchat.route_query),
+        ("ARGOOceanChatbot routing",
+         lambda q: legacy_ai_bot_route(simple_bot, q), lambda q: compiled_ai_bot_route(simple_bot, q)),
+        ("AdvancedOceanChatbot.detect_intent",
+         lambda q: legacy_detect_intent(advanced_bot, q), advanced_bot.detect_intent),
+        ("AdvancedOceanChatbot.get_sentiment", legacy_sentiment, advanced_bot.get_sentiment),
+    ]
+
+    print(f"{len(queries)} queries x {rounds} rounds")
+    print(f"{'step':38} {'legacy us':>10} {'current us':>12} {'speedup':>8} {'mismatches':>11}")
+    for name, legacy, compiled in cases:
+        mismatches = sum(1 for q in queries if legacy(q) != compiled(q))
+        legacy_us = time_per_query(legacy, queries, rounds)
+        compiled_us = time_per_query(compiled, queries, rounds)
+        print(f"{name:38} {legacy_us:10.2f} {compiled_us:12.2f} {legacy_us / compiled_us:7.1f}x {mismatches:11d}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
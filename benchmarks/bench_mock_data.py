@@ -0,0 +1,66 @@
+"""Generation time and float ID checks for floatchat.generate_mock_argo_data.
+
+Run from the repository root:
+
+    python benchmarks/bench_mock_data.py [ROWS,ROWS,...]
+
+Generates the mock dataset at each size (default 2000, 1,000,000 and
+10,000,000 rows) and checks that every float keeps one ID for all of its
+dates and that no two floats share an ID, also across regions that share
+an ID prefix. Exits non-zero on any failure.
+"""
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+logging.disable(logging.WARNING)
+
+import floatchat
+
+DATES = 61  # monthly dates over 5 years
+ROWS_PER_FLOAT_SLOT = len(floatchat.MOCK_REGIONS) * DATES
+
+
+def check(df, floats_per_region):
+    """Return a list of problems with the float IDs of df"""
+    problems = []
+    floats = len(floatchat.MOCK_REGIONS) * floats_per_region
+    if df["float_id"].nunique() != floats:
+        problems.append(f"{df['float_id'].nunique()} float IDs for {floats} floats")
+    per_float = df.groupby("float_id", observed=True).agg(regions=("region", "nunique"), dates=("date", "nunique"),
+                                                          rows=("date", "size"))
+    if (per_float["regions"] != 1).any():
+        problems.append(f"{int((per_float['regions'] != 1).sum())} float IDs span several regions")
+    if not (per_float["dates"] == per_float["rows"]).all() or not (per_float["rows"] == DATES).all():
+        problems.append("float IDs without exactly one row per date")
+    return problems
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    sizes = [int(r) for r in argv[0].split(",")] if argv else [2000, 1_000_000, 10_000_000]
+    failures = 0
+    for rows in sizes:
+        floats_per_region = max(1, round(rows / ROWS_PER_FLOAT_SLOT))
+        start = time.perf_counter()
+        try:
+            df = floatchat.generate_mock_argo_data(seed=0, floats_per_region=floats_per_region)
+        except ValueError as e:
+            failures += 1
+            print(f"{rows:>12,} rows: FAILED to generate: {e}")
+            continue
+        elapsed = time.perf_counter() - start
+        problems = check(df, floats_per_region)
+        failures += bool(problems)
+        print(f"{len(df):>12,} rows ({floats_per_region} floats per region) in {elapsed:.2f}s"
+              + "".join(f"\n  FAILED: {p}" for p in problems))
+        del df
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""NetCDF ingestion throughput and round trip, on small synthetic ARGO profile files.
+
+Run from the repository root (needs netCDF4 or scipy, as argo_netcdf does):
+
+    python benchmarks/bench_netcdf_ingest.py [FILES]
+
+Writes FILES (default 60) NetCDF-3 profile files with a few profiles each,
+plus one file that isn't NetCDF, and converts them with argo_netcdf.ingest:
+
+- serially and with worker processes, which must store the same rows;
+- interrupted, then resumed: a first run stores part of the files, the
+  checkpoint log gets an entry whose segment was never written and a line
+  cut short, and a second run over every file, one of them listed twice,
+  must end with the same rows as an uninterrupted run;
+- once more, which must skip every file.
+
+Reports files per second and exits non-zero on any mismatch.
+"""
+import json
+import logging
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+logging.disable(logging.WARNING)
+
+import argo_netcdf
+from argo_store import ArgoStore, new_segment_name
+
+
+def open_for_writing(path):
+    if argo_netcdf.netCDF4 is not None:
+        return argo_netcdf.netCDF4.Dataset(path, "w", format="NETCDF3_CLASSIC")
+    return argo_netcdf.netcdf_file(path, "w")
+
+
+def char_rows(strings, width):
+    rows = np.full((len(strings), width), b" ", dtype="S1")
+    for i, string in enumerate(strings):
+        rows[i, :len(string)] = np.frombuffer(string.encode(), dtype="S1")
+    return rows
+
+
+def write_profile_file(path, platform, rng):
+    """One float's profile file with a few profiles, some values missing or flagged bad"""
+    n_profiles, n_levels = int(rng.integers(1, 4)), int(rng.integers(20, 80))
+    pressure = np.sort(rng.uniform(3, 2000, (n_profiles, n_levels)), axis=1)
+    with open_for_writing(path) as ds:
+        ds.createDimension("N_PROF", n_profiles)
+        ds.createDimension("N_LEVELS", n_levels)
+        ds.createDimension("STRING8", 8)
+
+        def variable(name, dtype, dims, data):
+            ds.createVariable(name, dtype, dims)[:] = data
+
+        def flags(shape, choices, p):
+            return np.array(rng.choice(choices, shape, p=p), dtype="S1")
+
+        variable("PLATFORM_NUMBER", "S1", ("N_PROF", "STRING8"), char_rows([platform] * n_profiles, 8))
+        variable("DATA_MODE", "S1", ("N_PROF",), flags(n_profiles, [b"R", b"A", b"D"], None))
+        variable("JULD", "f8", ("N_PROF",), rng.uniform(26000, 27500, n_profiles))
+        variable("JULD_QC", "S1", ("N_PROF",), flags(n_profiles, [b"1", b"4"], [0.9, 0.1]))
+        variable("LATITUDE", "f8", ("N_PROF",), rng.uniform(-70, 80, n_profiles))
+        variable("LONGITUDE", "f8", ("N_PROF",), rng.uniform(-180, 180, n_profiles))
+        variable("POSITION_QC", "S1", ("N_PROF",), flags(n_profiles, [b"1", b"2", b"3"], [0.8, 0.15, 0.05]))
+        for name, base in [("PRES", pressure), ("TEMP", 20 - pressure / 120), ("PSAL", 35 + pressure / 4000)]:
+            values = (base + rng.normal(0, 0.01, base.shape)).astype(np.float32)
+            values[rng.random(values.shape) < 0.03] = argo_netcdf.FILL_VALUE
+            shape = ("N_PROF", "N_LEVELS")
+            variable(name, "f4", shape, values)
+            variable(f"{name}_QC", "S1", shape, flags(values.shape, [b"1", b"2", b"3", b"4"], [.85, .08, .04, .03]))
+            variable(f"{name}_ADJUSTED", "f4", shape, values + np.float32(0.5))
+            variable(f"{name}_ADJUSTED_QC", "S1", shape, flags(values.shape, [b"1", b"4"], [0.9, 0.1]))
+
+
+def make_files(root, n_files, seed=0):
+    """Write the synthetic files under root, spread over a few directories; return their paths"""
+    rng = np.random.default_rng(seed)
+    for k in range(n_files):
+        directory = os.path.join(root, f"dac{k % 3}")
+        os.makedirs(directory, exist_ok=True)
+        write_profile_file(os.path.join(directory, f"R{6900000 + k}_{k:03d}.nc"), str(6900000 + k), rng)
+    with open(os.path.join(root, "broken.nc"), "wb") as f:
+        f.write(b"not a NetCDF file")
+    return argo_netcdf.find_files([root])
+
+
+def stored_rows(store_root):
+    """The store's rows in a fixed order, so runs that wrote different segments compare equal"""
+    df = ArgoStore(store_root).load()
+    df = df.assign(region=df["region"].astype(str), float_id=df["float_id"].astype(str))
+    return df.sort_values(["float_id", "date", "pressure"]).reset_index(drop=True)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    n_files = int(argv[0]) if argv else 60
+    if argo_netcdf.netCDF4 is None and argo_netcdf.netcdf_file is None:
+        print(argo_netcdf.NO_READER)
+        return 1
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        files = make_files(os.path.join(tmp, "nc"), n_files)
+        good = len(files) - 1
+        segment_rows = 20
+
+        serial = argo_netcdf.ingest(files, os.path.join(tmp, "serial"), workers=1, segment_rows=segment_rows)
+        reference = stored_rows(os.path.join(tmp, "serial"))
+        workers = max(2, os.cpu_count() or 1)
+        parallel = argo_netcdf.ingest(files, os.path.join(tmp, "parallel"), workers=workers, segment_rows=segment_rows)
+        for name, summary in [("1 worker", serial), (f"{workers} workers", parallel)]:
+            print(f"{name:>10}: {summary['files']} files, {summary['rows']} rows, {summary['failed']} failed, "
+                  f"{summary['files_per_second']:.0f} files/s")
+        if serial["failed"] != 1 or parallel["failed"] != 1:
+            failures.append("the file that isn't NetCDF wasn't the one failure")
+        if not stored_rows(os.path.join(tmp, "parallel")).equals(reference):
+            failures.append("parallel run stored different rows")
+
+        # Interrupted run: part of the files stored, then a crash after logging a
+        # segment it never wrote, in the middle of logging the next one
+        store = os.path.join(tmp, "resumed")
+        first = n_files // 3
+        stored = argo_netcdf.ingest(files[:first], store, workers=1, segment_rows=segment_rows)["files"]
+        checkpoint = os.path.join(store, argo_netcdf.CHECKPOINT)
+        with open(checkpoint, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"segment": new_segment_name(store), "files": files[first:first + 5]}) + "\n")
+            f.write('{"segment": "seg-99999", "files": ["')
+        resumed = argo_netcdf.ingest(files + [files[-2]], store, workers=workers, segment_rows=segment_rows)
+        print(f"{'resumed':>10}: {resumed['files']} files, {resumed['skipped']} skipped")
+        if resumed["files"] != good - stored or resumed["skipped"] != stored + 1:
+            failures.append(f"resume converted {resumed['files']} and skipped {resumed['skipped']} files, "
+                            f"expected {good - stored} and {stored + 1}")
+        if not stored_rows(store).equals(reference):
+            failures.append("resumed run stored different rows from an uninterrupted one")
+        with open(checkpoint, "r", encoding="utf-8") as f:
+            try:
+                [json.loads(line) for line in f]
+            except ValueError:
+                failures.append("checkpoint log still has a torn line")
+
+        again = argo_netcdf.ingest(files, store, workers=1, segment_rows=segment_rows)
+        if again["files"] != 0 or again["skipped"] != good:
+            failures.append(f"rerun converted {again['files']} files instead of skipping all {good}")
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    if not failures:
+        print("parallel, resumed and repeated runs store the same rows")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
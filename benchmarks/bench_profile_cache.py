@@ -0,0 +1,82 @@
+"""Profile query latency, cold and from the cached derived products.
+
+Run from the repository root:
+
+    python benchmarks/bench_profile_cache.py [ROWS]
+
+Installs a mock dataset of about ROWS rows (default 300,000, where the
+profile products outgrow the dataset cache's budget) and answers the
+profile queries in QUERIES twice, clearing the figure cache before each so
+every answer goes back to the profiles. The second round must find the
+profiles, derived profiles and mixed-layer depths in the cache instead of
+building them again. Exits non-zero if anything is rebuilt.
+"""
+import logging
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+logging.disable(logging.WARNING)
+
+import floatchat
+from argo_cache import dataset_cache, figure_cache
+
+ROWS_PER_FLOAT_SLOT = len(floatchat.MOCK_REGIONS) * 61  # regions x monthly dates over 5 years
+
+QUERIES = [
+    "depth profile of the pacific",
+    "vertical profile of density in the atlantic",
+    "t-s diagram for the indian ocean",
+    "mixed layer depth in the southern ocean",
+]
+
+
+def counted(builds, name, fn):
+    def build(*args, **kwargs):
+        builds[name] += 1
+        return fn(*args, **kwargs)
+    return build
+
+
+def answer_all():
+    """Answer every query from scratch but for the dataset cache; return the total seconds"""
+    start = time.perf_counter()
+    for query in QUERIES:
+        figure_cache.clear()
+        floatchat.process_query(query)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    rows = int(argv[0]) if argv else 300_000
+    floats_per_region = max(1, round(rows / ROWS_PER_FLOAT_SLOT))
+    dataset_cache.refresh()
+    entry = dataset_cache.get(floatchat.DEFAULT_DATASET,
+                              lambda: floatchat.generate_mock_argo_data(seed=0, floats_per_region=floats_per_region),
+                              pinned=True)
+
+    # Count every build of the three profile products
+    builds = Counter()
+    for name in ["generate_mock_profiles", "with_derived", "mixed_layer_depth"]:
+        setattr(floatchat, name, counted(builds, name, getattr(floatchat, name)))
+
+    cold_s = answer_all()
+    cold_builds = dict(builds)
+    warm_s = answer_all()
+    stats = dataset_cache.stats()
+    print(f"{len(entry.data):,} rows, {len(QUERIES)} profile queries: {cold_s:.2f}s cold, {warm_s:.2f}s cached")
+    print(f"dataset cache: {stats['nbytes'] / 2**20:.0f} MB held, budget {stats['max_bytes'] / 2**20:.0f} MB")
+
+    rebuilt = {name: count - cold_builds.get(name, 0) for name, count in builds.items() if count > cold_builds.get(name, 0)}
+    if rebuilt or any(count != 1 for count in cold_builds.values()):
+        print(f"FAILED: built {cold_builds} in the first round, rebuilt {rebuilt} in the second")
+        return 1
+    print("second round answered from the cached profile products")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
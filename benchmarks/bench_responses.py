@@ -0,0 +1,110 @@
+"""Per-answer rendering cost: prerendered ARGOOceanChatbot answers vs. building them per call.
+
+Run from the repository root:
+
+    python benchmarks/bench_responses.py [ROUNDS]
+
+The legacy_* functions below render the comparison, listing, overview and
+species answers exactly as ARGOOceanChatbot did before its answers were
+prerendered, kept here as the baseline. The benchmark also checks that both
+versions produce identical text.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import ai_bot
+
+LISTING_HEADINGS = {
+    "ph": ("pH levels across oceans:\n", "ph_level"),
+    "currents": ("Major ocean currents:\n", "currents"),
+    "location": ("Ocean locations:\n", "coordinates"),
+    "area": ("Ocean areas:\n", "area"),
+    "facts": ("Interesting facts about oceans:\n", "facts")
+}
+
+
+# Baseline: ARGOOceanChatbot.compare_oceans
+def legacy_compare_oceans(ocean_data, parameter):
+    response = f"Comparison of {parameter} across oceans:\n"
+    for ocean, data in ocean_data.items():
+        response += f"- {data['name']}: {data[parameter]}\n"
+    return response
+
+
+# Baseline: the listing branches of ARGOOceanChatbot.generate_response
+def legacy_listing(ocean_data, topic):
+    response, field = LISTING_HEADINGS[topic]
+    for ocean_name, data in ocean_data.items():
+        response += f"- {data['name']}: {data[field]}\n"
+    return response
+
+
+# Baseline: ARGOOceanChatbot.get_general_info
+def legacy_general_info(ocean_data, ocean):
+    data = ocean_data[ocean]
+    response = f"Information about the {data['name']}:\n"
+    response += f"- Location: {data['coordinates']}\n"
+    response += f"- Area: {data['area']}\n"
+    response += f"- Volume: {data['volume']}\n"
+    response += f"- Average Depth: {data['depth']}\n"
+    response += f"- Temperature: {data['temperature']}\n"
+    response += f"- Salinity: {data['salinity']}\n"
+    response += f"- Oxygen Levels: {data['oxygen']}\n"
+    response += f"- pH Level: {data['ph_level']}\n"
+    response += f"- Interesting Fact: {data['facts']}\n"
+    response += f"- Data Source: {data['data_source']}\n"
+    return response
+
+
+# Baseline: ARGOOceanChatbot.get_fish_info
+def legacy_fish_info(ocean_data, fish_species, ocean):
+    fish_list = fish_species[ocean]
+    response = f"Common fish species in the {ocean_data[ocean]['name']}:\n"
+    for fish in fish_list:
+        response += f"- {fish['name']} ({fish['scientific_name']}): {fish['habitat']}, Conservation Status: {fish['conservation_status']}\n"
+    return response
+
+
+def time_per_call(fn, args_list, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for args in args_list:
+            fn(*args)
+    return (time.perf_counter() - start) / (rounds * len(args_list)) * 1e6
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    rounds = int(argv[0]) if argv else 20000
+    bot = ai_bot.ARGOOceanChatbot()
+    ocean_data, fish_species = bot.ocean_data, bot.fish_species
+    oceans = list(ocean_data)
+
+    cases = [
+        ("compare_oceans", [(p,) for p in ai_bot.COMPARABLE],
+         lambda p: legacy_compare_oceans(ocean_data, p), bot.compare_oceans),
+        ("listing branches", [(t,) for t in LISTING_HEADINGS],
+         lambda t: legacy_listing(ocean_data, t), lambda t: bot.responses[None, t]),
+        ("get_general_info", [(o,) for o in oceans],
+         lambda o: legacy_general_info(ocean_data, o), bot.get_general_info),
+        ("get_fish_info", [(o,) for o in oceans],
+         lambda o: legacy_fish_info(ocean_data, fish_species, o), bot.get_fish_info),
+    ]
+
+    start = time.perf_counter()
+    responses = ai_bot.render_responses(ocean_data, fish_species)
+    print(f"{len(responses)} answers prerendered in {(time.perf_counter() - start) * 1e3:.2f} ms; {rounds} rounds")
+    print(f"{'answer':20} {'legacy us':>10} {'cached us':>10} {'speedup':>8} {'mismatches':>11}")
+    for name, args_list, legacy, cached in cases:
+        mismatches = sum(1 for args in args_list if legacy(*args) != cached(*args))
+        legacy_us = time_per_call(legacy, args_list, rounds)
+        cached_us = time_per_call(cached, args_list, rounds)
+        print(f"{name:20} {legacy_us:10.3f} {cached_us:10.3f} {legacy_us / cached_us:7.1f}x {mismatches:11d}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
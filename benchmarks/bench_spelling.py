@@ -0,0 +1,70 @@
+"""Spelling correction cost and regressions for ARGOOceanChatbot.
+
+Run from the repository root:
+
+    python benchmarks/bench_spelling.py [ROUNDS]
+
+Times correct_spelling on typo-laden queries, cold (empty lookup cache) and
+warm, then checks the queries in CASES: typos must still be fixed, and real
+words near a keyword must be left alone, and get the reply they got before
+fuzzy correction. Exits non-zero on any mismatch.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import ai_bot
+
+# (query, corrected query, start of the reply)
+CASES = [
+    ("tempreture in the pasiffic", "temperature in the pacific", "The temperature in the Pacific Ocean"),
+    ("salinaty of the indain ocean", "salinity of the indian ocean", "The salinity in the Indian Ocean"),
+    ("oxigen levels", "oxygen levels", "Comparison of oxygen across oceans"),
+    # Real words one edit from a keyword
+    ("does life exist in the arctic", "does life exist in the arctic", "Information about the Arctic Ocean"),
+    ("why is the ocean so quiet", "why is the ocean so quiet", "I'm not sure I understand"),
+    ("i wish to know about the pacific", "i wish to know about the pacific", "Information about the Pacific Ocean"),
+    ("the far side of the arctic", "the far side of the arctic", "Information about the Arctic Ocean"),
+    ("fish for sale in the atlantic", "fishes for sale in the atlantic", "Common fish species in the Atlantic Ocean"),
+    ("how salty is the indian ocean", "how salty is the indian ocean", "The salinity in the Indian Ocean"),
+    ("a specific fact about the southern ocean", "a specific fact about the southern ocean",
+     "Interesting fact about the Southern Ocean"),
+]
+
+TYPO_QUERIES = [
+    "tempreture in the pasiffic", "salinaty of the indain ocean", "oxigen levels in the atlantik",
+    "curents of the southren ocean", "deapth of the artic", "fihs species in the indain ocean"
+]
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    rounds = int(argv[0]) if argv else 2000
+    bot = ai_bot.ARGOOceanChatbot()
+
+    ai_bot.SPELLING_INDEX._cache.clear()
+    start = time.perf_counter()
+    for query in TYPO_QUERIES:
+        bot.correct_spelling(query)
+    cold_us = (time.perf_counter() - start) / len(TYPO_QUERIES) * 1e6
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for query in TYPO_QUERIES:
+            bot.correct_spelling(query)
+    warm_us = (time.perf_counter() - start) / (rounds * len(TYPO_QUERIES)) * 1e6
+    print(f"correct_spelling: {cold_us:.1f} us cold, {warm_us:.2f} us warm per query")
+
+    mismatches = 0
+    for query, corrected, reply in CASES:
+        got_corrected, got_reply = bot.correct_spelling(query), bot.generate_response(query)
+        if got_corrected != corrected or not got_reply.startswith(reply):
+            mismatches += 1
+            print(f"MISMATCH {query!r}: corrected to {got_corrected!r}, replied {got_reply[:60]!r}")
+    print(f"{len(CASES) - mismatches}/{len(CASES)} regression cases pass")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
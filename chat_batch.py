@@ -0,0 +1,79 @@
+"""Answer large query files with the chatbots, for offline evaluation.
+
+    python chat_batch.py queries.txt --bot simple --workers 8 > answers.jsonl
+
+Reads one query per line and writes one JSON object per line,
+{"query": ..., "response": ...}, in input order. Input is read and output
+written a chunk at a time, so memory stays flat however large the file is.
+"""
+import argparse
+import json
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, tee
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def chunked(iterable, size):
+    """Yield lists of up to size consecutive items"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def respond_in_batches(answer_batch, queries, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield answer_batch's answers to queries, in order, a chunk at a time.
+
+    answer_batch takes a list of queries and returns a list of answers. With
+    workers, chunks are answered in a pool of that many processes, so
+    answer_batch must be a module-level function; at most two chunks per
+    worker are queued or in flight at any time.
+    """
+    chunks = chunked(queries, chunk_size)
+    if not workers:
+        for chunk in chunks:
+            yield from answer_batch(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(answer_batch, chunk))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def main(argv=None):
+    from ai_bot import ARGOOceanChatbot
+    from ai_ocean_bot import AdvancedOceanChatbot
+    bots = {"simple": ARGOOceanChatbot, "advanced": AdvancedOceanChatbot}
+
+    parser = argparse.ArgumentParser(description="Answer a file of queries, one per line, as JSON lines")
+    parser.add_argument("queries", help="file with one query per line, or - for stdin")
+    parser.add_argument("--bot", choices=sorted(bots), default="simple")
+    parser.add_argument("--workers", type=int, default=0, help="worker processes (default: answer in this process)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    f = sys.stdin if args.queries == "-" else open(args.queries, "r", encoding="utf-8")
+    try:
+        # tee only buffers the queries whose chunks are still being answered
+        queries, echoed = tee(line.strip() for line in f if line.strip())
+        responses = bots[args.bot]().generate_responses(queries, args.workers, args.chunk_size)
+        for query, response in zip(echoed, responses):
+            sys.stdout.write(json.dumps({"query": query, "response": response}, ensure_ascii=False) + "\n")
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+from collections import deque
+
+
+class ChatMessage:
+    """One chat turn; plot holds a figure's JSON spec, never a live figure"""
+    __slots__ = ("id", "role", "content", "plot")
+
+    def __init__(self, id, role, content, plot=None):
+        self.id = id
+        self.role = role
+        self.content = content
+        self.plot = plot
+
+
+class ChatHistory:
+    """Chat transcript capped at max_messages; the oldest turns are dropped first.
+
+    Given a session store, the transcript is loaded from it and every new
+    turn is written through to it, so the session survives restarts and can
+    be resumed by any worker.
+    """
+
+    def __init__(self, max_messages=100, store=None, session_id=None):
+        self._messages = deque(maxlen=max_messages)
+        self._next_id = 0
+        self.store = store
+        self.session_id = session_id
+        if store is not None:
+            for seq, role, content, plot in store.history(session_id)[-max_messages:]:
+                self._messages.append(ChatMessage(seq, role, content, plot))
+            self._next_id = store.last_seq(session_id) + 1
+
+    @property
+    def max_messages(self):
+        return self._messages.maxlen
+
+    def append(self, role, content, plot=None):
+        # Ids keep increasing as old turns drop off, so they stay unique per session
+        if self.store is not None:
+            self._next_id = self.store.append(self.session_id, role, content, plot)
+        self._messages.append(ChatMessage(self._next_id, role, content, plot))
+        self._next_id += 1
+
+    def window(self, size):
+        """Return the last size messages, oldest first"""
+        size = min(size, len(self._messages))
+        start = len(self._messages) - size
+        return [self._messages[i] for i in range(start, len(self._messages))]
+
+    def clear(self):
+        self._messages.clear()
+
+    def __len__(self):
+        return len(self._messages)
+
+    def __iter__(self):
+        return iter(self._messages)
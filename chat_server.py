@@ -0,0 +1,408 @@
+"""Asyncio HTTP/WebSocket chat service for the FloatChat bots.
+
+One process hosts any number of conversations with ARGOOceanChatbot
+("simple") and AdvancedOceanChatbot ("advanced"):
+
+    POST /api/chat   {"bot": "simple", "session": "<id or omitted>", "message": "..."}
+                     -> {"session": "<id>", "bot": "simple", "response": "..."}
+    GET  /ws?bot=advanced
+                     WebSocket; every text frame is a message, every reply a text frame.
+                     The conversation lives as long as the connection.
+    GET  /health     -> session and request counters
+
+HTTP conversations are kept in a SessionManager keyed by the session id the
+first reply hands out, with LRU and idle-timeout eviction. With --store, every
+turn is also written to an SQLite session store, so a conversation survives
+eviction and restarts and can be continued by any server sharing the file: both
+turns of an exchange are written before the reply is sent, and the store is
+closed on SIGTERM as well as on Ctrl+C. Turns within one session are
+serialized by a per-session lock; different sessions run concurrently. Response generation runs on a worker pool so that a slow
+query never stalls the event loop, which only does socket I/O.
+
+Run from the repository root (standard library only):
+
+    python chat_server.py [--host 127.0.0.1] [--port 8765] [--workers 4] [--store sessions.sqlite]
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import secrets
+import signal
+import struct
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from ai_bot import ARGOOceanChatbot
+from ai_ocean_bot import AdvancedOceanChatbot
+from session_store import SessionStore, SQLiteBackend
+
+logger = logging.getLogger(__name__)
+
+BOTS = {
+    "simple": ARGOOceanChatbot,
+    "advanced": AdvancedOceanChatbot
+}
+DEFAULT_BOT = "advanced"
+
+MAX_MESSAGE_CHARS = 2000
+MAX_BODY_BYTES = 64 * 1024
+MAX_HEADER_BYTES = 16 * 1024
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+REASONS = {
+    200: "OK", 204: "No Content", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"
+}
+
+
+class Session:
+    """One conversation: a bot instance plus the lock that orders its turns"""
+    __slots__ = ("id", "bot_name", "bot", "lock", "last_seen", "seq")
+
+    def __init__(self, session_id, bot_name):
+        self.id = session_id
+        self.bot_name = bot_name
+        self.bot = BOTS[bot_name]()
+        self.lock = asyncio.Lock()
+        self.last_seen = time.monotonic()
+        # Number of the last stored turn the bot has seen; -1 until it's caught up
+        self.seq = -1
+
+
+class SessionManager:
+    """Sessions by id, least recently used first; idle or surplus sessions are dropped"""
+
+    def __init__(self, max_sessions=10000, idle_seconds=1800, store=None, executor=None):
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.store = store
+        self.executor = executor
+        self._sessions = OrderedDict()
+
+    async def get(self, session_id, bot_name):
+        """Return the session for session_id, or a new one if it's unknown, expired or for another bot.
+
+        A session that's no longer in memory but has turns in the store is
+        resumed under its old id; the bot catches up on its next turn. The
+        store is asked on the executor, so the event loop never waits on it.
+        """
+        session = self._sessions.get(session_id) if session_id else None
+        if session is None and session_id and self.store is not None:
+            last_seq = await asyncio.get_running_loop().run_in_executor(self.executor, self.store.last_seq, session_id)
+            # Another request may have resumed the session while the store was asked
+            session = self._sessions.get(session_id)
+            if session is None and last_seq >= 0:
+                session = Session(session_id, bot_name)
+                self._sessions[session.id] = session
+                self._evict()
+        if session is not None and session.bot_name != bot_name:
+            session = None
+        if session is None:
+            session = Session(secrets.token_urlsafe(12), bot_name)
+            self._sessions[session.id] = session
+            self._evict()
+        else:
+            self._sessions.move_to_end(session.id)
+        session.last_seen = time.monotonic()
+        return session
+
+    def expire(self, now=None):
+        """Drop sessions idle for longer than idle_seconds; return how many were dropped"""
+        cutoff = (now or time.monotonic()) - self.idle_seconds
+        expired = 0
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.last_seen >= cutoff:
+                break
+            del self._sessions[session.id]
+            expired += 1
+        return expired
+
+    def _evict(self):
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class ChatServer:
+    """Serve the bots over HTTP and WebSocket from a single event loop"""
+
+    def __init__(self, workers=4, executor=None, max_sessions=10000, idle_seconds=1800, store=None):
+        self.executor = executor or ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chat")
+        self.store = store
+        self.sessions = SessionManager(max_sessions, idle_seconds, store, self.executor)
+        self.started = time.time()
+        self.requests = 0
+        self.websockets = 0
+
+    async def respond(self, session, message, stored=False):
+        """Generate one reply on the worker pool, one turn at a time per session; stored turns go to the store"""
+        async with session.lock:
+            session.last_seen = time.monotonic()
+            loop = asyncio.get_running_loop()
+            try:
+                if not stored or self.store is None:
+                    return await loop.run_in_executor(self.executor, session.bot.generate_response, message)
+                return await loop.run_in_executor(self.executor, self.stored_turn, session, message)
+            except Exception:
+                logger.exception("Bot %s failed on %r", session.bot_name, message)
+                return "I encountered an error. Please try rephrasing your question."
+
+    def stored_turn(self, session, message):
+        """Answer message with the bot caught up on the stored session, and store both turns"""
+        store = self.store
+        if store.last_seq(session.id) != session.seq and hasattr(session.bot, "restore"):
+            # Resumed, or continued meanwhile by another server
+            session.bot.restore((role, content, data) for _, role, content, data in store.history(session.id))
+        response = session.bot.generate_response(message)
+        history = getattr(session.bot, "conversation_history", None)
+        intent = history[-1].intent if history else None
+        store.append(session.id, "user", message, intent)
+        session.seq = store.append(session.id, "assistant", response, intent)
+        # Both turns go to the store in one write, before the reply is sent, so
+        # the next turn can go to any server
+        store.flush()
+        return response
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        logger.info("Chat server listening on http://%s:%d", host, port)
+        async with server:
+            while True:
+                await asyncio.sleep(60)
+                if self.store is not None:
+                    await asyncio.get_running_loop().run_in_executor(self.executor, self.store.flush)
+                expired = self.sessions.expire()
+                if expired:
+                    logger.info("Expired %d idle sessions", expired)
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, path, query, headers, body = request
+                self.requests += 1
+                if path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+                    await self.handle_websocket(reader, writer, query, headers)
+                    break
+                status, payload = await self.handle_http(method, path, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(http_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except HTTPError as e:
+            writer.write(http_response(e.status, {"error": e.message}, keep_alive=False))
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle_http(self, method, path, body):
+        if method == "OPTIONS":
+            return 204, None
+        if path == "/health":
+            return 200, {
+                "status": "ok",
+                "sessions": len(self.sessions),
+                "websockets": self.websockets,
+                "requests": self.requests,
+                "uptime_s": round(time.time() - self.started, 1)
+            }
+        if path != "/api/chat":
+            return 404, {"error": "not found"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            return 400, {"error": "body must be JSON"}
+        if not isinstance(request, dict):
+            return 400, {"error": "body must be a JSON object"}
+        bot_name = request.get("bot", DEFAULT_BOT)
+        if bot_name not in BOTS:
+            return 400, {"error": f"unknown bot {bot_name!r}; expected one of {sorted(BOTS)}"}
+        message = request.get("message")
+        if not isinstance(message, str) or not message.strip():
+            return 400, {"error": "message must be a non-empty string"}
+
+        session = await self.sessions.get(request.get("session"), bot_name)
+        response = await self.respond(session, message.strip()[:MAX_MESSAGE_CHARS], stored=True)
+        return 200, {"session": session.id, "bot": bot_name, "response": response}
+
+    async def handle_websocket(self, reader, writer, query, headers):
+        bot_name = query.get("bot", [DEFAULT_BOT])[0]
+        key = headers.get("sec-websocket-key")
+        if bot_name not in BOTS or not key:
+            raise HTTPError(400, "bad websocket request")
+
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\n"
+                      "Upgrade: websocket\r\n"
+                      "Connection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+        await writer.drain()
+
+        # Connection-scoped session, never shared or stored in the manager
+        session = Session(secrets.token_urlsafe(12), bot_name)
+        self.websockets += 1
+        try:
+            while True:
+                opcode, payload = await read_frame(reader)
+                if opcode == 0x8:
+                    writer.write(ws_frame(0x8, payload[:2]))
+                    await writer.drain()
+                    break
+                if opcode == 0x9:
+                    writer.write(ws_frame(0xA, payload))
+                elif opcode == 0x1:
+                    message = payload.decode("utf-8", errors="replace").strip()
+                    if message:
+                        response = await self.respond(session, message[:MAX_MESSAGE_CHARS])
+                        writer.write(ws_frame(0x1, response.encode("utf-8")))
+                await writer.drain()
+        finally:
+            self.websockets -= 1
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+async def read_request(reader):
+    """Read one HTTP/1.1 request; return (method, path, query, headers, body) or None at EOF"""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as e:
+        if e.partial.strip():
+            raise HTTPError(400, "incomplete request")
+        return None
+    except asyncio.LimitOverrunError:
+        raise HTTPError(413, "headers too large")
+    if len(head) > MAX_HEADER_BYTES:
+        raise HTTPError(413, "headers too large")
+
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, _ = lines[0].split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "malformed request line")
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", 0) or 0)
+    except ValueError:
+        raise HTTPError(400, "malformed content-length")
+    if length < 0:
+        raise HTTPError(400, "negative content-length")
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, "body too large")
+    body = await reader.readexactly(length) if length else b""
+
+    url = urlsplit(target)
+    return method.upper(), url.path, parse_qs(url.query), headers, body
+
+
+def http_response(status, payload, keep_alive=True):
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    head = [
+        f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+        "Content-Type: application/json",
+        f"Content-Length: {len(body)}",
+        # The chat pages are opened straight from disk, so allow any origin
+        "Access-Control-Allow-Origin: *",
+        "Access-Control-Allow-Methods: GET, POST, OPTIONS",
+        "Access-Control-Allow-Headers: Content-Type",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}"
+    ]
+    return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body
+
+
+async def read_frame(reader):
+    """Read one complete client message as (opcode, payload), joining continuation frames"""
+    opcode, chunks = None, []
+    while True:
+        b0, b1 = await reader.readexactly(2)
+        fin, frame_opcode = b0 & 0x80, b0 & 0x0F
+        length = b1 & 0x7F
+        if length == 126:
+            length, = struct.unpack("!H", await reader.readexactly(2))
+        elif length == 127:
+            length, = struct.unpack("!Q", await reader.readexactly(8))
+        if length > MAX_BODY_BYTES:
+            raise ConnectionError("websocket frame too large")
+        mask = await reader.readexactly(4) if b1 & 0x80 else None
+        data = await reader.readexactly(length)
+        if mask:
+            data = bytes(b ^ mask[i % 4] for i, b in enumerate(data))
+
+        if frame_opcode >= 0x8:
+            # Control frames may arrive between fragments of a message
+            return frame_opcode, data
+        if frame_opcode:
+            opcode = frame_opcode
+        chunks.append(data)
+        if fin:
+            return opcode, b"".join(chunks)
+
+
+def ws_frame(opcode, payload):
+    """Build one unmasked server frame"""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FloatChat HTTP/WebSocket chat service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=4, help="threads generating responses")
+    parser.add_argument("--max-sessions", type=int, default=10000)
+    parser.add_argument("--idle-seconds", type=int, default=1800, help="drop HTTP sessions idle this long")
+    parser.add_argument("--store", help="SQLite file to keep HTTP conversations in, shareable between servers")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    store = SessionStore(SQLiteBackend(args.store), validate=True) if args.store else None
+    server = ChatServer(args.workers, max_sessions=args.max_sessions, idle_seconds=args.idle_seconds, store=store)
+    # A process manager stops the server with SIGTERM; shut down as for Ctrl+C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if store is not None:
+            # Let running turns finish writing before the store goes away
+            server.executor.shutdown(wait=True)
+            store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
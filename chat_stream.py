@@ -0,0 +1,25 @@
+"""Deliver chatbot replies a word at a time, so they can be shown as they arrive."""
+import re
+import sys
+
+# A word with the whitespace before it, so the chunks join back into the original text
+CHUNK_PATTERN = re.compile(r"\s*\S+|\s+$")
+
+
+def text_chunks(text):
+    """Yield text a word at a time"""
+    for match in CHUNK_PATTERN.finditer(text):
+        yield match.group()
+
+
+def print_stream(prefix, chunks, file=None):
+    """Print prefix, then each chunk as soon as it arrives; return the whole text"""
+    file = file or sys.stdout
+    file.write(prefix)
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        file.write(chunk)
+        file.flush()
+    file.write("\n")
+    return "".join(parts)
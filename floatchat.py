@@ -2,10 +2,24 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 import numpy as np
-from datetime import datetime, timedelta
+import os
 import re
 import random
+import secrets
+
+from argo_cache import dataset_cache, figure_cache
+from argo_cube import AggregateCube
+from argo_derived import mixed_layer_depth, with_derived
+from argo_floats import FloatTrajectories
+from argo_profiles import ProfileSet
+from argo_index import SpatialIndex
+from argo_ingest import GrowingArray, watch
+from argo_plot import scatter_geo
+from argo_store import ArgoStore
+from chat_history import ChatHistory
+from session_store import shared_store
 
 # Set page configuration
 st.set_page_config(
@@ -53,172 +67,607 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Initialize session state for chat history
+MAX_MESSAGES = 100  # retained per session
+VISIBLE_MESSAGES = 10  # rendered per rerun, until "Show earlier messages" is clicked
+
+# With FLOATCHAT_SESSIONS=path.sqlite, chats are stored there and resumed from the
+# ?session= URL parameter, by this or any other FloatChat worker
+SESSION_STORE_PATH = os.environ.get("FLOATCHAT_SESSIONS")
+
 if "messages" not in st.session_state:
-    st.session_state.messages = []
-if "argo_data" not in st.session_state:
-    st.session_state.argo_data = None
+    if SESSION_STORE_PATH:
+        if "session" not in st.query_params:
+            st.query_params["session"] = secrets.token_urlsafe(12)
+        st.session_state.messages = ChatHistory(MAX_MESSAGES, shared_store(SESSION_STORE_PATH, validate=True),
+                                                st.query_params["session"])
+    else:
+        st.session_state.messages = ChatHistory(MAX_MESSAGES)
+if "visible_messages" not in st.session_state:
+    st.session_state.visible_messages = VISIBLE_MESSAGES
+
+# Mock data for different ocean regions
+MOCK_REGIONS = {
+    "North Atlantic": {"lat_range": (20, 45), "lon_range": (-75, -15), "temp_range": (5, 25), "salinity_range": (34.5, 37.5)},
+    "South Atlantic": {"lat_range": (-45, -20), "lon_range": (-50, 15), "temp_range": (2, 20), "salinity_range": (34, 36.5)},
+    "North Pacific": {"lat_range": (20, 45), "lon_range": (120, 180), "temp_range": (5, 28), "salinity_range": (33.5, 36)},
+    "South Pacific": {"lat_range": (-45, -20), "lon_range": (150, 250), "temp_range": (3, 22), "salinity_range": (34, 36.5)},
+    "Indian Ocean": {"lat_range": (-35, 20), "lon_range": (40, 120), "temp_range": (10, 30), "salinity_range": (34.5, 36.5)},
+    "Arctic Ocean": {"lat_range": (70, 85), "lon_range": (-180, 180), "temp_range": (-2, 5), "salinity_range": (28, 32)},
+    "Southern Ocean": {"lat_range": (-75, -45), "lon_range": (-180, 180), "temp_range": (-2, 5), "salinity_range": (33.5, 34.5)}
+}
 
 # Generate mock ARGO data
-def generate_mock_argo_data():
+def generate_mock_argo_data(seed=None, floats_per_region=5, days=1825, interval_days=30):
+    """Generate a mock ARGO dataset, filling each region x date x float block as column arrays"""
+    rng = np.random.default_rng(seed)
+    
     # Create dates for the past 5 years
-    dates = [datetime.now() - timedelta(days=i) for i in range(0, 1825, 30)]
-    
-    # Create mock data for different ocean regions
-    regions = {
-        "North Atlantic": {"lat_range": (20, 45), "lon_range": (-75, -15), "temp_range": (5, 25), "salinity_range": (34.5, 37.5)},
-        "South Atlantic": {"lat_range": (-45, -20), "lon_range": (-50, 15), "temp_range": (2, 20), "salinity_range": (34, 36.5)},
-        "North Pacific": {"lat_range": (20, 45), "lon_range": (120, 180), "temp_range": (5, 28), "salinity_range": (33.5, 36)},
-        "South Pacific": {"lat_range": (-45, -20), "lon_range": (150, 250), "temp_range": (3, 22), "salinity_range": (34, 36.5)},
-        "Indian Ocean": {"lat_range": (-35, 20), "lon_range": (40, 120), "temp_range": (10, 30), "salinity_range": (34.5, 36.5)},
-        "Arctic Ocean": {"lat_range": (70, 85), "lon_range": (-180, 180), "temp_range": (-2, 5), "salinity_range": (28, 32)},
-        "Southern Ocean": {"lat_range": (-75, -45), "lon_range": (-180, 180), "temp_range": (-2, 5), "salinity_range": (33.5, 34.5)}
-    }
+    dates = (pd.Timestamp.now() - pd.to_timedelta(np.arange(0, days, interval_days), unit="D")).values
+    
+    region_names = list(MOCK_REGIONS)
+    n_regions, n_dates = len(region_names), len(dates)
+    block = n_dates * floats_per_region  # rows per region
+    n_rows = n_regions * block
     
-    data = []
-    for region, params in regions.items():
-        for date in dates:
-            for _ in range(5):  # 5 floats per region per month
-                lat = random.uniform(*params["lat_range"])
-                lon = random.uniform(*params["lon_range"])
-                temp = random.uniform(*params["temp_range"])
-                salinity = random.uniform(*params["salinity_range"])
-                pressure = random.uniform(0, 2000)  # Depth in decibars
-                
-                data.append({
-                    "date": date,
-                    "region": region,
-                    "latitude": lat,
-                    "longitude": lon,
-                    "temperature": temp,
-                    "salinity": salinity,
-                    "pressure": pressure,
-                    "float_id": f"ARGO_{region[:3].upper()}_{random.randint(1000, 9999)}"
-                })
-    
-    return pd.DataFrame(data)
+    # Row layout is region-major, then date, then float
+    region_codes = np.repeat(np.arange(n_regions, dtype=np.int8), block)
+    date_index = np.tile(np.repeat(np.arange(n_dates), floats_per_region), n_regions)
+    
+    # Per-row sampling bounds, looked up from the region of each row
+    def bounds(key):
+        low = np.array([MOCK_REGIONS[r][key][0] for r in region_names], dtype=np.float64)
+        high = np.array([MOCK_REGIONS[r][key][1] for r in region_names], dtype=np.float64)
+        return low[region_codes], high[region_codes]
+    
+    def uniform(low, high):
+        return rng.uniform(low, high, size=n_rows).astype(np.float32)
+    
+    # Float IDs look like ARGO_NOR_1234; build categories once instead of one string per row.
+    # Each float keeps its ID for every date; regions sharing a prefix (e.g. North
+    # Atlantic / North Pacific) draw from one ID space without repeats. The space is
+    # 1000-9999 unless the fleet needs more, in which case the numbers get wider
+    prefixes = list(dict.fromkeys(r[:3].upper() for r in region_names))
+    id_categories = []
+    float_codes = np.empty((n_regions, floats_per_region), dtype=np.int32)
+    for prefix in prefixes:
+        members = [r for r, name in enumerate(region_names) if name[:3].upper() == prefix]
+        needed = len(members) * floats_per_region
+        space = max(9000, needed)
+        drawn = rng.choice(space, size=needed, replace=False)
+        float_codes[members] = len(id_categories) + drawn.reshape(len(members), floats_per_region)
+        id_categories += [f"ARGO_{prefix}_{n}" for n in range(1000, 1000 + space)]
+    id_codes = np.broadcast_to(float_codes[:, None, :], (n_regions, n_dates, floats_per_region)).ravel()
+    float_id = pd.Categorical.from_codes(id_codes, categories=id_categories).remove_unused_categories()
+    
+    # Floats drift: a random walk from a random start, kept inside the region
+    def drift(key, step_degrees):
+        low = np.array([MOCK_REGIONS[r][key][0] for r in region_names], dtype=np.float64)[:, None, None]
+        high = np.array([MOCK_REGIONS[r][key][1] for r in region_names], dtype=np.float64)[:, None, None]
+        start = rng.uniform(low, high, size=(n_regions, 1, floats_per_region))
+        steps = rng.normal(0, step_degrees, size=(n_regions, n_dates, floats_per_region))
+        return np.clip(start + np.cumsum(steps, axis=1), low, high).astype(np.float32).ravel()
+    
+    return pd.DataFrame({
+        "date": dates[date_index],
+        "region": pd.Categorical.from_codes(region_codes, categories=region_names),
+        "latitude": drift("lat_range", 0.5),
+        "longitude": drift("lon_range", 0.5),
+        "temperature": uniform(*bounds("temp_range")),
+        "salinity": uniform(*bounds("salinity_range")),
+        "pressure": uniform(0, 2000),  # Depth in decibars
+        "float_id": float_id
+    })
 
-# Process user query
-def process_query(query):
+# Mock vertical profiles: one cast per row, from its surface temperature and salinity
+# through a mixed layer and a thermocline/halocline to deep-water values
+CAST_COLUMNS = ["date", "float_id", "region", "latitude", "longitude"]
+PROFILE_LEVEL_VARIABLES = ("pressure", "temperature", "salinity", "potential_temperature", "sigma_theta")
+DEEP_TEMPERATURE = 2.0
+DEEP_SALINITY = 34.7
+
+# Every cast's random draws are hashed from its row number rather than drawn in
+# sequence, so a cast depends only on its own row: appending rows leaves the
+# casts of earlier ones as they were
+MAX_LEVEL_KEYS = 128
+
+def hashed_bits(keys, stream, seed=0):
+    """64 random bits per uint64 key, a fixed function of (seed, stream, key) (splitmix64)"""
+    salt = ((seed * MAX_LEVEL_KEYS + stream + 1) * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+    h = np.asarray(keys, dtype=np.uint64) + np.uint64(salt)
+    h = (h ^ (h >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return h ^ (h >> np.uint64(31))
+
+def hashed_uniforms(keys, stream, seed=0):
+    """Two U[0, 1) per key, from the high and low 32 bits of hashed_bits"""
+    h = hashed_bits(keys, stream, seed)
+    return (h >> np.uint64(32)).astype(np.float64) * 2.0 ** -32, (h & np.uint64(0xFFFFFFFF)).astype(np.float64) * 2.0 ** -32
+
+def generate_mock_profiles(df, seed=0, levels=(40, 80), max_pressure=(1000, 2000), start=0):
+    """Generate a cast for every row of df, as a ProfileSet, with no per-cast loop.
+    
+    df's rows are numbered from start; generating the rows of a frame a batch
+    at a time gives the same casts as generating them all at once.
+    """
+    n_casts = len(df)
+    rows = np.arange(start, start + n_casts, dtype=np.uint64)
+    
+    def uniform(low, high, u):
+        return low + (high - low) * u
+    
+    u_count, u_bottom = hashed_uniforms(rows, 0, seed)
+    u_mixed, u_thermocline = hashed_uniforms(rows, 1, seed)
+    u_halocline, _ = hashed_uniforms(rows, 4, seed)
+    counts = np.floor(uniform(levels[0], levels[1] + 1, u_count)).astype(np.int64)
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    cast = np.repeat(np.arange(n_casts), counts)
+    level_keys = rows[cast] * np.uint64(MAX_LEVEL_KEYS) + (np.arange(len(cast)) - offsets[cast]).astype(np.uint64)
+    u_order, u_radius = hashed_uniforms(level_keys, 2, seed)
+    
+    # Sorting cast + U(0, 1) orders levels within each cast; squaring packs them near the surface
+    fraction = np.sort(cast + u_order) - cast
+    bottom = uniform(*max_pressure, u_bottom)
+    pressure = 2.0 + fraction ** 2 * (bottom[cast] - 2.0)
+    
+    # Two independent standard normals per level (Box-Muller)
+    radius = np.sqrt(-2.0 * np.log1p(-u_radius))
+    angle = 2 * np.pi * (hashed_bits(level_keys, 3, seed) >> np.uint64(11)).astype(np.float64) * 2.0 ** -53
+    
+    surface_temperature = df["temperature"].to_numpy(dtype=np.float64)
+    surface_salinity = df["salinity"].to_numpy(dtype=np.float64)
+    # Well mixed down to the mixed-layer depth, then decaying towards the deep values
+    below_mixed_layer = np.maximum(pressure - uniform(20, 150, u_mixed)[cast], 0)
+    thermocline = uniform(150, 600, u_thermocline)[cast]
+    halocline = uniform(100, 400, u_halocline)[cast]
+    temperature = (DEEP_TEMPERATURE + (surface_temperature[cast] - DEEP_TEMPERATURE)
+                   * np.exp(-below_mixed_layer / thermocline) + 0.005 * radius * np.cos(angle))
+    salinity = (DEEP_SALINITY + (surface_salinity[cast] - DEEP_SALINITY)
+                * np.exp(-below_mixed_layer / halocline) + 0.001 * radius * np.sin(angle))
+    
+    return ProfileSet(df[CAST_COLUMNS], offsets, pressure, temperature, salinity)
+
+class IngestedProfiles:
+    """Keeps the profiles of an ingested dataset current for the ingester to publish.
+    
+    Casts are synthesized, given derived variables and mixed-layer depths for
+    each batch only, and appended to growing arrays: thanks to the row-hashed
+    draws that's the same as generating the whole frame's profiles again, at
+    the cost of the batch. The derived profiles are published as "profiles"
+    too, since they hold everything the plain ones do.
+    """
+    
+    def start(self, df):
+        profiles = with_derived(generate_mock_profiles(df))
+        self._offsets = GrowingArray(profiles.offsets)
+        self._levels = {name: GrowingArray(profiles.values(name)) for name in PROFILE_LEVEL_VARIABLES}
+        self._depth = GrowingArray(mixed_layer_depth(profiles))
+        return self._published(df, profiles.offsets, {name: profiles.values(name) for name in self._levels},
+                               self._depth.view())
+    
+    def extend(self, df, rows):
+        start = len(df) - rows
+        batch = with_derived(generate_mock_profiles(df.iloc[start:], start=start))
+        offsets = self._offsets.append(batch.offsets[1:] + self._offsets.view()[-1])
+        levels = {name: array.append(batch.values(name)) for name, array in self._levels.items()}
+        return self._published(df, offsets, levels, self._depth.append(mixed_layer_depth(batch)))
+    
+    @staticmethod
+    def _published(df, offsets, levels, depth):
+        profiles = ProfileSet(df[CAST_COLUMNS], offsets, levels.pop("pressure"), levels.pop("temperature"),
+                              levels.pop("salinity"), levels)
+        return {"profiles": profiles, "derived_profiles": profiles, "mixed_layer_depth": depth}
+
+# Load the shared ARGO dataset, from an on-disk store when FLOATCHAT_STORE is set
+ARGO_STORE_PATH = os.environ.get("FLOATCHAT_STORE")
+DEFAULT_DATASET = ARGO_STORE_PATH or "mock"
+
+def load_argo_data():
+    """Load ARGO rows from the configured store (memory-mapped), or generate mock data"""
+    if ARGO_STORE_PATH:
+        return ArgoStore(ARGO_STORE_PATH).load()
+    return generate_mock_argo_data()
+
+# With FLOATCHAT_INGEST=dir, CSV batches dropped into dir are appended to the live
+# dataset (and written to the store, if there is one) as they arrive
+INGEST_DIR = os.environ.get("FLOATCHAT_INGEST")
+if INGEST_DIR:
+    watch(dataset_cache, DEFAULT_DATASET, load_argo_data, INGEST_DIR, store_root=ARGO_STORE_PATH,
+          extensions=[IngestedProfiles()])
+
+def get_argo_dataset():
+    """Return the CachedDataset of the process-wide ARGO dataset: its current frame and version"""
+    return dataset_cache.get(DEFAULT_DATASET, load_argo_data, pinned=True)
+
+def get_argo_data():
+    """Return the process-wide ARGO dataset.
+
+    The frame is shared by every session and must be treated as read-only.
+    """
+    return get_argo_dataset().data
+
+def get_derived(name, build, primary=None):
+    """Return build(dataset) for one version of the dataset (the current one by default), built once per version.
+
+    Derived structures are cache entries keyed on the primary's version and
+    pinned while it's current: the profile products alone outgrow the cache
+    budget at a few hundred thousand rows, and evicting them would rebuild
+    them on every query. A new version of the dataset drops them. Structures
+    built from other derived ones pass primary on, so every part comes from
+    the same version.
+    """
+    if primary is None:
+        primary = get_argo_dataset()
+    return dataset_cache.get((DEFAULT_DATASET, primary.version, name), lambda: build(primary.data), pinned=True).data
+
+def get_argo_cube():
+    """Return the region x month aggregate cube for the current dataset"""
+    return get_derived("cube", AggregateCube.from_frame)
+
+def get_argo_index(primary=None):
+    """Return the spatio-temporal index for the current dataset, or for primary's version"""
+    return get_derived("index", SpatialIndex, primary)
+
+def get_float_trajectories():
+    """Return the per-float trajectory store for the current dataset (published by the ingester when there is one)"""
+    return get_derived("floats", FloatTrajectories)
+
+# Neither the mock data nor the store keep casts yet, so profiles are generated
+# from each row's surface values. Outside mock mode that has to be said
+SYNTHETIC_PROFILES_NOTE = (" These profiles are synthesized from each report's surface temperature and salinity;"
+                           " the data doesn't include measured casts yet.")
+PROFILE_NOTE = SYNTHETIC_PROFILES_NOTE if ARGO_STORE_PATH or INGEST_DIR else ""
+
+def get_argo_profiles(primary=None):
+    """Return the vertical profiles for the current dataset, or for primary's version (synthesized; see PROFILE_NOTE)"""
+    return get_derived("profiles", generate_mock_profiles, primary)
+
+def get_derived_profiles(primary=None):
+    """Return the profiles with potential temperature and density (sigma-theta) at every level"""
+    if primary is None:
+        primary = get_argo_dataset()
+    return get_derived("derived_profiles", lambda df: with_derived(get_argo_profiles(primary)), primary)
+
+def get_mixed_layer_depth(primary=None):
+    """Return the mixed-layer depth (dbar) of every cast, aligned with the profiles' casts"""
+    if primary is None:
+        primary = get_argo_dataset()
+    return get_derived("mixed_layer_depth", lambda df: mixed_layer_depth(get_derived_profiles(primary)), primary)
+
+# "floats near 35.5, -40" style queries
+NEAR_PATTERN = re.compile(r"near\s+(-?\d+(?:\.\d+)?)(?:\s*,\s*|\s+)(-?\d+(?:\.\d+)?)")
+NEAR_RADIUS_KM = 500
+
+# T-S diagrams plot the profiles of this many recent days
+PROFILE_DAYS = 90
+
+# Region keywords understood in queries, with the name used in replies
+REGION_KEYWORDS = {
+    "atlantic": "Atlantic Ocean",
+    "pacific": "Pacific Ocean",
+    "indian": "Indian Ocean",
+    "arctic": "Arctic Ocean",
+    "southern": "Southern Ocean"
+}
+
+GREETING_REPLY = "Hello! I'm FloatChat, your ARGO ocean data assistant. How can I help you explore ocean data today?"
+BAD_LOCATION_REPLY = "{0}, {1} isn't a position on Earth: latitude runs from -90 to 90 and longitude from -180 to 180."
+DEFAULT_REPLY = "I can help you explore ARGO ocean data. Try asking about temperature, salinity, or specific ocean regions. For example, you could ask 'Show me temperature trends in the Atlantic Ocean' or 'What is the current salinity in the Pacific?'"
+
+# Figure builders: each returns (reply text, figure or None)
+def build_near_figure(lat, lon):
+    nearby = get_argo_index().near(lat, lon, radius_km=NEAR_RADIUS_KM)
+    if nearby.empty:
+        return f"No ARGO measurements found within {NEAR_RADIUS_KM} km of {lat}, {lon}.", None
+    
+    fig = scatter_geo(nearby, color='temperature', hover_name='float_id',
+                     hover_data=['date', 'distance_km'],
+                     title=f'ARGO Measurements within {NEAR_RADIUS_KM} km of {lat}, {lon}')
+    return f"Found {len(nearby)} measurements within {NEAR_RADIUS_KM} km of {lat}, {lon}:", fig
+
+def build_temperature_trend_figure():
+    yearly_avg = get_argo_cube().stats('temperature', by='year')
+    
+    fig = px.line(yearly_avg, x="year", y="temperature", color="region", 
+                 title="Ocean Temperature Trends by Region (2018-2023)")
+    return "Here's the ocean temperature trend by region over the past 5 years:", fig
+
+def build_temperature_map_figure():
+    recent_data = get_argo_index().recent(days=30)
+    
+    fig = scatter_geo(recent_data, color='temperature', hover_name='region',
+                     color_continuous_scale='thermal',
+                     title='Recent Ocean Temperature Measurements')
+    return "Here are recent ocean temperature measurements from ARGO floats:", fig
+
+def build_salinity_map_figure():
+    recent_data = get_argo_index().recent(days=30)
+    
+    fig = scatter_geo(recent_data, color='salinity', hover_name='region',
+                     color_continuous_scale='haline',
+                     title='Recent Ocean Salinity Measurements')
+    return "Here are recent ocean salinity measurements from ARGO floats:", fig
+
+def build_region_map_figure(key):
+    region = REGION_KEYWORDS[key]
+    index = get_argo_index()
+    recent_data = index.query(regions=index.regions_matching(key), days=30)
+    
+    fig = scatter_geo(recent_data, color='temperature', hover_name='float_id',
+                     title=f'Recent ARGO Float Measurements in {region}')
+    return f"Here are recent measurements from the {region}:", fig
+
+def build_float_figure(selected_float):
+    float_data = get_float_trajectories().history(selected_float)
+    
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=float_data['date'], y=float_data['temperature'], 
+                           name='Temperature', line=dict(color='red')))
+    fig.add_trace(go.Scatter(x=float_data['date'], y=float_data['salinity'], 
+                           name='Salinity', line=dict(color='blue'), yaxis='y2'))
+    
+    fig.update_layout(
+        title=f'Measurements from ARGO Float {selected_float}',
+        xaxis=dict(title='Date'),
+        yaxis=dict(title='Temperature (°C)', side='left', color='red'),
+        yaxis2=dict(title='Salinity (PSU)', side='right', overlaying='y', color='blue'),
+        hovermode='x unified'
+    )
+    return f"Here's data from ARGO float {selected_float}:", fig
+
+# Profile variables that can be drawn as sections: (name in replies, axis label, colour scale)
+SECTION_VARIABLES = {
+    "temperature": ("temperature", "Temperature (°C)", "thermal"),
+    "potential_temperature": ("potential temperature", "Potential Temperature (°C)", "thermal"),
+    "sigma_theta": ("potential density", "Potential Density σθ (kg/m³ - 1000)", "dense")
+}
+
+def profile_casts(primary, key, days=None):
+    """Casts of primary's version in the regions matching a region keyword (all of them for None),
+    optionally from the last N days"""
+    regions = get_argo_index(primary).regions_matching(key) if key else None
+    return get_argo_profiles(primary).select(regions=regions, days=days)
+
+def build_depth_section_figure(key=None, variable="temperature"):
+    name = REGION_KEYWORDS[key] if key else "All Oceans"
+    where = f"the {name}" if key else "all oceans"
+    label, axis_title, colorscale = SECTION_VARIABLES[variable]
+    primary = get_argo_dataset()
+    latitude, levels, means = get_derived_profiles(primary).section(profile_casts(primary, key), variable)
+    
+    fig = go.Figure(go.Heatmap(x=latitude, y=levels, z=means, colorscale=colorscale,
+                               colorbar=dict(title=axis_title)))
+    fig.update_layout(
+        title=f'Mean {label.title()} Section by Latitude, {name}',
+        xaxis=dict(title='Latitude'),
+        yaxis=dict(title='Pressure (dbar)', autorange='reversed')
+    )
+    return f"Here's the mean {label} by latitude and depth across {where}:{PROFILE_NOTE}", fig
+
+def build_mixed_layer_figure(key=None):
+    name = REGION_KEYWORDS[key] if key else "All Oceans"
+    where = f"the {name}" if key else "all oceans"
+    primary = get_argo_dataset()
+    casts = profile_casts(primary, key, days=PROFILE_DAYS)
+    recent = get_argo_profiles(primary).casts.iloc[casts].assign(
+        mixed_layer_depth=get_mixed_layer_depth(primary)[casts])
+    recent = recent.dropna(subset=['mixed_layer_depth'])
+    
+    fig = scatter_geo(recent, color='mixed_layer_depth', hover_name='float_id', hover_data=['date'],
+                     color_continuous_scale='deep',
+                     title=f'Mixed-Layer Depth (dbar), {name} (last {PROFILE_DAYS} days)')
+    summary = f" (median {recent['mixed_layer_depth'].median():.0f} dbar)" if len(recent) else ""
+    return f"Here's the mixed-layer depth of recent profiles across {where}{summary}:{PROFILE_NOTE}", fig
+
+def build_ts_diagram_figure(key=None):
+    name = REGION_KEYWORDS[key] if key else "All Oceans"
+    where = f"the {name}" if key else "all oceans"
+    primary = get_argo_dataset()
+    points = get_argo_profiles(primary).ts_points(profile_casts(primary, key, days=PROFILE_DAYS))
+    
+    fig = px.scatter(points, x='salinity', y='temperature', color='pressure',
+                    color_continuous_scale='deep', labels={'salinity': 'Salinity (PSU)',
+                                                           'temperature': 'Temperature (°C)',
+                                                           'pressure': 'Pressure (dbar)'},
+                    title=f'T-S Diagram, {name} (last {PROFILE_DAYS} days)')
+    return (f"Here's the temperature-salinity diagram for {where} from the last {PROFILE_DAYS} days of profiles:"
+            f"{PROFILE_NOTE}"), fig
+
+def build_overview_map_figure():
+    latest = get_float_trajectories().latest()
+    
+    fig = scatter_geo(latest, color='region', hover_name='float_id', hover_data=['date'],
+                     title='Latest ARGO Float Locations')
+    return "", fig
+
+def build_region_average_figure(variable):
+    region_avg = get_argo_cube().stats(variable)
+    
+    fig = px.bar(region_avg, x='region', y=variable, 
+                title=f'Average {variable.title()} by Ocean Region')
+    return "", fig
+
+FIGURE_BUILDERS = {
+    "near": build_near_figure,
+    "temperature_trend": build_temperature_trend_figure,
+    "temperature_map": build_temperature_map_figure,
+    "salinity_map": build_salinity_map_figure,
+    "region_map": build_region_map_figure,
+    "float": build_float_figure,
+    "depth_section": build_depth_section_figure,
+    "ts_diagram": build_ts_diagram_figure,
+    "mixed_layer": build_mixed_layer_figure,
+    "overview_map": build_overview_map_figure,
+    "region_average": build_region_average_figure
+}
+
+def get_dataset_version():
+    """Version of the shared dataset; bumps whenever it is (re)loaded"""
+    return get_argo_dataset().version
+
+def cached_figure(intent, params=()):
+    """Return (reply text, figure JSON or None), building it only once per dataset version"""
+    def build():
+        content, fig = FIGURE_BUILDERS[intent](*params)
+        return content, fig.to_json() if fig is not None else None
+    
+    return figure_cache.get_or_build(intent, params, get_dataset_version(), build)
+
+# Shown while a figure that isn't cached yet is being built
+PENDING_REPLIES = {
+    "near": "Searching for ARGO measurements within {radius} km of {0}, {1}...",
+    "temperature_trend": "Computing the temperature trend for each region...",
+    "temperature_map": "Plotting recent temperature measurements...",
+    "salinity_map": "Plotting recent salinity measurements...",
+    "region_map": "Plotting recent measurements from the {region}...",
+    "float": "Loading the measurements of ARGO float {0}...",
+    "depth_section": "Interpolating {where} profiles onto standard pressure levels...",
+    "ts_diagram": "Interpolating recent {where} profiles onto standard pressure levels...",
+    "mixed_layer": "Computing mixed-layer depths from recent {where} profiles..."
+}
+
+def figure_from_spec(spec):
+    """Rebuild a Plotly figure from its cached JSON spec"""
+    return pio.from_json(spec)
+
+# Phrases for the profile intents. Routing is a short cascade of substring
+# checks, which is faster than a compiled matcher for this few keywords; one
+# regex over all the profile phrases lets most queries skip those checks
+TS_DIAGRAM_WORDS = ["t-s", "ts diagram", "t/s", "temperature-salinity", "water mass"]
+MIXED_LAYER_WORDS = ["mixed layer", "mld"]
+# Only explicit phrases: plain "depth" or "profile" turn up in questions about other things
+SECTION_WORDS = ["section", "depth profile", "vertical profile", "profile of", "profiles of",
+                 "temperature profile", "density profile"]
+PROFILE_PATTERN = re.compile("|".join(map(re.escape, TS_DIAGRAM_WORDS + MIXED_LAYER_WORDS + SECTION_WORDS)))
+
+# Normalize a user query into an intent and its parameters
+def route_query(query):
     query = query.lower()
-    response = {"type": "text", "content": "", "data": None}
     
     # Check for greetings
     if any(word in query for word in ["hello", "hi", "hey", "greetings"]):
-        response["content"] = "Hello! I'm FloatChat, your ARGO ocean data assistant. How can I help you explore ocean data today?"
-        return response
+        return "greeting", ()
+    
+    # Check for nearby float queries
+    near = NEAR_PATTERN.search(query)
+    if near:
+        lat, lon = float(near.group(1)), float(near.group(2))
+        if abs(lat) > 90 or abs(lon) > 180:
+            return "bad_location", (lat, lon)
+        return "near", (lat, lon)
+    
+    # Check for vertical profile queries, before the temperature and salinity ones they overlap
+    if PROFILE_PATTERN.search(query):
+        region = next((key for key in REGION_KEYWORDS if key in query), None)
+        if any(word in query for word in TS_DIAGRAM_WORDS):
+            return "ts_diagram", (region,)
+        if any(word in query for word in MIXED_LAYER_WORDS):
+            return "mixed_layer", (region,)
+        if "density" in query or "sigma" in query:
+            return "depth_section", (region, "sigma_theta")
+        if "potential temperature" in query or "theta" in query:
+            return "depth_section", (region, "potential_temperature")
+        return "depth_section", (region, "temperature")
     
     # Check for temperature queries
     if "temperature" in query:
         if "trend" in query or "change" in query:
-            # Generate temperature trend data
-            df = st.session_state.argo_data
-            df['year'] = df['date'].dt.year
-            yearly_avg = df.groupby(['region', 'year'])['temperature'].mean().reset_index()
-            
-            fig = px.line(yearly_avg, x="year", y="temperature", color="region", 
-                         title="Ocean Temperature Trends by Region (2018-2023)")
-            response["type"] = "plot"
-            response["content"] = "Here's the ocean temperature trend by region over the past 5 years:"
-            response["data"] = fig
-        else:
-            # Show current temperature map
-            df = st.session_state.argo_data
-            recent_data = df[df['date'] > datetime.now() - timedelta(days=30)]
-            
-            fig = px.scatter_geo(recent_data, lat='latitude', lon='longitude', 
-                                color='temperature', hover_name='region',
-                                color_continuous_scale='thermal',
-                                title='Recent Ocean Temperature Measurements')
-            fig.update_geos(showcoastlines=True, coastlinecolor="Black",
-                           showland=True, landcolor="lightgray")
-            response["type"] = "plot"
-            response["content"] = "Here are recent ocean temperature measurements from ARGO floats:"
-            response["data"] = fig
+            return "temperature_trend", ()
+        return "temperature_map", ()
     
     # Check for salinity queries
-    elif "salinity" in query:
-        df = st.session_state.argo_data
-        recent_data = df[df['date'] > datetime.now() - timedelta(days=30)]
-        
-        fig = px.scatter_geo(recent_data, lat='latitude', lon='longitude', 
-                            color='salinity', hover_name='region',
-                            color_continuous_scale='haline',
-                            title='Recent Ocean Salinity Measurements')
-        fig.update_geos(showcoastlines=True, coastlinecolor="Black",
-                       showland=True, landcolor="lightgray")
-        response["type"] = "plot"
-        response["content"] = "Here are recent ocean salinity measurements from ARGO floats:"
-        response["data"] = fig
+    if "salinity" in query:
+        return "salinity_map", ()
     
     # Check for location-specific queries
-    elif any(region.lower() in query for region in ["atlantic", "pacific", "indian", "arctic", "southern"]):
-        region_map = {
-            "atlantic": "Atlantic Ocean",
-            "pacific": "Pacific Ocean",
-            "indian": "Indian Ocean",
-            "arctic": "Arctic Ocean",
-            "southern": "Southern Ocean"
-        }
-        
-        for key, region in region_map.items():
-            if key in query:
-                df = st.session_state.argo_data
-                region_data = df[df['region'] == region]
-                
-                if "temperature" in query:
-                    fig = px.scatter(region_data, x='date', y='temperature', 
-                                   color='latitude', title=f'Temperature Measurements in {region}')
-                    response["type"] = "plot"
-                    response["content"] = f"Here are temperature measurements from the {region}:"
-                    response["data"] = fig
-                elif "salinity" in query:
-                    fig = px.scatter(region_data, x='date', y='salinity', 
-                                   color='latitude', title=f'Salinity Measurements in {region}')
-                    response["type"] = "plot"
-                    response["content"] = f"Here are salinity measurements from the {region}:"
-                    response["data"] = fig
-                else:
-                    recent_data = region_data[region_data['date'] > datetime.now() - timedelta(days=30)]
-                    fig = px.scatter_geo(recent_data, lat='latitude', lon='longitude', 
-                                        color='temperature', hover_name='float_id',
-                                        title=f'Recent ARGO Float Measurements in {region}')
-                    fig.update_geos(showcoastlines=True, coastlinecolor="Black",
-                                   showland=True, landcolor="lightgray")
-                    response["type"] = "plot"
-                    response["content"] = f"Here are recent measurements from the {region}:"
-                    response["data"] = fig
-                break
+    for key in REGION_KEYWORDS:
+        if key in query:
+            return "region_map", (key,)
     
     # Check for float information
-    elif "float" in query or "argo" in query:
-        df = st.session_state.argo_data
-        float_ids = df['float_id'].unique()
-        selected_float = random.choice(float_ids)
-        float_data = df[df['float_id'] == selected_float]
-        
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=float_data['date'], y=float_data['temperature'], 
-                               name='Temperature', line=dict(color='red')))
-        fig.add_trace(go.Scatter(x=float_data['date'], y=float_data['salinity'], 
-                               name='Salinity', line=dict(color='blue'), yaxis='y2'))
-        
-        fig.update_layout(
-            title=f'Measurements from ARGO Float {selected_float}',
-            xaxis=dict(title='Date'),
-            yaxis=dict(title='Temperature (°C)', side='left', color='red'),
-            yaxis2=dict(title='Salinity (PSU)', side='right', overlaying='y', color='blue'),
-            hovermode='x unified'
-        )
-        
-        response["type"] = "plot"
-        response["content"] = f"Here's data from ARGO float {selected_float}:"
-        response["data"] = fig
+    if "float" in query or "argo" in query:
+        return "float", ()
+    
+    return "unknown", ()
+
+# Process user query
+def process_query(query):
+    """Answer a query; plot responses carry the figure's JSON spec in "data" """
+    for response in stream_query(query):
+        pass
+    return response
+
+def stream_query(query):
+    """Yield the response to a query as it's ready, in process_query's shape.
+    
+    A figure that has to be built is preceded by a text-only response saying
+    what's being plotted, so it can be shown straight away. The last response
+    yielded is the complete one.
+    """
+    intent, params = route_query(query)
+    response = {"type": "text", "content": "", "data": None}
+    
+    # Pick the float before the cache lookup so each float's chart is cached separately
+    if intent == "float":
+        params = (random.choice(get_float_trajectories().float_ids),)
     
-    # Default response for unrecognized queries
+    if intent == "greeting":
+        response["content"] = GREETING_REPLY
+    elif intent == "bad_location":
+        response["content"] = BAD_LOCATION_REPLY.format(*params)
+    elif intent in FIGURE_BUILDERS:
+        if figure_cache.get(intent, params, get_dataset_version()) is None:
+            region = REGION_KEYWORDS.get(params[0]) if params and isinstance(params[0], str) else None
+            yield {"type": "text", "data": None,
+                   "content": PENDING_REPLIES[intent].format(*params, radius=NEAR_RADIUS_KM, region=region,
+                                                             where=region or "global")}
+        content, spec = cached_figure(intent, params)
+        response["content"] = content
+        if spec is not None:
+            response["type"] = "plot"
+            response["data"] = spec
     else:
-        response["content"] = "I can help you explore ARGO ocean data. Try asking about temperature, salinity, or specific ocean regions. For example, you could ask 'Show me temperature trends in the Atlantic Ocean' or 'What is the current salinity in the Pacific?'"
+        # Default response for unrecognized queries
+        response["content"] = DEFAULT_REPLY
     
-    return response
+    yield response
+
+# Handle a submitted chat message; it's answered while the chat renders
+def submit_query():
+    user_input = st.session_state.input
+    if not user_input:
+        return
+    st.session_state.pending_query = user_input
+    
+    # Clear the input so the next rerun doesn't submit it again
+    st.session_state.input = ""
+
+def render_message(role, content):
+    if role == "user":
+        st.markdown(f'<div class="user-message"><b>You:</b> {content}</div>', unsafe_allow_html=True)
+    else:
+        st.markdown(f'<div class="bot-message"><b>FloatChat:</b> {content}</div>', unsafe_allow_html=True)
+
+def answer_pending_query():
+    """Answer the submitted query below the chat, showing its reply before any figure is ready"""
+    query = st.session_state.pop("pending_query")
+    history = st.session_state.messages
+    history.append("user", query)
+    render_message("user", query)
+    
+    reply = st.empty()
+    for response in stream_query(query):
+        with reply.container():
+            render_message("assistant", response["content"])
+    
+    # Add bot response to chat history; plots are kept as JSON specs
+    history.append("assistant", response["content"], response["data"] if response["type"] == "plot" else None)
+    if response["type"] == "plot":
+        message = history.window(1)[0]
+        st.plotly_chart(figure_from_spec(message.plot), use_container_width=True, key=f"message-{message.id}")
+    
+    # Both turns go to the session store in one write
+    if history.store is not None:
+        history.store.flush()
 
 # Main application
 def main():
@@ -231,8 +680,7 @@ def main():
     """, unsafe_allow_html=True)
     
     # Initialize or load ARGO data
-    if st.session_state.argo_data is None:
-        st.session_state.argo_data = generate_mock_argo_data()
+    get_argo_data()
     
     # Create two columns for layout
     col1, col2 = st.columns([1, 1])
@@ -240,38 +688,29 @@ def main():
     with col1:
         st.subheader("Chat with FloatChat")
         
-        # Display chat messages
+        # Display chat messages; only the visible window is rendered
+        history = st.session_state.messages
+        visible = history.window(st.session_state.visible_messages)
+        if len(history) > len(visible):
+            if st.button(f"Show earlier messages ({len(history) - len(visible)} hidden)"):
+                st.session_state.visible_messages += VISIBLE_MESSAGES
+                st.rerun()
+        
         chat_container = st.container()
         with chat_container:
             st.markdown('<div class="chat-container">', unsafe_allow_html=True)
-            for message in st.session_state.messages:
-                if message["role"] == "user":
-                    st.markdown(f'<div class="user-message"><b>You:</b> {message["content"]}</div>', unsafe_allow_html=True)
-                else:
-                    st.markdown(f'<div class="bot-message"><b>FloatChat:</b> {message["content"]}</div>', unsafe_allow_html=True)
-                    if message.get("plot"):
-                        st.plotly_chart(message["plot"], use_container_width=True)
+            for message in visible:
+                render_message(message.role, message.content)
+                if message.plot:
+                    st.plotly_chart(figure_from_spec(message.plot), use_container_width=True,
+                                    key=f"message-{message.id}")
+            if "pending_query" in st.session_state:
+                answer_pending_query()
             st.markdown('</div>', unsafe_allow_html=True)
         
         # User input
-        user_input = st.text_input("Type your question about ocean data and press enter:", key="input")
-        
-        if user_input:
-            # Add user message to chat history
-            st.session_state.messages.append({"role": "user", "content": user_input})
-            
-            # Process query and get response
-            response = process_query(user_input)
-            
-            # Add bot response to chat history
-            st.session_state.messages.append({
-                "role": "assistant", 
-                "content": response["content"],
-                "plot": response["data"] if response["type"] == "plot" else None
-            })
-            
-            # Rerun to update the chat display
-            st.rerun()
+        st.text_input("Type your question about ocean data and press enter:", key="input",
+                      on_change=submit_query)
     
     with col2:
         st.subheader("Ocean Data Overview")
@@ -280,31 +719,16 @@ def main():
         tab1, tab2, tab3 = st.tabs(["Global View", "Temperature", "Salinity"])
         
         with tab1:
-            df = st.session_state.argo_data
-            recent_data = df[df['date'] > datetime.now() - timedelta(days=30)]
-            
-            fig = px.scatter_geo(recent_data, lat='latitude', lon='longitude', 
-                                color='region', hover_name='float_id',
-                                title='Recent ARGO Float Locations')
-            fig.update_geos(showcoastlines=True, coastlinecolor="Black",
-                           showland=True, landcolor="lightgray")
-            st.plotly_chart(fig, use_container_width=True)
+            _, spec = cached_figure("overview_map")
+            st.plotly_chart(figure_from_spec(spec), use_container_width=True)
         
         with tab2:
-            df = st.session_state.argo_data
-            region_avg = df.groupby('region')['temperature'].mean().reset_index()
-            
-            fig = px.bar(region_avg, x='region', y='temperature', 
-                        title='Average Temperature by Ocean Region')
-            st.plotly_chart(fig, use_container_width=True)
+            _, spec = cached_figure("region_average", ("temperature",))
+            st.plotly_chart(figure_from_spec(spec), use_container_width=True)
         
         with tab3:
-            df = st.session_state.argo_data
-            region_avg = df.groupby('region')['salinity'].mean().reset_index()
-            
-            fig = px.bar(region_avg, x='region', y='salinity', 
-                        title='Average Salinity by Ocean Region')
-            st.plotly_chart(fig, use_container_width=True)
+            _, spec = cached_figure("region_average", ("salinity",))
+            st.plotly_chart(figure_from_spec(spec), use_container_width=True)
     
     # Footer with information about ARGO
     st.markdown("---")
@@ -0,0 +1,308 @@
+"""Hashed n-gram linear classifier for AdvancedOceanChatbot's intent and sentiment.
+
+A query is turned into word unigrams, word bigrams and character 3- and
+4-grams, each hashed into one of n_features buckets. The model is a single
+weight matrix with one column per intent and per sentiment, so scoring a
+query is one sparse-row sum over that matrix, and scoring a batch is the
+same sum grouped by query. Character n-grams let the model recognise
+misspelled and inflected forms of the keywords ("warmng", "whales").
+
+Train and export a model, then point the bot at it:
+
+    python intent_classifier.py intent_model.npz [--data labelled.tsv]
+    FLOATCHAT_INTENT_MODEL=intent_model.npz python ai_ocean_bot.py
+
+Without --data the model is trained on queries generated from the bot's own
+keyword patterns, with injected typos. A labelled file has one example per
+line: text, intent and optionally sentiment, separated by tabs.
+"""
+import argparse
+import random
+import re
+import sys
+
+import numpy as np
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+DEFAULT_FEATURES = 1 << 16
+
+# Polynomial string hashing in uint64 arithmetic, which wraps modulo 2**64
+BASE = 1000003
+# Salts that keep the hashes of words, bigrams and 3- and 4-grams apart
+WORD_SALT = np.uint64(0x9E3779B97F4A7C15)
+BIGRAM_SALT = np.uint64(0xC2B2AE3D27D4EB4F)
+CHAR_SALTS = {3: np.uint64(0x165667B19E3779F9), 4: np.uint64(0x27D4EB2F165667C5)}
+MIX_MULTIPLIERS = (np.uint64(0xBF58476D1CE4E5B9), np.uint64(0x94D049BB133111EB))
+MIX_SHIFTS = (np.uint64(30), np.uint64(27), np.uint64(31))
+
+_powers = np.ones(1, dtype=np.uint64)
+_inverse_powers = np.ones(1, dtype=np.uint64)
+
+
+def power_tables(size):
+    """BASE**i and BASE**-i modulo 2**64 for i < size, grown on demand"""
+    global _powers, _inverse_powers
+    if len(_powers) < size:
+        n = max(size, 2 * len(_powers))
+        one = np.ones(1, dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            _powers = np.concatenate([one, np.cumprod(np.full(n - 1, BASE, dtype=np.uint64))])
+            _inverse_powers = np.concatenate(
+                [one, np.cumprod(np.full(n - 1, pow(BASE, -1, 1 << 64), dtype=np.uint64))])
+    return _powers[:size], _inverse_powers[:size]
+
+
+def normalize(text):
+    """Lowercase words joined and enclosed by '#', e.g. "#the#pacific#" """
+    return "#" + "#".join(WORD_PATTERN.findall(text.lower())) + "#"
+
+
+def mix(h):
+    """Scramble uint64 hashes (splitmix64 finalizer) so that bucketing by modulo is uniform"""
+    h = (h ^ (h >> MIX_SHIFTS[0])) * MIX_MULTIPLIERS[0]
+    h = (h ^ (h >> MIX_SHIFTS[1])) * MIX_MULTIPLIERS[1]
+    return h ^ (h >> MIX_SHIFTS[2])
+
+
+def hashed_ngrams(texts, n_features):
+    """Bucket indices of the n-grams of every text, grouped by text, as (indices, offsets).
+
+    The features of a text are its words, its word bigrams and the character
+    3- and 4-grams of its normalized form, so they include the '#' word
+    boundaries. All texts are hashed together: prefix sums of the characters
+    weighted by powers of the inverse of BASE give the hash of any substring
+    in constant time.
+    """
+    normalized = [normalize(text) for text in texts]
+    lengths = np.array([len(s) for s in normalized], dtype=np.int64)
+    ends = np.cumsum(lengths)
+    codes = np.frombuffer("".join(normalized).encode("ascii"), dtype=np.uint8).astype(np.uint64)
+    size = len(codes)
+    powers, inverse_powers = power_tables(size + 1)
+
+    with np.errstate(over="ignore"):
+        prefix = np.zeros(size + 1, dtype=np.uint64)
+        np.cumsum(codes * inverse_powers[:size], out=prefix[1:])
+
+        def substring_hash(i, j):
+            return (prefix[j] - prefix[i]) * powers[i]
+
+        row_of_char = np.repeat(np.arange(len(texts)), lengths)
+        rows, hashes = [], []
+
+        # Character n-grams that don't run past the end of their text
+        for n, salt in CHAR_SALTS.items():
+            first = np.arange(max(size - n + 1, 0))
+            first = first[first + n <= ends[row_of_char[first]]]
+            rows.append(row_of_char[first])
+            hashes.append(substring_hash(first, first + n) ^ salt)
+
+        # Words lie between consecutive '#'s of the same text
+        bounds = np.flatnonzero(codes == ord("#"))
+        left, right = bounds[:-1], bounds[1:]
+        keep = (right - left > 1) & (row_of_char[left] == row_of_char[right])
+        left, right = left[keep], right[keep]
+        word_rows = row_of_char[left]
+        word_hashes = substring_hash(left + 1, right)
+        rows.append(word_rows)
+        hashes.append(word_hashes ^ WORD_SALT)
+
+        same_text = word_rows[1:] == word_rows[:-1]
+        rows.append(word_rows[1:][same_text])
+        hashes.append((word_hashes[:-1][same_text] * MIX_MULTIPLIERS[0] + word_hashes[1:][same_text]) ^ BIGRAM_SALT)
+
+        rows = np.concatenate(rows)
+        order = np.argsort(rows, kind="stable")
+        indices = (mix(np.concatenate(hashes)[order]) % np.uint64(n_features)).astype(np.int64)
+    offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(rows, minlength=len(texts)))
+    return indices, offsets
+
+
+class HashedNgramClassifier:
+    """Linear intent and sentiment model over hashed n-gram features"""
+
+    def __init__(self, intents, sentiments, n_features=DEFAULT_FEATURES, weights=None, bias=None):
+        self.intents = list(intents)
+        self.sentiments = list(sentiments)
+        self.n_features = n_features
+        n_classes = len(self.intents) + len(self.sentiments)
+        self.weights = weights if weights is not None else np.zeros((n_features, n_classes), dtype=np.float32)
+        self.bias = bias if bias is not None else np.zeros(n_classes, dtype=np.float32)
+
+    def featurize(self, texts):
+        """CSR-style (indices, offsets) for a list of texts; row i is indices[offsets[i]:offsets[i + 1]]"""
+        return hashed_ngrams(texts, self.n_features)
+
+    def logits(self, indices, offsets):
+        """Scores of every class for every row: the length-normalized sum of its weight rows"""
+        n_rows = len(offsets) - 1
+        counts = np.diff(offsets)
+        scores = np.zeros((n_rows, self.weights.shape[1]), dtype=np.float32)
+        filled = counts > 0
+        if filled.any():
+            sums = np.add.reduceat(self.weights[indices], offsets[:-1][filled], axis=0)
+            scores[filled] = sums / np.sqrt(counts[filled])[:, None]
+        return scores + self.bias
+
+    def probabilities(self, texts):
+        """(intent probabilities, sentiment probabilities) for a list of texts"""
+        scores = self.logits(*self.featurize(texts))
+        split = len(self.intents)
+        return softmax(scores[:, :split]), softmax(scores[:, split:])
+
+    def predict(self, texts, min_confidence=0.0):
+        """(intent, sentiment) per text; a label is None where the model is less sure than min_confidence"""
+        intent_p, sentiment_p = self.probabilities(texts)
+        return [
+            (self.intents[i] if intent_p[row, i] >= min_confidence else None,
+             self.sentiments[s] if sentiment_p[row, s] >= min_confidence else None)
+            for row, (i, s) in enumerate(zip(intent_p.argmax(1), sentiment_p.argmax(1)))
+        ]
+
+    def fit(self, texts, intents, sentiments, epochs=8, learning_rate=4.0, batch_size=64, l2=1e-6, seed=0):
+        """Train both heads with mini-batch gradient descent on the softmax cross-entropy"""
+        indices, offsets = self.featurize(texts)
+        intent_ids = np.array([self.intents.index(label) for label in intents])
+        sentiment_ids = np.array([self.sentiments.index(label) for label in sentiments])
+        split = len(self.intents)
+        rng = np.random.default_rng(seed)
+
+        for _ in range(epochs):
+            order = rng.permutation(len(texts))
+            for start in range(0, len(order), batch_size):
+                rows = order[start:start + batch_size]
+                batch_indices = np.concatenate([indices[offsets[r]:offsets[r + 1]] for r in rows])
+                counts = offsets[rows + 1] - offsets[rows]
+                batch_offsets = np.concatenate([[0], np.cumsum(counts)])
+                scores = self.logits(batch_indices, batch_offsets)
+
+                # Gradient of the summed cross-entropy of both heads w.r.t. the scores
+                grad = np.concatenate([softmax(scores[:, :split]), softmax(scores[:, split:])], axis=1)
+                grad[np.arange(len(rows)), intent_ids[rows]] -= 1
+                grad[np.arange(len(rows)), split + sentiment_ids[rows]] -= 1
+                grad /= len(rows)
+
+                # Each feature of a row receives that row's gradient, scaled like in logits()
+                scale = np.where(counts > 0, 1 / np.sqrt(np.maximum(counts, 1)), 0)
+                row_of_feature = np.repeat(np.arange(len(rows)), counts)
+                weight_grad = (grad * scale[:, None])[row_of_feature]
+                np.add.at(self.weights, batch_indices, -learning_rate * weight_grad)
+                self.bias -= learning_rate * grad.sum(0)
+            if l2:
+                self.weights *= 1 - learning_rate * l2
+        return self
+
+    def save(self, path):
+        np.savez_compressed(path, weights=self.weights, bias=self.bias, intents=np.array(self.intents),
+                            sentiments=np.array(self.sentiments), n_features=self.n_features)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["intents"].tolist(), data["sentiments"].tolist(), int(data["n_features"]),
+                       data["weights"], data["bias"])
+
+
+def softmax(scores):
+    scores = scores - scores.max(axis=1, keepdims=True)
+    exp = np.exp(scores)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def typo(word, rng):
+    """word with one random deletion, transposition or doubled letter"""
+    if len(word) < 4:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    kind = rng.randrange(3)
+    if kind == 0:
+        return word[:i] + word[i + 1:]
+    if kind == 1:
+        return word[:i - 1] + word[i] + word[i - 1] + word[i + 1:]
+    return word[:i] + word[i] + word[i:]
+
+
+def synthetic_examples(patterns, sentiment_words, count=30000, seed=0):
+    """Queries built around one or two keywords, labelled from the keywords put in.
+
+    The label is the intent listing the most of those keywords, ties going
+    to the intent defined first, as with the keyword matcher. Labelling by
+    the inserted keywords rather than by re-running the matcher keeps the
+    model from learning its substring accidents ("hi" inside "fishing"
+    counting as a greeting). Half of the keywords get a typo.
+    """
+    intents = list(patterns)
+    keywords = sorted({keyword for words in patterns.values() for keyword in words})
+    templates = [
+        "{kw}", "tell me about {kw}", "what is {kw}", "how does {kw} work", "explain {kw} please",
+        "i want to learn about {kw}", "can you tell me more about {kw}", "why is {kw} important",
+        "{kw} facts"
+    ]
+    pair_templates = ["{kw} {kw2}", "what is the {kw} in the {kw2}", "{kw} and {kw2}", "how does {kw} affect {kw2}"]
+    moods = ["{mood} {text}", "i {mood} {text}", "{text}, it is {mood}"]
+    fillers = ["what do you think", "can you help me", "tell me more", "tell me something", "why", "is that so",
+               "what else", "go on", "thanks", "i see", "really", "ok", "and then"]
+    rng = random.Random(seed)
+
+    examples = []
+    for _ in range(count):
+        if rng.random() < 0.1:
+            text, intent = rng.choice(fillers), "general"
+        else:
+            chosen = rng.sample(keywords, 2 if rng.random() < 0.4 else 1)
+            counts = [sum(keyword in patterns[intent] for keyword in chosen) for intent in intents]
+            intent = intents[counts.index(max(counts))]
+            if rng.random() < 0.5:
+                chosen = [" ".join(typo(word, rng) for word in keyword.split()) for keyword in chosen]
+            template = rng.choice(pair_templates if len(chosen) == 2 else templates)
+            text = template.format(kw=chosen[0], kw2=chosen[-1])
+        sentiment = rng.choice(["positive", "negative", "neutral", "neutral"])
+        if sentiment != "neutral":
+            text = rng.choice(moods).format(mood=rng.choice(sentiment_words[sentiment]), text=text)
+        examples.append((text, intent, sentiment))
+    return examples
+
+
+def read_examples(path):
+    """(text, intent, sentiment) from a tab-separated file; a missing sentiment means neutral"""
+    examples = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) >= 2 and fields[0].strip():
+                examples.append((fields[0], fields[1], fields[2] if len(fields) > 2 else "neutral"))
+    return examples
+
+
+def main(argv=None):
+    from ai_ocean_bot import INTENT_PATTERNS, SENTIMENT_WORDS
+
+    parser = argparse.ArgumentParser(description="Train and export the intent/sentiment model")
+    parser.add_argument("out", help="where to write the model (.npz)")
+    parser.add_argument("--data", help="labelled examples: text<TAB>intent[<TAB>sentiment]")
+    parser.add_argument("--features", type=int, default=DEFAULT_FEATURES)
+    parser.add_argument("--epochs", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    examples = read_examples(args.data) if args.data else synthetic_examples(INTENT_PATTERNS, SENTIMENT_WORDS)
+    random.Random(1).shuffle(examples)
+    held_out = examples[:len(examples) // 10]
+    train = examples[len(examples) // 10:]
+
+    intents = list(INTENT_PATTERNS) + ["general"]
+    intents += sorted({intent for _, intent, _ in examples} - set(intents))
+    model = HashedNgramClassifier(intents, ["positive", "negative", "neutral"], args.features)
+    model.fit(*zip(*train), epochs=args.epochs)
+
+    predictions = model.predict([text for text, _, _ in held_out])
+    intent_accuracy = np.mean([p[0] == intent for p, (_, intent, _) in zip(predictions, held_out)])
+    sentiment_accuracy = np.mean([p[1] == sentiment for p, (_, _, sentiment) in zip(predictions, held_out)])
+    model.save(args.out)
+    print(f"Trained on {len(train):,} examples; held-out accuracy: intent {intent_accuracy:.1%}, "
+          f"sentiment {sentiment_accuracy:.1%}. Saved to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+from collections import deque
+
+
+class IntentRouter:
+    """Match every keyword of every intent in one pass over the query.
+
+    The keyword sets are compiled into a single Aho-Corasick automaton, stored
+    as a fully expanded DFA (one dict of character transitions per state), so
+    scanning costs one dict lookup per character of the query no matter how
+    many keywords there are. Matching is plain substring matching, including
+    overlapping keywords ("goodbye" hits both "goodbye" and "bye"), which is
+    what the bots' chains of ``keyword in query`` checks did.
+    """
+
+    def __init__(self, keyword_sets):
+        self.intents = list(keyword_sets)
+        self.keywords = []
+        self._keyword_ids = {}
+        self._keyword_intents = []
+
+        for intent in self.intents:
+            for keyword in keyword_sets[intent]:
+                if keyword not in self._keyword_ids:
+                    self._keyword_ids[keyword] = len(self.keywords)
+                    self.keywords.append(keyword)
+                    self._keyword_intents.append([])
+                intents = self._keyword_intents[self._keyword_ids[keyword]]
+                if intent not in intents:
+                    intents.append(intent)
+
+        self._build()
+
+    def _build(self):
+        # Trie
+        goto = [{}]
+        out = [set()]
+        for keyword_id, keyword in enumerate(self.keywords):
+            state = 0
+            for ch in keyword:
+                if ch not in goto[state]:
+                    goto.append({})
+                    out.append(set())
+                    goto[state][ch] = len(goto) - 1
+                state = goto[state][ch]
+            out[state].add(keyword_id)
+
+        # Failure links, breadth first, then expand into a full DFA
+        alphabet = {ch for keyword in self.keywords for ch in keyword}
+        fail = [0] * len(goto)
+        delta = [dict() for _ in goto]
+        queue = deque()
+        for ch in alphabet:
+            child = goto[0].get(ch)
+            if child is not None:
+                delta[0][ch] = child
+                queue.append(child)
+        while queue:
+            state = queue.popleft()
+            out[state] |= out[fail[state]]
+            for ch in alphabet:
+                child = goto[state].get(ch)
+                if child is not None:
+                    fail[child] = delta[fail[state]].get(ch, 0)
+                    delta[state][ch] = child
+                    queue.append(child)
+                else:
+                    target = delta[fail[state]].get(ch, 0)
+                    if target:
+                        delta[state][ch] = target
+
+        self._delta = delta
+        # Per state, the (intent, keyword) pairs that end there
+        self._out = [
+            tuple((intent, self.keywords[i]) for i in sorted(ids) for intent in self._keyword_intents[i])
+            for ids in out
+        ]
+
+    def hits(self, text):
+        """Return {intent: set of matched keywords} for intents with at least one hit"""
+        delta, out = self._delta, self._out
+        state = 0
+        hits = {}
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            if out[state]:
+                for intent, keyword in out[state]:
+                    if intent in hits:
+                        hits[intent].add(keyword)
+                    else:
+                        hits[intent] = {keyword}
+        return hits
+
+    def hits_many(self, texts):
+        """hits() of each text in a list, scanned in one loop over the whole batch"""
+        delta, out = self._delta, self._out
+        results = []
+        for text in texts:
+            state = 0
+            hits = {}
+            for ch in text:
+                state = delta[state].get(ch, 0)
+                if out[state]:
+                    for intent, keyword in out[state]:
+                        if intent in hits:
+                            hits[intent].add(keyword)
+                        else:
+                            hits[intent] = {keyword}
+            results.append(hits)
+        return results
+
+    def find(self, text):
+        """Return the set of keywords occurring anywhere in text"""
+        found = set()
+        for keywords in self.hits(text).values():
+            found |= keywords
+        return found
+
+    def scores(self, text, hits=None):
+        """Return {intent: number of distinct keywords matched}, in intent definition order"""
+        if hits is None:
+            hits = self.hits(text)
+        return {intent: len(hits[intent]) for intent in self.intents if intent in hits}
+
+    def best(self, text, default=None, hits=None):
+        """Intent with the most keyword hits; ties go to the intent defined first"""
+        scores = self.scores(text, hits)
+        if not scores:
+            return default
+        return max(scores.items(), key=lambda x: x[1])[0]
+
+    def best_many(self, texts, default=None):
+        """best() of each text in a list, matching the batch with hits_many"""
+        return [self.best(text, default, hits) for text, hits in zip(texts, self.hits_many(texts))]
+
+    def first(self, text, order=None, default=None):
+        """First intent in order (definition order by default) with any hit"""
+        hits = self.hits(text)
+        for intent in order or self.intents:
+            if intent in hits:
+                return intent
+        return default
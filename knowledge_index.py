@@ -0,0 +1,200 @@
+"""TF-IDF retrieval over knowledge-base passages, for free-form questions.
+
+Every passage is stored as a sparse row of term counts. Searching weights
+the rows by TF-IDF, normalizes them, and scores a query by cosine similarity
+against all of them at once. Only the postings of the query's own terms are
+touched, so the cost follows the query, not the vocabulary.
+
+Passages can be added at any time. The weights depend on every passage's
+terms, so they're rebuilt, vectorized, on the first search after an add.
+Saving keeps the tokenized rows and the normalized weights, so a loaded
+index searches straight away, without re-tokenizing the passages or
+recomputing the weights; it only rebuilds them once passages are added.
+
+Build and export the index AdvancedOceanChatbot uses, then point the bot at it:
+
+    python knowledge_index.py retrieval_index.npz
+    FLOATCHAT_RETRIEVAL_INDEX=retrieval_index.npz python ai_ocean_bot.py
+"""
+import argparse
+import sys
+from array import array
+from collections import Counter
+from collections.abc import Mapping
+
+import numpy as np
+
+from spelling import COMMON_WORDS, tokenize
+
+# Everyday words say nothing about which passage a query is after
+STOP_WORDS = frozenset(COMMON_WORDS)
+
+
+def index_terms(text):
+    """Tokens of text that count for retrieval; numbers match too loosely to count"""
+    return [token for token in tokenize(text) if token not in STOP_WORDS and not token.isdigit()]
+
+
+def knowledge_passages(knowledge, sections):
+    """(key, text) for every leaf of the given knowledge sections.
+
+    A list of plain values is one passage. The text leads with where the
+    value sits, using an entry's "name" in place of its key, e.g.
+    "Conservation, pollution, plastic: 8 million tons of plastic ...".
+    """
+    passages = []
+
+    def walk(value, path, heading):
+        if isinstance(value, Mapping):
+            if "name" in value:
+                heading = heading[:-1] + [value["name"]]
+            for key, item in value.items():
+                if key != "name":
+                    walk(item, path + [str(key)], heading + [str(key).replace("_", " ")])
+        elif isinstance(value, (list, tuple)) and any(isinstance(item, Mapping) for item in value):
+            for i, item in enumerate(value):
+                walk(item, path + [str(i)], heading)
+        else:
+            if isinstance(value, (list, tuple)):
+                value = "; ".join(str(item) for item in value)
+            title = ", ".join(heading)
+            passages.append(("/".join(path), f"{title[:1].upper()}{title[1:]}: {value}"))
+
+    for section in sections:
+        walk(knowledge[section], [section], [section.replace("_", " ")])
+    return passages
+
+
+def long_array(values):
+    """An array("l") of an integer NumPy array, copied as one block"""
+    result = array("l")
+    result.frombytes(np.ascontiguousarray(values, dtype=np.dtype("l")).tobytes())
+    return result
+
+
+class TfidfIndex:
+    """Passages searchable by TF-IDF cosine similarity"""
+
+    def __init__(self):
+        self.keys = []
+        self.texts = []
+        self.vocabulary = {}
+        # Term counts per passage, as CSR rows: passage i is [offsets[i], offsets[i + 1])
+        self._terms = array("l")
+        self._counts = array("l")
+        self._offsets = array("l", [0])
+        self._postings = None
+
+    def add(self, key, text):
+        """Add one passage; it's searchable straight away"""
+        counts = Counter(index_terms(text))
+        for term, count in counts.items():
+            self._terms.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+            self._counts.append(count)
+        self._offsets.append(len(self._terms))
+        self.keys.append(key)
+        self.texts.append(text)
+        self._postings = None
+
+    def add_many(self, passages):
+        for key, text in passages:
+            self.add(key, text)
+
+    def search(self, query, k=3):
+        """Up to k (similarity, key, text) for the passages most similar to query, best first"""
+        counts = Counter(index_terms(query))
+        known = [term for term in counts if term in self.vocabulary]
+        if not known:
+            return []
+        if self._postings is None:
+            self._build()
+        passages, weights, starts, idf = self._postings
+
+        ids = np.array([self.vocabulary[term] for term in known])
+        query_weights = (1 + np.log([counts[term] for term in known])) * idf[ids]
+        # Terms no passage has still count towards the query's length
+        unseen = [1 + np.log(counts[term]) for term in counts if term not in self.vocabulary]
+        unseen_idf = np.log(len(self.keys) + 1) + 1
+        query_weights /= np.sqrt(np.sum(query_weights ** 2) + np.sum(np.square(unseen)) * unseen_idf ** 2)
+
+        # The postings of the query's terms, concatenated
+        lengths = starts[ids + 1] - starts[ids]
+        ends = np.cumsum(lengths)
+        positions = np.arange(ends[-1]) + np.repeat(starts[ids] - (ends - lengths), lengths)
+        scores = np.bincount(passages[positions], weights[positions] * np.repeat(query_weights, lengths),
+                             minlength=len(self.keys))
+
+        k = min(k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(float(scores[i]), self.keys[i], self.texts[i]) for i in best if scores[i] > 0]
+
+    def _build(self):
+        """Normalized TF-IDF weights, grouped by term"""
+        terms = np.array(self._terms, dtype=np.int64)
+        counts = np.array(self._counts, dtype=np.float64)
+        offsets = np.array(self._offsets, dtype=np.int64)
+        n_passages, n_terms = len(self.keys), len(self.vocabulary)
+
+        passages = np.repeat(np.arange(n_passages), np.diff(offsets))
+        frequencies = np.bincount(terms, minlength=n_terms)
+        idf = np.log((1 + n_passages) / (1 + frequencies)) + 1
+        weights = (1 + np.log(counts)) * idf[terms]
+        norms = np.sqrt(np.bincount(passages, weights ** 2, minlength=n_passages))
+        weights /= np.where(norms > 0, norms, 1)[passages]
+
+        order = np.argsort(terms, kind="stable")
+        starts = np.concatenate([[0], np.cumsum(frequencies)])
+        self._postings = (passages[order], weights[order], starts, idf)
+
+    def save(self, path):
+        if self._postings is None:
+            self._build()
+        passages, weights, starts, idf = self._postings
+        vocabulary = sorted(self.vocabulary, key=self.vocabulary.get)
+        np.savez_compressed(path, keys=np.array(self.keys, dtype=str), texts=np.array(self.texts, dtype=str),
+                            vocabulary=np.array(vocabulary, dtype=str), terms=np.array(self._terms),
+                            counts=np.array(self._counts), offsets=np.array(self._offsets),
+                            posting_passages=passages, posting_weights=weights, posting_starts=starts, idf=idf)
+
+    @classmethod
+    def load(cls, path):
+        index = cls()
+        with np.load(path) as data:
+            index.keys = data["keys"].tolist()
+            index.texts = data["texts"].tolist()
+            index.vocabulary = {term: i for i, term in enumerate(data["vocabulary"].tolist())}
+            index._terms = long_array(data["terms"])
+            index._counts = long_array(data["counts"])
+            index._offsets = long_array(data["offsets"])
+            # Indexes saved without their weights build them on the first search
+            if "posting_weights" in data:
+                index._postings = (data["posting_passages"], data["posting_weights"], data["posting_starts"],
+                                   data["idf"])
+        return index
+
+    def __len__(self):
+        return len(self.keys)
+
+
+def main(argv=None):
+    from ai_ocean_bot import build_retrieval_index
+    from ocean_knowledge import KNOWLEDGE
+
+    parser = argparse.ArgumentParser(description="Build and export the knowledge retrieval index")
+    parser.add_argument("out", help="where to write the index (.npz)")
+    parser.add_argument("--add", nargs="*", default=[], metavar="FILE",
+                        help="text files to index as well, one passage per non-empty line")
+    args = parser.parse_args(argv)
+
+    index = build_retrieval_index(KNOWLEDGE)
+    for path in args.add:
+        with open(path, "r", encoding="utf-8") as f:
+            index.add_many((f"{path}:{number}", line.strip()) for number, line in enumerate(f, 1) if line.strip())
+    index.save(args.out)
+    print(f"Indexed {len(index):,} passages, {len(index.vocabulary):,} terms. Saved to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+"""Ocean knowledge shared by every chatbot instance in the process.
+
+The knowledge base is built once at import time and frozen: dicts become
+read-only mappings and lists become tuples, so one copy can safely back any
+number of concurrent sessions. A bot instance only holds references to it
+plus its own conversation state.
+
+Sections can be replaced from a JSON file by pointing FLOATCHAT_KNOWLEDGE at
+it; sections the file doesn't mention keep their built-in values. To start
+a file from the built-in knowledge:
+
+    python ocean_knowledge.py knowledge.json
+"""
+import json
+import os
+import sys
+from types import MappingProxyType
+
+# ARGOOceanChatbot: headline figures per ocean and its common species
+_OCEAN_DATA = {
+    "pacific": {
+        "name": "Pacific Ocean",
+        "temperature": "22.5°C (72.5°F) average surface temperature",
+        "salinity": "34.7 PSU average salinity",
+        "oxygen": "4.5-6.2 mg/L (varies by depth and location)",
+        "currents": "Major currents: Kuroshio, California, Humboldt, East Australian",
+        "depth": "Average depth: 4,280m (14,040ft), Maximum: 10,911m (Mariana Trench)",
+        "coordinates": "0°N 160°W (approximate center)",
+        "area": "165,250,000 km² (63,800,000 sq mi)",
+        "volume": "710,000,000 km³ (170,000,000 cu mi)",
+        "facts": "The Pacific Ocean is the largest and deepest ocean, covering about 30% of Earth's surface.",
+        "data_source": "ARGO Float WMO 4901254, 2023-09-15",
+        "countries": ["United States", "Canada", "Mexico", "Japan", "Australia", "China", "Chile", "Peru"],
+        "oxygen_min": 4.5,
+        "oxygen_max": 6.2,
+        "ph_level": "7.8-8.3 (slightly alkaline)"
+    },
+    "atlantic": {
+        "name": "Atlantic Ocean",
+        "temperature": "18.9°C (66.0°F) average surface temperature",
+        "salinity": "35.4 PSU average salinity",
+        "oxygen": "5.0-6.5 mg/L (higher in northern regions)",
+        "currents": "Major currents: Gulf Stream, North Atlantic Drift, Canary, Benguela",
+        "depth": "Average depth: 3,646m (11,962ft), Maximum: 8,376m (Puerto Rico Trench)",
+        "coordinates": "0°N 30°W (approximate center)",
+        "area": "106,460,000 km² (41,100,000 sq mi)",
+        "volume": "310,410,900 km³ (74,471,500 cu mi)",
+        "facts": "The Atlantic Ocean is the second largest and saltiest ocean, crucial for global thermohaline circulation.",
+        "data_source": "ARGO Float WMO 3901402, 2023-09-10",
+        "countries": ["United States", "Brazil", "United Kingdom", "France", "Spain", "South Africa", "Nigeria"],
+        "oxygen_min": 5.0,
+        "oxygen_max": 6.5,
+        "ph_level": "7.9-8.4 (slightly alkaline)"
+    },
+    "indian": {
+        "name": "Indian Ocean",
+        "temperature": "26.0°C (78.8°F) average surface temperature",
+        "salinity": "34.8 PSU average salinity",
+        "oxygen": "4.2-5.8 mg/L (lower in northern regions)",
+        "currents": "Major currents: Agulhas, West Australian, Monsoon Drift",
+        "depth": "Average depth: 3,741m (12,274ft), Maximum: 7,258m (Java Trench)",
+        "coordinates": "20°S 80°E (approximate center)",
+        "area": "70,560,000 km² (27,240,000 sq mi)",
+        "volume": "264,000,000 km³ (63,000,000 cu mi)",
+        "facts": "The Indian Ocean is the warmest ocean, significantly influencing monsoon patterns in Asia.",
+        "data_source": "ARGO Float WMO 2902267, 2023-09-12",
+        "countries": ["India", "Indonesia", "Australia", "South Africa", "Maldives", "Sri Lanka", "Thailand"],
+        "oxygen_min": 4.2,
+        "oxygen_max": 5.8,
+        "ph_level": "7.8-8.3 (slightly alkaline)"
+    },
+    "southern": {
+        "name": "Southern Ocean",
+        "temperature": "2.0°C (35.6°F) average surface temperature",
+        "salinity": "34.2 PSU average salinity",
+        "oxygen": "6.0-8.0 mg/L (higher due to cold water)",
+        "currents": "Major current: Antarctic Circumpolar Current",
+        "depth": "Average depth: 4,500m (14,800ft), Maximum: 7,235m (South Sandwich Trench)",
+        "coordinates": "65°S 90°E (approximate center)",
+        "area": "21,960,000 km² (8,480,000 sq mi)",
+        "volume": "71,800,000 km³ (17,200,000 cu mi)",
+        "facts": "The Southern Ocean connects the Atlantic, Pacific, and Indian Oceans and plays a key role in global climate regulation.",
+        "data_source": "ARGO Float WMO 5904463, 2023-09-05",
+        "countries": ["No sovereign nations, surrounds Antarctica"],
+        "oxygen_min": 6.0,
+        "oxygen_max": 8.0,
+        "ph_level": "7.9-8.2 (slightly alkaline)"
+    },
+    "arctic": {
+        "name": "Arctic Ocean",
+        "temperature": "-1.5°C (29.3°F) average surface temperature",
+        "salinity": "30.5 PSU average salinity",
+        "oxygen": "7.0-9.0 mg/L (highest due to very cold water)",
+        "currents": "Major currents: Beaufort Gyre, Transpolar Drift",
+        "depth": "Average depth: 1,205m (3,953ft), Maximum: 5,550m (Eurasia Basin)",
+        "coordinates": "90°N 0°E (North Pole)",
+        "area": "15,558,000 km² (6,006,000 sq mi)",
+        "volume": "18,750,000 km³ (4,500,000 cu mi)",
+        "facts": "The Arctic Ocean is the smallest and shallowest ocean, experiencing significant sea ice loss due to climate change.",
+        "data_source": "ARGO Float WMO 7900542, 2023-09-18",
+        "countries": ["United States (Alaska)", "Canada", "Russia", "Norway", "Greenland (Denmark)", "Iceland"],
+        "oxygen_min": 7.0,
+        "oxygen_max": 9.0,
+        "ph_level": "7.8-8.1 (slightly alkaline)"
+    }
+}
+
+_FISH_SPECIES = {
+    "pacific": [
+        {"name": "Pacific Salmon", "scientific_name": "Oncorhynchus spp.", "habitat": "Coastal and open ocean", "conservation_status": "Varies by species"},
+        {"name": "Bluefin Tuna", "scientific_name": "Thunnus orientalis", "habitat": "Open ocean", "conservation_status": "Endangered"},
+        {"name": "Clownfish", "scientific_name": "Amphiprioninae", "habitat": "Coral reefs", "conservation_status": "Least Concern"},
+        {"name": "Manta Ray", "scientific_name": "Mobula birostris", "habitat": "Open ocean", "conservation_status": "Vulnerable"}
+    ],
+    "atlantic": [
+        {"name": "Atlantic Cod", "scientific_name": "Gadus morhua", "habitat": "Coastal and deep water", "conservation_status": "Vulnerable"},
+        {"name": "Blue Marlin", "scientific_name": "Makaira nigricans", "habitat": "Open ocean", "conservation_status": "Vulnerable"},
+        {"name": "Humpback Whale", "scientific_name": "Megaptera novaeangliae", "habitat": "Open ocean", "conservation_status": "Least Concern"},
+        {"name": "American Lobster", "scientific_name": "Homarus americanus", "habitat": "Coastal seabed", "conservation_status": "Least Concern"}
+    ],
+    "indian": [
+        {"name": "Manta Ray", "scientific_name": "Mobula alfredi", "habitat": "Coral reefs", "conservation_status": "Vulnerable"},
+        {"name": "Coral Trout", "scientific_name": "Plectropomus leopardus", "habitat": "Coral reefs", "conservation_status": "Least Concern"},
+        {"name": "Whale Shark", "scientific_name": "Rhincodon typus", "habitat": "Open ocean", "conservation_status": "Endangered"},
+        {"name": "Clownfish", "scientific_name": "Amphiprion ocellaris", "habitat": "Coral reefs", "conservation_status": "Least Concern"}
+    ],
+    "southern": [
+        {"name": "Antarctic Krill", "scientific_name": "Euphausia superba", "habitat": "Open ocean", "conservation_status": "Least Concern"},
+        {"name": "Patagonian Toothfish", "scientific_name": "Dissostichus eleginoides", "habitat": "Deep water", "conservation_status": "Vulnerable"},
+        {"name": "Emperor Penguin", "scientific_name": "Aptenodytes forsteri", "habitat": "Coastal and ice", "conservation_status": "Near Threatened"},
+        {"name": "Weddell Seal", "scientific_name": "Leptonychotes weddellii", "habitat": "Coastal and ice", "conservation_status": "Least Concern"}
+    ],
+    "arctic": [
+        {"name": "Arctic Cod", "scientific_name": "Boreogadus saida", "habitat": "Coastal and open ocean", "conservation_status": "Least Concern"},
+        {"name": "Greenland Shark", "scientific_name": "Somniosus microcephalus", "habitat": "Deep water", "conservation_status": "Vulnerable"},
+        {"name": "Narwhal", "scientific_name": "Monodon monoceros", "habitat": "Open ocean", "conservation_status": "Near Threatened"},
+        {"name": "Beluga Whale", "scientific_name": "Delphinapterus leucas", "habitat": "Coastal and open ocean", "conservation_status": "Least Concern"}
+    ]
+}
+
+# AdvancedOceanChatbot: detailed ocean profiles and the topic databases
+_OCEAN_PROFILES = {
+    "pacific": {
+        "name": "Pacific Ocean",
+        "temperature": {"surface": "22.5°C", "deep": "1-4°C", "trend": "+0.12°C/decade"},
+        "salinity": "34.7 PSU average",
+        "oxygen": {"surface": "6.2 mg/L", "deep": "4.5 mg/L", "trend": "-0.5%/decade"},
+        "ph": {"surface": "8.05", "trend": "-0.02/decade"},
+        "currents": ["Kuroshio Current", "California Current", "Humboldt Current", "East Australian Current"],
+        "depth": {"average": "4,280m", "max": "10,911m (Challenger Deep, Mariana Trench)"},
+        "area": "165,250,000 km²",
+        "volume": "710,000,000 km³",
+        "coordinates": "0°N 160°W (approximate center)",
+        "countries": ["USA", "Canada", "Mexico", "Japan", "Australia", "China", "Chile", "Peru"],
+        "facts": [
+            "Largest and deepest ocean, covering about 30% of Earth's surface",
+            "Home to the Great Barrier Reef, the world's largest coral reef system",
+            "Contains the Mariana Trench, the deepest point on Earth"
+        ],
+        "biodiversity": "High - contains about 50% of the world's marine species",
+        "data_source": "ARGO Float Network, NOAA, UNESCO-IOC"
+    },
+    # Similar data structures for other oceans...
+}
+
+_MARINE_LIFE = {
+    "pacific": {
+        "mammals": ["Blue Whale", "Humpback Whale", "Orca", "Dolphins", "Sea Otters"],
+        "fish": ["Pacific Salmon", "Tuna", "Halibut", "Sardines", "Anchovies"],
+        "invertebrates": ["Giant Pacific Octopus", "Jellyfish", "Krill", "Crab", "Shrimp"],
+        "corals": ["Great Barrier Reef Corals", "Coral Polyps", "Sea Anemones"],
+        "plants": ["Kelp Forests", "Phytoplankton", "Sea Grasses"],
+        "endangered": ["Blue Whale", "Sea Otter", "Leatherback Turtle"]
+    },
+    # Similar data for other oceans...
+}
+
+_CONSERVATION_DATA = {
+    "pollution": {
+        "plastic": "8 million tons of plastic enter oceans yearly",
+        "chemical": "Industrial runoff and oil spills harm marine ecosystems",
+        "noise": "Shipping and sonar disrupt marine mammal communication"
+    },
+    "overfishing": {
+        "status": "90% of global fish stocks are overfished or fully exploited",
+        "impact": "Disrupts food webs and marine ecosystem balance"
+    },
+    "habitat_destruction": {
+        "coral_reefs": "50% of coral reefs have been lost in last 30 years",
+        "mangroves": "35% of mangroves have been destroyed",
+        "seagrass": "29% of seagrass habitats have disappeared"
+    },
+    "climate_impact": {
+        "coral_bleaching": "Rising temperatures cause coral bleaching events",
+        "sea_level_rise": "Threatens coastal habitats and communities",
+        "acidification": "Ocean pH has dropped by 0.1 units since industrial revolution"
+    }
+}
+
+_CLIMATE_DATA = {
+    "temperature_trend": "Global ocean surface temperature increased by 0.88°C since 1900",
+    "sea_level_rise": "Global mean sea level has risen about 20cm since 1900",
+    "acidification": "Ocean pH has decreased by 0.1 units (30% increase in acidity)",
+    "current_changes": "Major ocean currents are slowing due to meltwater input",
+    "extreme_events": "Increased frequency of marine heatwaves and harmful algal blooms"
+}
+
+_HUMAN_IMPACT_DATA = {
+    "fishing": "Global fish catch peaked at 86 million tons in 1996",
+    "shipping": "90% of world trade is carried by sea",
+    "tourism": "Coastal tourism generates $ billions annually",
+    "mining": "Deep-sea mining threatens unique ecosystems",
+    "energy": "Offshore wind and oil extraction impact marine environments"
+}
+
+BUILTIN_SECTIONS = {
+    "ocean_data": _OCEAN_DATA,
+    "fish_species": _FISH_SPECIES,
+    "ocean_profiles": _OCEAN_PROFILES,
+    "marine_life": _MARINE_LIFE,
+    "conservation": _CONSERVATION_DATA,
+    "climate": _CLIMATE_DATA,
+    "human_impact": _HUMAN_IMPACT_DATA
+}
+
+
+def freeze(value):
+    """Return a read-only copy of nested dicts and lists"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def load_knowledge(path=None):
+    """Built-in sections, overridden by the sections of the JSON file at path, frozen"""
+    sections = dict(BUILTIN_SECTIONS)
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            overrides = json.load(f)
+        unknown = set(overrides) - set(sections)
+        if unknown:
+            raise ValueError(f"Unknown knowledge sections in {path}: {sorted(unknown)}")
+        sections.update(overrides)
+    return freeze(sections)
+
+
+KNOWLEDGE = load_knowledge(os.environ.get("FLOATCHAT_KNOWLEDGE"))
+
+
+def main(argv=None):
+    """Write the built-in knowledge as JSON: python ocean_knowledge.py PATH"""
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("Usage: python ocean_knowledge.py PATH")
+        return 1
+
+    with open(argv[0], "w", encoding="utf-8") as f:
+        json.dump(BUILTIN_SECTIONS, f, indent=2, ensure_ascii=False)
+    print(f"Wrote {len(BUILTIN_SECTIONS)} knowledge sections to {argv[0]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+"""Persistent conversation turns, shared by every worker that opens the same store.
+
+A SessionStore keeps recently used sessions in an in-memory LRU in front of
+a backend. Sessions are loaded lazily, with one indexed read of their latest
+turns, the first time they are touched. New turns are buffered and written in
+batches: append() writes them once batch_size are pending or the oldest has
+waited flush_seconds, and flush() or close() write them at once. Nothing
+writes them on a timer, so a caller that needs a turn seen by other workers
+right away calls flush().
+
+The backend is anything with read(session_id, limit), last_seq(session_id),
+write(rows), delete(session_id) and close(); SQLiteBackend is the embedded one.
+write may renumber turns whose numbers another worker has taken meanwhile,
+returning the ids of the sessions affected, which are then reread.
+A turn is a (seq, role, content, data) tuple; data is an optional string the
+caller defines (a figure spec, an intent).
+
+With validate=True every access first checks the backend's last turn number
+for the session, one index probe, and reloads the session if another worker
+has written to it since. That lets several workers serve the same sessions
+without sticky routing; a turn becomes visible to other workers once it's
+flushed.
+"""
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class SQLiteBackend:
+    """All turns in one SQLite table clustered by (session, seq), in WAL mode so several processes can share it"""
+
+    def __init__(self, path, timeout=30.0):
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS turns ("
+                " session TEXT NOT NULL, seq INTEGER NOT NULL, role TEXT NOT NULL,"
+                " content TEXT NOT NULL, data TEXT, PRIMARY KEY (session, seq)"
+                ") WITHOUT ROWID")
+
+    def read(self, session_id, limit):
+        """The session's latest limit turns, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, role, content, data FROM turns WHERE session = ? ORDER BY seq DESC LIMIT ?",
+                (session_id, limit)).fetchall()
+        rows.reverse()
+        return rows
+
+    def last_seq(self, session_id):
+        """Number of the session's latest turn, or -1 if it has none"""
+        with self._lock:
+            row = self._conn.execute("SELECT max(seq) FROM turns WHERE session = ?", (session_id,)).fetchone()
+        return -1 if row[0] is None else row[0]
+
+    def write(self, rows):
+        """Store (session, seq, role, content, data) rows in one transaction.
+
+        Stored turns are never overwritten: where another process has taken
+        one of these turn numbers meanwhile, that session's rows are stored
+        after its latest turn instead. Returns the ids of those sessions.
+        """
+        renumbered = set()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("SAVEPOINT batch")
+                try:
+                    self._conn.executemany("INSERT INTO turns VALUES (?, ?, ?, ?, ?)", rows)
+                except sqlite3.IntegrityError:
+                    self._conn.execute("ROLLBACK TO batch")
+                    renumbered = self._insert_renumbering(rows)
+                self._conn.execute("RELEASE batch")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return renumbered
+
+    def _insert_renumbering(self, rows):
+        # Caller holds the write transaction, so the latest turn read here stays the latest
+        renumbered, next_seq = set(), {}
+        for session, seq, role, content, data in rows:
+            seq = next_seq.get(session, seq)
+            try:
+                self._conn.execute("INSERT INTO turns VALUES (?, ?, ?, ?, ?)", (session, seq, role, content, data))
+            except sqlite3.IntegrityError:
+                seq = self._conn.execute("SELECT max(seq) FROM turns WHERE session = ?", (session,)).fetchone()[0] + 1
+                self._conn.execute("INSERT INTO turns VALUES (?, ?, ?, ?, ?)", (session, seq, role, content, data))
+                renumbered.add(session)
+            if session in renumbered:
+                next_seq[session] = seq + 1
+        return renumbered
+
+    def delete(self, session_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM turns WHERE session = ?", (session_id,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CachedSession:
+    """A session's latest turns as held in memory"""
+    __slots__ = ("turns", "last_seq")
+
+    def __init__(self, turns, history_size):
+        self.turns = deque(turns, maxlen=history_size)
+        self.last_seq = self.turns[-1][0] if self.turns else -1
+
+
+class SessionStore:
+    """LRU of recently used sessions in front of a backend, with batched write-behind"""
+
+    def __init__(self, backend, capacity=1024, history_size=100, batch_size=256, flush_seconds=1.0,
+                 validate=False):
+        self.backend = backend
+        self.capacity = capacity
+        self.history_size = history_size
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.validate = validate
+        self._sessions = OrderedDict()
+        self._pending = []
+        self._pending_since = None
+        self._lock = threading.RLock()
+
+    def history(self, session_id):
+        """The session's latest turns, oldest first; empty for a session never written to"""
+        with self._lock:
+            return list(self._session(session_id).turns)
+
+    def last_seq(self, session_id):
+        with self._lock:
+            return self._session(session_id).last_seq
+
+    def append(self, session_id, role, content, data=None):
+        """Record a turn and return its number"""
+        with self._lock:
+            session = self._session(session_id)
+            seq = session.last_seq + 1
+            session.turns.append((seq, role, content, data))
+            session.last_seq = seq
+            self._pending.append((session_id, seq, role, content, data))
+            if self._pending_since is None:
+                self._pending_since = time.monotonic()
+            self.maybe_flush()
+            return seq
+
+    def maybe_flush(self):
+        """Flush if the batch is full or has waited flush_seconds"""
+        with self._lock:
+            if self._pending and (len(self._pending) >= self.batch_size or
+                                  time.monotonic() - self._pending_since >= self.flush_seconds):
+                self.flush()
+
+    def flush(self):
+        """Write every pending turn now"""
+        with self._lock:
+            if self._pending:
+                renumbered = self.backend.write(self._pending)
+                self._pending = []
+                self._pending_since = None
+                # Another worker got to these sessions first; reread them as stored
+                for session_id in renumbered or ():
+                    self._sessions.pop(session_id, None)
+
+    def forget(self, session_id):
+        """Delete a session everywhere"""
+        with self._lock:
+            self.flush()
+            self._sessions.pop(session_id, None)
+            self.backend.delete(session_id)
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self.backend.close()
+
+    def _session(self, session_id):
+        session = self._sessions.get(session_id)
+        if session is not None and self.validate and self.backend.last_seq(session_id) > session.last_seq:
+            # Another worker has moved this session on
+            session = None
+        if session is None:
+            # Pending turns may belong to this session; the read has to see them
+            self.flush()
+            session = CachedSession(self.backend.read(session_id, self.history_size), self.history_size)
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.capacity:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def shared_store(path, **kwargs):
+    """The process-wide SessionStore for an SQLite file, opened on first use"""
+    with _shared_lock:
+        if path not in _shared:
+            _shared[path] = SessionStore(SQLiteBackend(path), **kwargs)
+        return _shared[path]
@@ -0,0 +1,151 @@
+import os
+import re
+from collections import defaultdict
+
+# Lowercase words and numbers; punctuation only separates them
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+# Everyday words that are one or two edits away from a domain word ("how" and
+# "flow", "were" and "where") and must never be corrected into one
+COMMON_WORDS = """
+a about above after again all also am an and any are around as at away back be because been before being
+below between both but by can could day did do does down each even every far few for from get give go good
+had has have he hear heard help her here high him his how i if in into is it its just know last less like
+long low make many may me more most much must my near need new no not now of off old on one only or other
+our out over own part place please same say see she should show slow so some still such take tell than that
+the their them then there these they thing think this those through time to today too two under up us use
+very want was way we wear well were what when which while who why will with word work world would year yes
+you your
+""".split()
+
+# Everyday words within an edit or two of the bots' keywords ("specific" and
+# "pacific", "activity" and "acidity"), known even without a system word list
+EVERYDAY_WORDS = """
+activity allocation anarchic aortic arena atlantis attic cello currency death donation evocation exist facet
+facility fantastic flotation greening interacting intercepting intersecting jello lactation legation meetings
+narcotic notation pacifier pacifism pacifist quiet quite recurrent relocation rotation rowdy sale salty scold
+seize side solidity specials specific specifies specimen specimens speeches swarm temperate tempo tempt
+vacation validity vocation wish
+""".split()
+
+# Where a general English word list is usually installed
+DICTIONARY_PATHS = ("/usr/share/dict/words", "/usr/dict/words")
+
+# Words shorter than this are too easy to turn into other words to correct at all
+MIN_CORRECTION_LENGTH = 5
+
+
+def english_words(paths=DICTIONARY_PATHS):
+    """COMMON_WORDS, EVERYDAY_WORDS and the lowercase words of the first system word list found"""
+    words = set(COMMON_WORDS) | set(EVERYDAY_WORDS)
+    for path in paths:
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                words.update(word for word in (line.strip() for line in f) if word.isalpha() and word.islower())
+            break
+    return frozenset(words)
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance between a and b, or limit + 1 once it's certainly above limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j, cb in enumerate(b, 1):
+            cost = 0 if ca == cb else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def deletes(word, max_distance):
+    """Every string obtained by deleting up to max_distance characters from word, word included"""
+    variants = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))} - variants
+        variants |= frontier
+    return variants
+
+
+class SpellingIndex:
+    """Correct words against a fixed vocabulary with a symmetric-delete index.
+
+    Every vocabulary word is stored under all of its deletions of up to
+    max_distance characters. A misspelling is corrected by generating its own
+    deletions and looking each up, which finds every vocabulary word within
+    max_distance edits without comparing against the whole vocabulary. Ties
+    between equally close words go to the more frequent one.
+
+    Words in known are correct as they are but never offered as corrections,
+    which keeps ordinary words from being pulled towards one another.
+    """
+
+    def __init__(self, frequencies, known=(), max_distance=2, cache_size=10000):
+        self.frequencies = dict(frequencies)
+        self.known = frozenset(known)
+        self.max_distance = max_distance
+        self.cache_size = cache_size
+        self._deletes = defaultdict(list)
+        for word in self.frequencies:
+            for variant in deletes(word, max_distance):
+                self._deletes[variant].append(word)
+        self._cache = {}
+
+    def allowed_distance(self, word):
+        """Short words are too easy to turn into other words, so they get fewer edits"""
+        if len(word) < MIN_CORRECTION_LENGTH:
+            return 0
+        if len(word) <= 7:
+            return min(1, self.max_distance)
+        return self.max_distance
+
+    def lookup(self, word):
+        """Closest vocabulary word to word, or None if nothing is close enough"""
+        if word in self.frequencies or word in self.known:
+            return word
+        if word in self._cache:
+            return self._cache[word]
+
+        best = None
+        limit = self.allowed_distance(word)
+        if limit and not any(ch.isdigit() for ch in word):
+            best_key = None
+            seen = set()
+            for variant in deletes(word, limit):
+                for candidate in self._deletes.get(variant, ()):
+                    if candidate in seen:
+                        continue
+                    seen.add(candidate)
+                    distance = edit_distance(word, candidate, limit)
+                    if distance <= limit:
+                        key = (distance, -self.frequencies[candidate], candidate)
+                        if best_key is None or key < best_key:
+                            best, best_key = candidate, key
+
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[word] = best
+        return best
+
+    def correct(self, word):
+        """word itself if it's known or nothing is close, otherwise its correction"""
+        return self.lookup(word) or word
+
+    def __len__(self):
+        return len(self.frequencies)